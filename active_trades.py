@@ -15,8 +15,9 @@ import time
 import datetime as dt
 from typing import List, Dict, Any, Optional
 
-import requests
 import streamlit as st
+
+from utils import http_client
 # NOTE: fetch_tiingo_intraday returns a pandas DataFrame
 from utils.tiingo_api import fetch_tiingo_intraday
 from utils.tiingo_api import fetch_tiingo_realtime_quote
@@ -134,7 +135,7 @@ def _fetch_price_tiingo_iex(symbol: str) -> Optional[float]:
         return None
     try:
         url = f"https://api.tiingo.com/iex/{symbol.upper()}"
-        r = requests.get(url, headers={"Authorization": f"Token {tok}"}, timeout=8)
+        r = http_client.get(url, headers={"Authorization": f"Token {tok}"}, timeout=8)
         if not r.ok:
             return None
         j = r.json()
@@ -152,7 +153,7 @@ def _fetch_price_tiingo_iex(symbol: str) -> Optional[float]:
 def _fetch_price_yahoo(symbol: str) -> Optional[float]:
     try:
         url = "https://query1.finance.yahoo.com/v7/finance/quote"
-        r = requests.get(url, params={"symbols": symbol.upper()}, timeout=8)
+        r = http_client.get(url, params={"symbols": symbol.upper()}, timeout=8)
         if not r.ok:
             return None
         res = r.json().get("quoteResponse", {}).get("result", [])
@@ -864,7 +865,6 @@ def _refresh_intraday_for_opens(rows: List[Dict[str, Any]]) -> List[Dict[str, An
                         print(f"🎯 Trailing Stop: {sym} stop {old_stop:.2f} → {new_stop:.2f} ({trail_reason})")
 
         updated_rows.append(r)
-        time.sleep(0.15)
 
     _save_trades(updated_rows)
     print("=== Done refreshing ===\n")
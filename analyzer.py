@@ -1543,7 +1543,7 @@ def analyzer_ui(TIINGO_TOKEN):
 
                     # --- Sentiment Section ---
                     # --- Sentiment Data Fetch ---
-                    import requests
+                    from utils import http_client
                     from textblob import TextBlob
 
                     articles = []
@@ -1552,7 +1552,7 @@ def analyzer_ui(TIINGO_TOKEN):
 
                     try:
                         news_url = "https://api.tiingo.com/tiingo/news"
-                        r = requests.get(
+                        r = http_client.get(
                             news_url,
                             params={"tickers": symbol, "limit": 5},
                             headers={"Authorization": f"Token {TIINGO_TOKEN}"},
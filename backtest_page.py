@@ -7,7 +7,9 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from utils.backtesting import backtest_strategy
+from utils.backtesting import backtest_strategy, portfolio_backtest, sweep_strategy, walk_forward_strategy
+from utils.portfolio_settings import load_portfolio_settings
+from utils.robustness import MC_SIMULATIONS, bootstrap_equity
 from utils.storage import load_watchlist
 from scanner import load_verified_universe
 
@@ -39,8 +41,8 @@ def show_backtest_page(token: str):
                 st.warning("⚠️ No watchlist found! Add stocks to your watchlist first.")
                 st.stop()
         elif ticker_source == "Full Universe":
-            tickers = load_verified_universe(token)[:100]  # Limit to 100 for speed
-            st.caption(f"Testing on {len(tickers)} stocks (limited for performance)")
+            tickers = load_verified_universe(token)
+            st.caption(f"Testing on {len(tickers)} stocks")
         else:
             custom_input = st.text_area(
                 "Enter tickers (comma-separated)",
@@ -137,12 +139,36 @@ def show_backtest_page(token: str):
         st.divider()
         
         run_backtest = st.button("🚀 Run Backtest", type="primary", use_container_width=True)
+
+        # Parameter sweep: every combination in one pass over the data
+        with st.expander("🧪 Parameter Sweep"):
+            st.caption("Values left empty use the settings above.")
+            sweep_grid = {
+                "setup_mode": st.multiselect("Setup modes", ["Pullback", "Breakout", "Both"]),
+                "sensitivity": st.multiselect("Sensitivities", [1, 2, 3, 4, 5], default=[1, 2, 3, 4, 5]),
+                "hold_days": st.multiselect("Hold days", [3, 5, 7, 10, 15, 20], default=[3, 5, 10]),
+                "stop_loss_atr_mult": st.multiselect("Stop (ATR ×)", [1.0, 1.5, 2.0, 2.5, 3.0], default=[1.0, 1.5, 2.0]),
+                "take_profit_r_mult": st.multiselect("Target (R ×)", [1.0, 1.5, 2.0, 3.0, 4.0], default=[1.5, 2.0, 3.0]),
+            }
+            run_sweep = st.button("🧪 Run Sweep", use_container_width=True)
     
     # Run backtest
     if run_backtest:
         st.session_state["backtest_running"] = True
         
-        with st.spinner(f"🔄 Backtesting {len(tickers)} stocks over {lookback_days} days... This may take 1-2 minutes"):
+        progress_bar = st.progress(0.0, text=f"🔄 Loading {len(tickers)} stocks over {lookback_days} days...")
+        interim = st.empty()
+
+        def show_progress(done, total, trades):
+            progress_bar.progress(done / total if total else 1.0,
+                                  text=f"🔄 Backtested {done}/{total} stocks")
+            if trades:
+                wins = sum(1 for t in trades if t["pnl"] > 0)
+                avg_r = sum(t["r_multiple"] for t in trades) / len(trades)
+                interim.caption(f"So far: {len(trades)} trades · "
+                                f"{wins / len(trades) * 100:.1f}% win rate · {avg_r:+.2f}R avg")
+
+        with st.spinner(f"🔄 Backtesting {len(tickers)} stocks..."):
             results = backtest_strategy(
                 tickers=tickers,
                 token=token,
@@ -156,13 +182,51 @@ def show_backtest_page(token: str):
                 stop_loss_atr_mult=stop_loss_mult,
                 take_profit_r_mult=take_profit_mult,
                 pattern_filter=pattern_filter,
+                _progress_cb=show_progress,
             )
             
             st.session_state["backtest_results"] = results
+            # Monte Carlo / walk-forward / portfolio runs belong to the previous results
+            for stale in ("mc_results", "wf_results", "portfolio_results"):
+                st.session_state.pop(stale, None)
+
+        progress_bar.empty()
+        interim.empty()
         
         st.session_state["backtest_running"] = False
         st.success("✅ Backtest complete!")
     
+    # Run parameter sweep
+    if run_sweep:
+        progress_bar = st.progress(0.0, text=f"🔄 Loading {len(tickers)} stocks over {lookback_days} days...")
+
+        def show_sweep_progress(done, total):
+            progress_bar.progress(done / total if total else 1.0,
+                                  text=f"🧪 Swept {done}/{total} stocks")
+
+        st.session_state["sweep_results"] = sweep_strategy(
+            tickers=tickers,
+            token=token,
+            grid=sweep_grid,
+            lookback_days=lookback_days,
+            setup_mode=setup_mode,
+            sensitivity=sensitivity,
+            price_min=price_min,
+            price_max=price_max,
+            min_volume=min_volume,
+            hold_days=hold_days,
+            stop_loss_atr_mult=stop_loss_mult,
+            take_profit_r_mult=take_profit_mult,
+            pattern_filter=pattern_filter,
+            _progress_cb=show_sweep_progress,
+        )
+        progress_bar.empty()
+        st.success("✅ Sweep complete!")
+
+    sweep = st.session_state.get("sweep_results")
+    if sweep is not None and not sweep.empty:
+        show_sweep_section(sweep)
+
     # Display results
     results = st.session_state.get("backtest_results")
     
@@ -175,24 +239,94 @@ def show_backtest_page(token: str):
         st.stop()
     
     # Display results in tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Overview", "📈 Performance", "📋 All Trades", "📐 Patterns", "⚙️ Settings"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
+        ["📊 Overview", "📈 Performance", "💼 Portfolio", "📋 All Trades", "📐 Patterns", "⚙️ Settings"]
+    )
+    run_settings = dict(
+        tickers=tickers, token=token, setup_mode=setup_mode, sensitivity=sensitivity,
+        price_min=price_min, price_max=price_max, min_volume=min_volume, hold_days=hold_days,
+        stop_loss_atr_mult=stop_loss_mult, take_profit_r_mult=take_profit_mult,
+        pattern_filter=pattern_filter,
+    )
 
     with tab1:
         show_overview_tab(results)
 
     with tab2:
-        show_performance_tab(results)
+        show_performance_tab(results, {**run_settings, "grid": sweep_grid})
 
     with tab3:
-        show_trades_tab(results)
+        show_portfolio_tab({**run_settings, "lookback_days": lookback_days})
 
     with tab4:
-        show_patterns_tab(results)
+        show_trades_tab(results)
 
     with tab5:
+        show_patterns_tab(results)
+
+    with tab6:
         show_settings_tab(results, setup_mode, sensitivity, lookback_days)
 
 
+SWEEP_LABELS = {
+    "setup_mode": "Setup Mode", "sensitivity": "Sensitivity", "hold_days": "Hold Days",
+    "stop_loss_atr_mult": "Stop (ATR ×)", "take_profit_r_mult": "Target (R ×)",
+}
+SWEEP_METRICS = {
+    "expectancy": "Expectancy ($)", "win_rate": "Win Rate %", "profit_factor": "Profit Factor",
+    "avg_r": "Avg R", "max_loss_streak": "Max Loss Streak",
+}
+
+
+def show_sweep_section(sweep: pd.DataFrame):
+    """Ranked parameter combinations plus a heatmap over any two parameters."""
+
+    st.subheader("🧪 Parameter Sweep")
+    st.caption(f"{len(sweep)} combinations, ranked by expectancy then profit factor.")
+
+    varied = [p for p in SWEEP_LABELS if sweep[p].nunique() > 1]
+    if len(varied) >= 2:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            x_param = st.selectbox("X axis", varied, index=0, format_func=SWEEP_LABELS.get)
+        with col2:
+            y_param = st.selectbox("Y axis", [p for p in varied if p != x_param],
+                                   format_func=SWEEP_LABELS.get)
+        with col3:
+            metric = st.selectbox("Metric", list(SWEEP_METRICS), format_func=SWEEP_METRICS.get)
+
+        # Best value across the parameters not on the axes (lowest for streaks)
+        agg = "min" if metric == "max_loss_streak" else "max"
+        values = sweep.replace([float("inf")], float("nan"))
+        heat = values.pivot_table(index=y_param, columns=x_param, values=metric, aggfunc=agg)
+        fig = px.imshow(
+            heat,
+            text_auto=".2f",
+            aspect="auto",
+            color_continuous_scale="RdYlGn_r" if metric == "max_loss_streak" else "RdYlGn",
+            labels={"x": SWEEP_LABELS[x_param], "y": SWEEP_LABELS[y_param], "color": SWEEP_METRICS[metric]},
+        )
+        fig.update_layout(title=f"{SWEEP_METRICS[metric]} ({agg} over other parameters)", height=400)
+        fig.update_xaxes(type="category")
+        fig.update_yaxes(type="category")
+        st.plotly_chart(fig, use_container_width=True)
+
+    table = sweep.rename(columns={**SWEEP_LABELS, **SWEEP_METRICS, "trades": "Trades",
+                                  "avg_return": "Avg Return %"})
+    st.dataframe(
+        table.style.format({
+            "Win Rate %": "{:.1f}%",
+            "Avg Return %": "{:+.2f}%",
+            "Avg R": "{:.2f}R",
+            "Expectancy ($)": "${:.2f}",
+            "Profit Factor": lambda x: f"{x:.2f}" if x != float("inf") else "∞",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.divider()
+
+
 def show_overview_tab(results: dict):
     """Display overview metrics."""
 
@@ -352,8 +486,8 @@ def show_overview_tab(results: dict):
             """)
 
 
-def show_performance_tab(results: dict):
-    """Display performance charts."""
+def show_performance_tab(results: dict, settings: dict | None = None):
+    """Display performance charts, Monte Carlo and walk-forward robustness checks."""
 
     st.subheader("📈 Performance Over Time")
 
@@ -414,6 +548,242 @@ def show_performance_tab(results: dict):
 
         st.dataframe(setup_stats, use_container_width=True, hide_index=True)
 
+    st.divider()
+    show_monte_carlo(results)
+
+    if settings:
+        st.divider()
+        show_walk_forward(settings)
+
+
+def show_monte_carlo(results: dict):
+    """Bootstrap the trade R-multiples into equity-curve and drawdown distributions."""
+
+    st.subheader("🎲 Monte Carlo (Trade Resampling)")
+    st.caption(
+        "Reshuffles the backtest's trades with replacement thousands of times and "
+        "compounds each sequence at your risk per trade — shows the range of equity "
+        "curves and drawdowns the same edge could have produced."
+    )
+
+    r_multiples = pd.DataFrame(results.get("all_trades", [])).get("r_multiple")
+    if r_multiples is None or r_multiples.dropna().empty:
+        st.info("No trades to resample.")
+        return
+
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        risk_pct = st.number_input(
+            "Risk per trade (%)",
+            value=float(load_portfolio_settings().get("risk_pct", 1.0)),
+            min_value=0.1, max_value=10.0, step=0.25,
+            key="mc_risk_pct",
+        )
+    with col2:
+        n_sims = st.select_slider("Simulations", [1_000, 2_500, 5_000, MC_SIMULATIONS],
+                                  value=MC_SIMULATIONS, key="mc_sims")
+    with col3:
+        st.write("")
+        run_mc = st.button("🎲 Run Monte Carlo", use_container_width=True)
+
+    if run_mc:
+        st.session_state["mc_results"] = bootstrap_equity(r_multiples.to_numpy(), risk_pct, n_sims)
+
+    mc = st.session_state.get("mc_results")
+    if not mc:
+        return
+
+    final, max_dd = mc["final_return"], mc["max_drawdown"]
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Median Return", f"{pd.Series(final).median():+.1f}%")
+    m2.metric("5th Pct Return", f"{pd.Series(final).quantile(0.05):+.1f}%")
+    m3.metric("Median Max DD", f"{pd.Series(max_dd).median():.1f}%")
+    m4.metric("95th Pct Max DD", f"{pd.Series(max_dd).quantile(0.95):.1f}%")
+    m5.metric("Chance of Loss", f"{mc['prob_loss'] * 100:.1f}%")
+
+    # Fan chart: 5–95 and 25–75 percentile bands around the median path
+    steps, curves = mc["steps"], mc["curves"]
+    fig = go.Figure()
+    for lo, hi, color in ((5, 95, "rgba(93, 211, 158, 0.15)"), (25, 75, "rgba(93, 211, 158, 0.3)")):
+        fig.add_trace(go.Scatter(x=steps, y=curves[hi], mode="lines", line=dict(width=0),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=steps, y=curves[lo], mode="lines", line=dict(width=0),
+                                 fill="tonexty", fillcolor=color, name=f"{lo}–{hi}th pct"))
+    fig.add_trace(go.Scatter(x=steps, y=curves[50], mode="lines", name="Median",
+                             line=dict(color="#5DD39E", width=2)))
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
+    fig.update_layout(
+        title="Simulated Equity Curves",
+        xaxis_title="Trade #", yaxis_title="Account Return (%)",
+        height=400, hovermode="x unified",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    fig_dd = px.histogram(x=max_dd, nbins=50, labels={"x": "Max Drawdown (%)"})
+    fig_dd.update_layout(title="Max Drawdown Distribution", yaxis_title="Simulations",
+                         height=300, showlegend=False)
+    st.plotly_chart(fig_dd, use_container_width=True)
+
+
+def show_walk_forward(settings: dict):
+    """Rolling train/test selection over the sweep grid, scored out of sample."""
+
+    st.subheader("🚶 Walk-Forward Test")
+    st.caption(
+        "On each training window, picks the best parameter combination from the "
+        "Parameter Sweep grid (sidebar), then trades it on the following window it "
+        "never saw. Out-of-sample results close to in-sample ones suggest the edge "
+        "isn't curve-fit."
+    )
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        history_days = st.selectbox("History", [("1 Year", 365), ("2 Years", 730), ("3 Years", 1095)],
+                                    index=1, format_func=lambda x: x[0], key="wf_history")[1]
+    with col2:
+        train_months = st.selectbox("Train (months)", [3, 6, 9, 12], index=1, key="wf_train")
+    with col3:
+        test_months = st.selectbox("Test (months)", [1, 2, 3], index=1, key="wf_test")
+    with col4:
+        st.write("")
+        run_wf = st.button("🚶 Run Walk-Forward", use_container_width=True)
+
+    if run_wf:
+        progress_bar = st.progress(0.0, text="🔄 Loading history...")
+
+        def show_wf_progress(done, total):
+            progress_bar.progress(done / total if total else 1.0,
+                                  text=f"🚶 Simulated {done}/{total} stocks")
+
+        st.session_state["wf_results"] = walk_forward_strategy(
+            lookback_days=history_days,
+            train_days=train_months * 30,
+            test_days=test_months * 30,
+            _progress_cb=show_wf_progress,
+            **settings,
+        )
+        progress_bar.empty()
+
+    wf = st.session_state.get("wf_results")
+    if not wf:
+        return
+    if "error" in wf:
+        st.warning(wf["error"])
+        return
+
+    oos, ins = wf["oos"], wf["in_sample"]
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("OOS Expectancy", f"${oos['expectancy']:.2f}",
+              delta=f"{oos['expectancy'] - ins['expectancy']:+.2f} vs in-sample")
+    m2.metric("OOS Win Rate", f"{oos['win_rate']:.1f}%",
+              delta=f"{oos['win_rate'] - ins['win_rate']:+.1f}% vs in-sample")
+    m3.metric("OOS Profit Factor",
+              f"{oos['profit_factor']:.2f}" if oos["profit_factor"] != float("inf") else "∞")
+    m4.metric("Walk-Forward Efficiency",
+              f"{wf['efficiency'] * 100:.0f}%" if pd.notna(wf["efficiency"]) else "—",
+              help="Out-of-sample expectancy as a share of the best in-sample expectancy")
+
+    folds = wf["folds"]
+    fig = go.Figure()
+    labels = folds["test_start"].dt.strftime("%Y-%m-%d")
+    fig.add_trace(go.Bar(x=labels, y=folds["is_avg_r"], name="In-sample Avg R", marker_color="#94a3b8"))
+    fig.add_trace(go.Bar(x=labels, y=folds["oos_avg_r"], name="Out-of-sample Avg R", marker_color="#5DD39E"))
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
+    fig.update_layout(title="Avg R by Fold (test window start)", barmode="group",
+                      yaxis_title="Avg R-Multiple", height=350)
+    st.plotly_chart(fig, use_container_width=True)
+
+    display = folds.copy()
+    for col in ("train_start", "test_start", "test_end"):
+        display[col] = display[col].dt.strftime("%Y-%m-%d")
+    st.dataframe(display, use_container_width=True, hide_index=True)
+
+
+def show_portfolio_tab(settings: dict):
+    """Replay the backtest through one account with capital and position limits."""
+
+    st.subheader("💼 Portfolio Simulation")
+    st.caption(
+        "Runs every signal through a single account in date order: each entry is sized "
+        "at your risk per trade, and new signals are skipped while all position slots "
+        "are full or cash runs out."
+    )
+
+    portfolio = load_portfolio_settings()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        account_value = st.number_input("Account Value ($)", value=float(portfolio["account_value"]),
+                                        min_value=1000.0, step=1000.0, key="pf_account")
+    with col2:
+        risk_pct = st.number_input("Risk per Trade (%)", value=float(portfolio["risk_pct"]),
+                                   min_value=0.1, max_value=10.0, step=0.25, key="pf_risk")
+    with col3:
+        max_positions = st.number_input("Max Positions", value=int(portfolio["max_positions"]),
+                                        min_value=1, max_value=50, step=1, key="pf_positions")
+    with col4:
+        st.write("")
+        run_pf = st.button("💼 Simulate Portfolio", use_container_width=True)
+
+    if run_pf:
+        progress_bar = st.progress(0.0, text="🔄 Loading history...")
+
+        def show_pf_progress(done, total, trades):
+            progress_bar.progress(done / total if total else 1.0,
+                                  text=f"💼 Collected signals for {done}/{total} stocks")
+
+        st.session_state["portfolio_results"] = portfolio_backtest(
+            account_value=account_value,
+            risk_pct=risk_pct,
+            max_positions=int(max_positions),
+            _progress_cb=show_pf_progress,
+            **settings,
+        )
+        progress_bar.empty()
+
+    pf = st.session_state.get("portfolio_results")
+    if not pf:
+        return
+    if "error" in pf:
+        st.warning(pf["error"])
+        return
+
+    stats = pf["stats"]
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Ending Value", f"${stats['end_value']:,.0f}", delta=f"{stats['total_return']:+.1f}%")
+    m2.metric("CAGR", f"{stats['cagr']:+.1f}%")
+    m3.metric("Max Drawdown", f"{stats['max_drawdown']:.1f}%")
+    m4.metric("Avg Exposure", f"{stats['avg_exposure']:.0f}%")
+    m5.metric("Sharpe", f"{stats['sharpe']:.2f}")
+    st.caption(
+        f"{stats['trades_taken']} trades taken ({stats['win_rate']:.1f}% winners) · "
+        f"{stats['skipped_max_positions']} skipped with all slots full · "
+        f"{stats['skipped_size']} skipped for size/cash"
+    )
+
+    fig = go.Figure(go.Scatter(
+        x=pf["equity"].index, y=pf["equity"], mode="lines", name="Equity",
+        line=dict(color="#5DD39E", width=2),
+    ))
+    fig.add_hline(y=stats["start_value"], line_dash="dash", line_color="gray", opacity=0.5)
+    fig.update_layout(title="Account Equity", yaxis_title="Equity ($)", height=400, hovermode="x unified")
+    st.plotly_chart(fig, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig_dd = go.Figure(go.Scatter(
+            x=pf["drawdown"].index, y=pf["drawdown"], mode="lines", name="Drawdown",
+            line=dict(color="#ef4444", width=1.5), fill="tozeroy", fillcolor="rgba(239, 68, 68, 0.15)",
+        ))
+        fig_dd.update_layout(title="Drawdown", yaxis_title="Drawdown (%)", height=300)
+        st.plotly_chart(fig_dd, use_container_width=True)
+    with col2:
+        fig_ex = go.Figure(go.Scatter(
+            x=pf["exposure"].index, y=pf["exposure"], mode="lines", name="Exposure",
+            line=dict(color="#60a5fa", width=1.5), fill="tozeroy", fillcolor="rgba(96, 165, 250, 0.15)",
+        ))
+        fig_ex.update_layout(title="Exposure", yaxis_title="% of Equity Invested", height=300)
+        st.plotly_chart(fig_ex, use_container_width=True)
+
 
 def show_trades_tab(results: dict):
     """Display all trades table."""
@@ -3,32 +3,30 @@ Base Formation Scanner
 Scans the quality universe for stocks coiling into low-volatility consolidation bases.
 Tier 1 = high conviction (score 8-10), Tier 2 = developing (6-7), Tier 3 = early (4-5).
 """
-import concurrent.futures as futures
 import json
 import math
 import os
-import time
 from datetime import datetime
 
 import pandas as pd
 import streamlit as st
 
-from utils.tiingo_api import tiingo_history, tiingo_all_us_tickers, get_next_earnings_date  # tiingo_all_us_tickers used as fallback in _load_universe
+from utils.tiingo_api import tiingo_history, tiingo_history_many, tiingo_all_us_tickers, get_next_earnings_date  # tiingo_all_us_tickers used as fallback in _load_universe
 from utils.indicators import compute_indicators
 from utils.storage import (
     save_watchlists_to_gist,
     load_base_scan_metadata, save_base_scan_metadata,
 )
 from utils.universe_builder import CACHE_PATH
+from utils.scan_snapshots import load_base_snapshot, latest_run
 from utils.claude_analyzer import analyze_base_formations, render_ai_chat
 from utils.portfolio_settings import load_portfolio_settings, format_portfolio_context_for_claude
 
 # ---------------------------------------------------------------------------
 # Universe Loader  (mirrors scanner.py logic, no cross-import needed)
 # ---------------------------------------------------------------------------
-MAX_WORKERS = 6
-BATCH_SIZE  = 40
-BATCH_PAUSE = 0.25   # seconds between batches
+HISTORY_DAYS = 90
+BATCH_SIZE   = 40    # earnings checks between progress updates
 
 
 def _load_universe(token: str) -> list[str]:
@@ -81,15 +79,18 @@ def evaluate_base_formation(
     price_min: float = 5.0,
     price_max: float = 500.0,
     min_avg_vol: float = 300_000,
+    df: pd.DataFrame | None = None,
 ) -> dict | None:
     """
     Score a ticker for base-formation quality (0–10).
     Applies price/volume pre-filters before scoring.
     Returns None if it fails any filter or scores < 4.
     Resistance is the 20-day high (breakout trigger price).
+    Pass `df` (preloaded daily bars) to skip the history fetch.
     """
     try:
-        df = tiingo_history(ticker, token, days=90)
+        if df is None:
+            df = tiingo_history(ticker, token, days=HISTORY_DAYS)
         if df is None or df.empty or len(df) < 60:
             return None
 
@@ -189,6 +190,57 @@ def evaluate_base_formation(
         return None
 
 
+def run_base_scan(
+    universe: list[str],
+    token: str,
+    price_min: float,
+    price_max: float,
+    min_avg_vol: float,
+    min_score: int = 4,
+    progress_cb=None,
+) -> dict:
+    """
+    Score every ticker in `universe` and drop bases with earnings ≤14 days out.
+
+    progress_cb(stage, done, total, hits) is called with stage "load" while
+    bars are fetched and scored, then "earnings" during the earnings check.
+    Returns {"results" (best BaseScore first), "excluded_earnings", "scanned"}.
+    """
+    report = progress_cb or (lambda *args: None)
+
+    def _score(ticker, df):
+        return evaluate_base_formation(
+            ticker, token,
+            price_min=price_min,
+            price_max=price_max,
+            min_avg_vol=min_avg_vol,
+            df=df,
+        )
+
+    # Scoring is pure pandas, so it runs on the fetch engine's CPU
+    # executor while the remaining downloads are still in flight.
+    bases = tiingo_history_many(
+        universe, token, HISTORY_DAYS,
+        progress_cb=lambda done, n: report("load", done, n, 0),
+        process=_score,
+    )
+    candidates = [rec for rec in bases.values() if rec["BaseScore"] >= min_score]
+
+    # Earnings lookup is a network call — only made for qualifying bases
+    results, excluded_earn = [], []
+    for checked, rec in enumerate(candidates, start=1):
+        if _is_earnings_within_14_days(rec["Symbol"], token):
+            excluded_earn.append(rec["Symbol"])
+        else:
+            results.append(rec)
+
+        if checked % BATCH_SIZE == 0 or checked == len(candidates):
+            report("earnings", checked, len(candidates), len(results))
+
+    results.sort(key=lambda x: x["BaseScore"], reverse=True)
+    return {"results": results, "excluded_earnings": excluded_earn, "scanned": len(universe)}
+
+
 # ---------------------------------------------------------------------------
 # Streamlit UI
 # ---------------------------------------------------------------------------
@@ -229,58 +281,55 @@ def base_scanner_ui(TIINGO_TOKEN: str):
     universe = _load_universe(TIINGO_TOKEN)
     st.caption(f"📋 Universe: **{len(universe)} quality tickers** (S&P 500 + NASDAQ 100 + popular stocks)")
 
-    run_btn = st.button("🚀 Run Base Scan", use_container_width=True, type="primary")
+    # ── Nightly snapshot (instant results; the scan button rescans live) ────
+    snapshot = None
+    if st.session_state.get("base_scan_source") == "live":
+        if latest_run()[0] is not None and st.button("📦 Show Nightly Snapshot", key="base_use_snapshot"):
+            st.session_state["base_scan_source"] = "snapshot"
+    if st.session_state.get("base_scan_source") != "live":
+        snapshot = load_base_snapshot(price_min, price_max, min_volume)
+
+    run_btn = st.button("🔄 Rescan Live" if snapshot else "🚀 Run Base Scan", key="base_run_scan",
+                        use_container_width=True, type="primary")
 
-    # ── Execute Scan (parallel, same pattern as main scanner) ─────────────────
+    # ── Execute Scan (async bulk history load, scored as bars arrive) ────────
     if run_btn:
-        results = []
-        excluded_earn = []
-        total = len(universe)
         progress = st.progress(0, text="Scanning for base formations…")
 
-        for batch_start in range(0, total, BATCH_SIZE):
-            batch = universe[batch_start: batch_start + BATCH_SIZE]
-
-            def _eval(ticker):
-                if _is_earnings_within_14_days(ticker, TIINGO_TOKEN):
-                    return ("earnings", ticker)
-                rec = evaluate_base_formation(
-                    ticker, TIINGO_TOKEN,
-                    price_min=price_min,
-                    price_max=price_max,
-                    min_avg_vol=min_volume,
-                )
-                return ("result", rec)
-
-            with futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
-                futs = {ex.submit(_eval, t): t for t in batch}
-                for f in futures.as_completed(futs):
-                    try:
-                        kind, val = f.result()
-                        if kind == "earnings":
-                            excluded_earn.append(val)
-                        elif kind == "result" and val and val["BaseScore"] >= min_score:
-                            results.append(val)
-                    except Exception:
-                        pass
-
-            scanned = min(batch_start + len(batch), total)
-            progress.progress(
-                scanned / total,
-                text=f"🔎 {scanned}/{total} scanned | Bases found: {len(results)}",
-            )
-            time.sleep(BATCH_PAUSE)
+        def on_progress(stage: str, done: int, total: int, hits: int):
+            if stage == "load":
+                progress.progress(done / total, text=f"📥 Loading & scoring… {done}/{total} tickers")
+            else:
+                progress.progress(done / total, text=f"📅 Earnings check {done}/{total} | Bases found: {hits}")
+
+        scan = run_base_scan(universe, TIINGO_TOKEN, price_min, price_max, min_volume,
+                             min_score=min_score, progress_cb=on_progress)
+        results, excluded_earn, total = scan["results"], scan["excluded_earnings"], scan["scanned"]
 
         progress.empty()
-        results.sort(key=lambda x: x["BaseScore"], reverse=True)
         st.session_state["base_scan_results"] = results
 
         msg = f"✅ Scan complete — **{len(results)} base formation(s)** from {total} tickers scanned"
         if excluded_earn:
             msg += f" | {len(excluded_earn)} excluded (earnings ≤14 days)"
         st.success(msg)
+        st.session_state["base_scan_source"] = "live"
         st.rerun()
 
+    elif snapshot is not None:
+        # The snapshot keeps every base scoring 4+, so Min Base Score is a plain filter
+        st.session_state["base_scan_results"] = [r for r in snapshot["results"] if r["BaseScore"] >= min_score]
+        st.session_state["base_scan_source"] = "snapshot"
+        run_info = snapshot.get("run", {})
+        st.caption(f"📦 **Nightly snapshot** from {run_info.get('generated_at', snapshot.get('generated_at'))} "
+                   f"(bars through {run_info.get('as_of', '?')}) | "
+                   f"{len(snapshot.get('excluded_earnings', []))} excluded (earnings ≤14 days). "
+                   f"Use **🔄 Rescan Live** for intraday data.")
+    elif st.session_state.get("base_scan_source") == "snapshot":
+        # Filters moved to a combination the nightly job didn't cover
+        st.session_state["base_scan_results"] = []
+        st.session_state["base_scan_source"] = None
+
     # ── Results Display ───────────────────────────────────────────────────────
     results = st.session_state.get("base_scan_results", [])
     if not results:
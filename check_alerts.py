@@ -5,13 +5,14 @@ Runs every 2 hours to check active alerts and send notifications
 
 import os
 import json
-import requests
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from typing import Dict, Any, List
 
+from utils import http_client, ta_kernels
+
 
 def load_alerts() -> List[Dict[str, Any]]:
     """Load active alerts from GitHub (using GitHub API to read from repo)."""
@@ -36,7 +37,7 @@ def load_alerts() -> List[Dict[str, Any]]:
             "Accept": "application/vnd.github.v3.raw"
         }
         
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         
         if response.status_code == 200:
             alerts = response.json()
@@ -61,7 +62,7 @@ def get_current_price(ticker: str) -> float:
         url = f"https://api.tiingo.com/tiingo/daily/{ticker}/prices"
         headers = {"Authorization": f"Token {token}"}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -79,7 +80,6 @@ def get_historical_data(ticker: str, days: int = 60) -> Dict[str, Any]:
     """Fetch historical data and calculate indicators."""
     try:
         import pandas as pd
-        import numpy as np
 
         token = os.getenv("TIINGO_API_KEY")
         if not token:
@@ -103,7 +103,7 @@ def get_historical_data(ticker: str, days: int = 60) -> Dict[str, Any]:
         headers = {"Authorization": f"Token {token}"}
         params = {"startDate": start_date}
 
-        response = requests.get(url, headers=headers, params=params, timeout=15)
+        response = http_client.get(url, headers=headers, params=params, timeout=15)
 
         if response.status_code != 200:
             return None
@@ -113,65 +113,39 @@ def get_historical_data(ticker: str, days: int = 60) -> Dict[str, Any]:
             return None
 
         df = pd.DataFrame(data)
-        df['close'] = df['close'].astype(float)
-        df['high'] = df['high'].astype(float)
-        df['low'] = df['low'].astype(float)
-        df['volume'] = df['volume'].astype(float)
-
-        # Calculate indicators
-        close = df['close']
-
-        # EMA20 and EMA50
-        ema20 = close.ewm(span=20, adjust=False).mean()
-        ema50 = close.ewm(span=50, adjust=False).mean()
-
-        # RSI14
-        delta = close.diff()
-        gain = delta.where(delta > 0, 0).rolling(14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-        rs = gain / (loss + 1e-9)
-        rsi14 = 100 - (100 / (1 + rs))
-
-        # ATR14
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - close.shift(1))
-        low_close = np.abs(df['low'] - close.shift(1))
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        atr14 = tr.rolling(14).mean()
-
-        # Bollinger Bands Position
-        sma20 = close.rolling(20).mean()
-        std20 = close.rolling(20).std()
-        upper_band = sma20 + (2 * std20)
-        lower_band = sma20 - (2 * std20)
-        band_pos = (close - lower_band) / (upper_band - lower_band + 1e-9)
-
-        # MACD
-        ema12 = close.ewm(span=12, adjust=False).mean()
-        ema26 = close.ewm(span=26, adjust=False).mean()
-        macd = ema12 - ema26
-        macd_signal = macd.ewm(span=9, adjust=False).mean()
+        close = df['close'].to_numpy(dtype=float)
+        high = df['high'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float)
+        volume = df['volume'].to_numpy(dtype=float)
+
+        # Calculate indicators (shared kernels: Wilder RSI/ATR, same as the app)
+        ema20 = ta_kernels.ema(close, 20)
+        ema50 = ta_kernels.ema(close, 50)
+        rsi14 = ta_kernels.rsi(close, 14)
+        atr14 = ta_kernels.atr(high, low, close, 14)
+        band_pos = ta_kernels.bollinger_position(close, 20)
+        macd, macd_signal, _ = ta_kernels.macd(close)
 
         # Return current and previous values for crossover detection
         return {
-            "close": float(close.iloc[-1]),
-            "close_prev": float(close.iloc[-2]) if len(close) > 1 else None,
-            "ema20": float(ema20.iloc[-1]),
-            "ema20_prev": float(ema20.iloc[-2]) if len(ema20) > 1 else None,
-            "ema50": float(ema50.iloc[-1]),
-            "ema50_prev": float(ema50.iloc[-2]) if len(ema50) > 1 else None,
-            "rsi14": float(rsi14.iloc[-1]),
-            "rsi14_prev": float(rsi14.iloc[-2]) if len(rsi14) > 1 else None,
-            "atr14": float(atr14.iloc[-1]),
-            "atr14_prev": float(atr14.iloc[-2]) if len(atr14) > 1 else None,
-            "bandpos20": float(band_pos.iloc[-1]),
-            "bandpos20_prev": float(band_pos.iloc[-2]) if len(band_pos) > 1 else None,
-            "volume": float(df['volume'].iloc[-1]),
-            "volume_prev": float(df['volume'].iloc[-2]) if len(df) > 1 else None,
-            "macd": float(macd.iloc[-1]),
-            "macd_prev": float(macd.iloc[-2]) if len(macd) > 1 else None,
-            "macd_signal": float(macd_signal.iloc[-1]),
-            "macd_signal_prev": float(macd_signal.iloc[-2]) if len(macd_signal) > 1 else None,
+            "close": float(close[-1]),
+            "close_prev": float(close[-2]) if len(close) > 1 else None,
+            "ema20": float(ema20[-1]),
+            "ema20_prev": float(ema20[-2]) if len(ema20) > 1 else None,
+            "ema50": float(ema50[-1]),
+            "ema50_prev": float(ema50[-2]) if len(ema50) > 1 else None,
+            "rsi14": float(rsi14[-1]),
+            "rsi14_prev": float(rsi14[-2]) if len(rsi14) > 1 else None,
+            "atr14": float(atr14[-1]),
+            "atr14_prev": float(atr14[-2]) if len(atr14) > 1 else None,
+            "bandpos20": float(band_pos[-1]),
+            "bandpos20_prev": float(band_pos[-2]) if len(band_pos) > 1 else None,
+            "volume": float(volume[-1]),
+            "volume_prev": float(volume[-2]) if len(volume) > 1 else None,
+            "macd": float(macd[-1]),
+            "macd_prev": float(macd[-2]) if len(macd) > 1 else None,
+            "macd_signal": float(macd_signal[-1]),
+            "macd_signal_prev": float(macd_signal[-2]) if len(macd_signal) > 1 else None,
         }
 
     except Exception as e:
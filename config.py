@@ -60,16 +60,14 @@ TIINGO_TIMEOUT = 15  # seconds
 SCAN_LOOKBACK_DAYS = 120  # how many days of Tiingo history to load
 SCAN_TIMEOUT = 15  # seconds for API requests
 
-# Concurrency settings (REVERTED TO SATURDAY'S WORKING VERSION)
-MAX_WORKERS = 8  # number of threads for concurrent scanning (ORIGINAL)
-REQUEST_PAUSE_S = 0.25  # delay between batches (ORIGINAL - WORKING)
-BATCH_TICKER_COUNT = 50  # tickers per batch (ORIGINAL)
-
-# Rate limiting settings - DISABLED (was causing slowdowns)
-# Rate limiter removed from tiingo_api.py to restore original speed
-RATE_LIMIT_MAX_REQUESTS = 50  # kept for reference
-RATE_LIMIT_WINDOW_SECONDS = 60  # kept for reference
-RATE_LIMIT_BUFFER = 0  # kept for reference
+# Concurrency settings
+# History loads run on utils/fetch_engine (see SCAN_CONCURRENCY in utils/scan_engine.py)
+BATCH_TICKER_COUNT = 50  # tickers evaluated between progress updates
+
+# Rate limiting settings
+# Per-provider token buckets live in utils/rate_limiter.PROVIDER_BUDGETS and are
+# enforced inside utils/http_client; they adapt to 429s / Retry-After, so no
+# fixed pauses between requests are needed.
 
 # Default filter values
 DEFAULT_MIN_PRICE = 5.0
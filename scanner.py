@@ -1,17 +1,11 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import math
-import random
-import concurrent.futures as futures
-import time
 import requests
-import json
 import os
 
 # ✅ Helpers
 from utils.tiingo_api import (
-    tiingo_all_us_tickers,
     tiingo_history,
     get_tiingo_sector,
     get_sector_snapshot,
@@ -20,21 +14,19 @@ from utils.tiingo_api import (
     get_next_earnings_date,
 )
 
-from utils.indicators import (
-    rsi, atr, compute_indicators,
-    find_support_resistance, analyze_volume, calculate_relative_strength,
-    calculate_fibonacci_levels, get_fibonacci_zone_label,
-    detect_patterns, find_pivot_points,
-)
+from utils.indicators import rsi, compute_indicators, calculate_relative_strength
+from utils import ta_kernels
 from utils.storage import load_json, save_json, load_watchlists_from_gist, save_watchlists_to_gist, load_base_scan_metadata
 from utils.fundamentals import get_tiingo_fundamentals_for_claude, calculate_fundamental_score
-from utils.target_calculator import calculate_scanner_target
 from utils.claude_analyzer import analyze_scanner_results, render_ai_chat
 from utils.portfolio_settings import load_portfolio_settings, format_portfolio_context_for_claude
+from utils.scan_engine import (
+    ScanCache, ScanContext, ScanEngine, build_card, load_universe,
+    SCAN_LOOKBACK_DAYS, SENSITIVITY_MAP,
+)
+from utils.scan_snapshots import load_scanner_snapshot, latest_run
 
 # ---------------- Universe Loader ----------------
-from utils.universe_builder import CACHE_PATH
-
 @st.cache_data(show_spinner=False, ttl=60 * 60 * 24)  # Cache for 24 hours
 def load_verified_universe(token: str) -> list[str]:
     """
@@ -44,34 +36,7 @@ def load_verified_universe(token: str) -> list[str]:
     PRIORITY: Always tries to load from cache file FIRST (275 quality tickers).
     Only falls back to Tiingo API if cache is missing/corrupted.
     """
-    try:
-        if os.path.exists(CACHE_PATH):
-            with open(CACHE_PATH, "r") as f:
-                data = json.load(f)
-            tickers = [t["ticker"].upper() for t in data.get("tickers", [])]
-            # 🔹 remove duplicates while preserving order
-            seen = set()
-            unique_tickers = [t for t in tickers if not (t in seen or seen.add(t))]
-            if unique_tickers:
-                print(f"✅ Loaded {len(unique_tickers)} unique tickers from HIGH-QUALITY CACHE "
-                      f"(deduped from {len(tickers)})")
-                print(f"📊 Using curated S&P 500 + NASDAQ 100 + popular stocks universe")
-                return unique_tickers
-        print("⚠️ Cache missing or empty, falling back to Tiingo API universe (1000+ tickers)")
-        print("💡 TIP: Run 'python utils/build_quality_universe.py' to build quality cache")
-        return tiingo_all_us_tickers(token)
-    except Exception as e:
-        print(f"❌ Error loading verified universe: {e}")
-        print("⚠️ Falling back to Tiingo API universe")
-        return tiingo_all_us_tickers(token)
-
-
-
-# ---------------- Scanner Configuration Constants ----------------
-SCAN_LOOKBACK_DAYS = 120      # how many days of Tiingo history to load
-MAX_WORKERS = 8               # number of threads for concurrent scanning
-REQUEST_PAUSE_S = 0.25        # delay between batches
-BATCH_TICKER_COUNT = 50       # tickers per batch
+    return load_universe(token)
 
 
 def scanner_ui(TIINGO_TOKEN):
@@ -107,92 +72,7 @@ def scanner_ui(TIINGO_TOKEN):
     debug_button = st.sidebar.button("🔍 Debug This Ticker")
 
     # Map sensitivity to thresholds
-    # Pullback RSI range: 35-50 (healthy pullback zone per Claude's recommendation)
-    sensitivity_map = {
-        1: {"breakout_rsi": 65, "breakout_band": 0.70, "pullback_rsi_min": 35, "pullback_rsi_max": 45, "pullback_band": 0.30},
-        2: {"breakout_rsi": 60, "breakout_band": 0.65, "pullback_rsi_min": 35, "pullback_rsi_max": 48, "pullback_band": 0.35},
-        3: {"breakout_rsi": 55, "breakout_band": 0.55, "pullback_rsi_min": 35, "pullback_rsi_max": 50, "pullback_band": 0.45},
-        4: {"breakout_rsi": 52, "breakout_band": 0.50, "pullback_rsi_min": 35, "pullback_rsi_max": 50, "pullback_band": 0.50},
-        5: {"breakout_rsi": 50, "breakout_band": 0.45, "pullback_rsi_min": 35, "pullback_rsi_max": 50, "pullback_band": 0.55},
-    }
-    thresholds = sensitivity_map[sensitivity]
-
-    # ---------------- Trade Plan math (Target & Stop) ----------------
-    def trade_plan_levels(last_close: float, atr_val: float, mode: str,
-                        stop_atr_mult: float, rr_mult: float) -> tuple[float, float]:
-        """
-        Returns (stop, target). For Pullback, assume bounce; for Breakout, assume expansion.
-        """
-        atr_val = float(atr_val) if pd.notna(atr_val) else 0.0
-        stop = last_close - stop_atr_mult * atr_val
-        if mode == "Pullback":
-            target = last_close + rr_mult * (last_close - stop)        # bounce back
-        elif mode == "Breakout":
-            target = last_close + rr_mult * (stop_atr_mult * atr_val)  # push higher
-        else:
-            target = last_close + rr_mult * (stop_atr_mult * atr_val)
-        return (round(max(stop, 0.01), 4), round(max(target, 0.01), 4))
-
-    # --------------------------------------------------------------
-    # Classify setup (Pullback / Breakout / Neutral)
-    # --------------------------------------------------------------
-    def classify_setup(last: pd.Series) -> str:
-        try:
-            ema20 = float(last["EMA20"])
-            ema50 = float(last["EMA50"])
-            rsi = float(last["RSI14"])
-        except Exception:
-            return "Neutral"
-
-        ema_up = ema20 > ema50
-
-        # Loosened rules for visibility
-        if ema_up and rsi >= 50:
-            return "Breakout"
-        elif ema_up and rsi < 50:
-            return "Pullback"
-        elif not ema_up and rsi < 60:
-            return "Pullback"
-        else:
-            return "Neutral"
-
-
-
-    # --------------------------------------------------------------
-    def passes_filters(last, price_min, price_max, min_volume, mode="Both") -> bool:
-        """Apply meaningful filters to cut down noise, Webull-style."""
-        try:
-            px = float(last["Close"])
-            vol = float(last["Volume"])
-            rsi = float(last.get("RSI14", 50))
-            ema20 = float(last.get("EMA20", np.nan))
-            ema50 = float(last.get("EMA50", np.nan))
-            band = float(last.get("BandPos20", 0.5))
-
-            # --- Basic sanity filters ---
-            if pd.isna(px) or pd.isna(vol):
-                return False
-            if px < price_min or px > price_max:
-                return False
-            if vol < min_volume:
-                return False
-
-            # --- Mode-based logic ---
-            if mode == "Breakout":
-                # Strong uptrend + momentum
-                return ema20 > ema50 and rsi > 55 and band > 0.55
-
-            elif mode == "Pullback":
-                # Uptrend but short-term dip near support
-                return ema20 > ema50 and rsi < 60 and band <= 0.45 and px <= ema20
-
-            else:  # Both — include anything trending up
-                return ema20 > ema50
-
-        except Exception as e:
-            print(f"⚠️ passes_filters error: {e}")
-            return False
-
+    thresholds = SENSITIVITY_MAP[sensitivity]
 
     # ---------------- Setup Guidance Helper (with key level) ----------------
     from typing import Optional
@@ -234,411 +114,49 @@ def scanner_ui(TIINGO_TOKEN):
         return "🧭 Setup guidance unavailable."
     
 
-    # ---------------- Single ticker evaluation ----------------
-    def evaluate_ticker(ticker: str, mode: str, price_min: float, price_max: float, min_volume: float) -> dict | None:
-        """Evaluate a single ticker and return a metrics card with trend context + near-miss detection."""
-        try:
-                    # --- Load Smart Context if active ---
-            market_bias = None
-            vol_regime = None
-            if st.session_state.get("smart_mode", False):
-                market = get_market_snapshot(TIINGO_TOKEN)
-                if market:
-                    market_bias = market["bias"]          # "Uptrend" or "Downtrend"
-                    vol_regime = market["vol_regime"]    # "High Volatility" / "Low Volatility"
-                    
-            # Commented out to improve scan speed
-            # if market_bias:
-            #     st.write(f"🧠 Smart bias active → {market_bias}, Volatility: {vol_regime}")
-
-
-            # --- Fetch & compute indicators ---
-            df = tiingo_history(ticker, TIINGO_TOKEN, SCAN_LOOKBACK_DAYS)
-            if df is None or df.empty:
-                return None
-
-            if df is None or len(df) < 60:
-                return None
-
-            df = compute_indicators(df)
-            # Commented out debug output for speed
-            # if ticker in ["AAPL", "MSFT", "TSLA"]:
-            #     st.write(df.tail(1)[["Close","EMA20","EMA50","RSI14","BandPos20"]])
-
-            last = df.iloc[-1]
-
-            px = float(last["Close"])
-            vol = float(last["Volume"])
-
-            if pd.isna(px) or pd.isna(vol) or px < price_min or px > price_max or vol < min_volume:
-                return None
-
-            ema20 = float(last["EMA20"])
-            ema50 = float(last["EMA50"])
-            rsi = float(last["RSI14"])
-            band = float(last["BandPos20"])
-            atr = float(last.get("ATR14", np.nan))
-            atr = px * 0.01 if pd.isna(atr) or atr <= 0 else atr
-            support = float(last.get("LL20", np.nan))
-            resistance = float(last.get("HH20", np.nan))
-            
-                    # --- Dynamic filter tuning based on market bias (FIXED LOGIC) ---
-            rsi_buffer = 0
-            band_buffer = 0
-
-            if market_bias == "Uptrend":
-                # In strong markets, be MORE lenient to catch more opportunities
-                rsi_buffer = -3      # LOOSER RSI requirement (was +3, which was backwards!)
-                band_buffer = -0.05  # LOOSER band requirement
-            elif market_bias == "Downtrend":
-                # In weak markets, be MORE selective to avoid traps
-                rsi_buffer = +3      # STRICTER RSI requirement
-                band_buffer = +0.05  # STRICTER band requirement
-
-            # Example: In uptrend, Breakout needs RSI > 52 instead of 55 (more opportunities)
-
-
-            # --- Setup & Near Miss detection (using sensitivity thresholds) ---
-            setup, near_miss, near_type = None, False, None
-
-            if ema20 > ema50:
-                # Confirmed setups (apply sensitivity + market bias adjustments)
-                breakout_rsi_threshold = thresholds["breakout_rsi"] + rsi_buffer
-                breakout_band_threshold = thresholds["breakout_band"] + band_buffer
-                pullback_rsi_min = thresholds["pullback_rsi_min"] + rsi_buffer
-                pullback_rsi_max = thresholds["pullback_rsi_max"] + rsi_buffer
-                pullback_band_threshold = thresholds["pullback_band"] + band_buffer
-
-                if mode in ["Breakout", "Both"] and rsi > breakout_rsi_threshold and band > breakout_band_threshold:
-                    setup = "Breakout"
-                elif mode in ["Pullback", "Both"] and pullback_rsi_min <= rsi <= pullback_rsi_max and band <= pullback_band_threshold and px <= ema20:
-                    setup = "Pullback"
-
-
-                # Near misses (broader tolerance window)
-                if not setup:
-                    near_pct = 15.0       # within 15% of resistance
-                    near_atr_mult = 4.0   # within 4×ATR of support
-
-                    if mode in ["Breakout", "Both"] and 40 <= rsi <= 67 and 0.35 <= band <= 0.70:
-                        near_miss, near_type = True, "RSI/Band breakout proximity"
-                    elif mode in ["Pullback", "Both"] and 40 <= rsi <= 70 and 0.20 <= band <= 0.60:
-                        near_miss, near_type = True, "RSI/Band pullback proximity"
-
-                    # Check proximity to recent high/low
-                    if pd.notna(resistance) and resistance > 0 and (resistance - px) / resistance <= near_pct / 100:
-                        near_miss, near_type = True, f"≤{near_pct:.0f}% below 20-day high"
-                    elif pd.notna(support) and (px - support) <= near_atr_mult * atr:
-                        near_miss, near_type = True, f"≤{near_atr_mult:.1f}×ATR above 20-day low"
-
-            # --- Skip if no signal ---
-            if not setup and not near_miss:
-                return None
-
-            # --- Determine trend context ---
-            if ema20 > ema50 * 1.02:
-                trend_context = "Uptrend"
-            elif ema20 < ema50 * 0.98:
-                trend_context = "Downtrend"
-            else:
-                trend_context = "Sideways"
-
-            # --- Combine setup + trend for readable context ---
-            if setup:
-                setup_context = f"{setup} in {trend_context}"
-            elif near_miss:
-                setup_context = f"Potential {near_type or 'setup'} in {trend_context}"
-            else:
-                setup_context = trend_context
-
-            # --- Target / Stop (Fibonacci-based from RECENT 20-bar swing) ---
-            # Use same stop logic as Analyzer for consistency
-            swing_low = float(df['Low'].tail(10).min())
-            atr_stop = ema20 - 1.3 * atr
-            proposed_stop = min(swing_low, atr_stop)
-
-            # Ensure stop is below entry
-            if proposed_stop >= px:
-                proposed_stop = px - 1.2 * atr
-
-            stop = max(0.01, proposed_stop)
-
-            # Use Fibonacci extension target calculator with SHORT recent swing
-            target, rr_ratio, weak_rr = calculate_scanner_target(
-                df=df,
-                current_price=px,
-                stop_loss=stop,
-                setup_type=setup or "Breakout",
-                lookback_bars=20  # SHORT recent swing (15-20 bars)
-            )
-            
-                    # --- Smart Score calculation ---
-            smart_score = 50  # neutral baseline
-
-            # Setup strength: RSI/Band alignment
-            if setup == "Breakout":
-                smart_score += min((rsi - 50) * 1.2, 25)   # reward strong RSI
-                smart_score += min((band - 0.5) * 50, 15)  # reward high band
-            elif setup == "Pullback":
-                smart_score += min((60 - rsi) * 1.2, 25)   # reward deeper dips
-                smart_score += min((0.5 - band) * 50, 15)  # reward lower band
-
-            # Trend context (Uptrend gets a bonus)
-            if ema20 > ema50:
-                smart_score += 10
-            else:
-                smart_score -= 10
-
-            # Volume signal (add to smart score)
-            # Volume analysis is done later, but we can use relative volume here
-            vol_20_avg = df['Volume'].tail(20).mean()
-            rel_vol = vol / vol_20_avg if vol_20_avg > 0 else 1.0
-
-            if rel_vol >= 1.5:
-                smart_score += 15  # High volume - strong conviction
-            elif rel_vol >= 1.0:
-                smart_score += 5   # Above average volume - good
-            elif rel_vol < 0.8:
-                smart_score -= 10  # Low volume - weak conviction
-
-            # If Smart Mode is active and favored sectors exist
-            # NOTE: Sector fetching moved to post-scan to avoid rate limiting
-            # if st.session_state.get("smart_mode", False):
-            #     favored = st.session_state.get("favored_sectors", [])
-            #     ticker_sector = get_tiingo_sector(ticker, TIINGO_TOKEN)
-            #     if any(s.lower() in ticker_sector.lower() for s in favored):
-            #         smart_score += 10  # aligned with favored sector
-            #     else:
-            #         smart_score -= 5   # not in favored trend
-
-            smart_score = int(np.clip(smart_score, 0, 100))
-
-            # --- Structural Context: Base detection + Meaningful Level ---
-            # Base detection: was there tight consolidation in the 15–3 bars before now?
-            has_base = False
-            base_tightness = None
-            if len(df) >= 15:
-                try:
-                    pre_move = df.iloc[-15:-3]  # the "pre-breakout" period
-                    base_high = float(pre_move["High"].max())
-                    base_low  = float(pre_move["Low"].min())
-                    base_mid  = float(pre_move["Close"].mean())
-                    if base_mid > 0:
-                        base_range = (base_high - base_low) / base_mid
-                        if base_range < 0.07:          # ≤ 7% range → tight base
-                            has_base = True
-                            base_tightness = round(base_range * 100, 1)
-                            if setup == "Breakout":
-                                smart_score += 12      # breakout FROM a real base
-                except Exception:
-                    pass
-
-            # Meaningful level check: for Pullback, is price at EMA20/50 or pivot low?
-            at_meaningful_level = False
-            level_description   = None
-            if setup == "Pullback" or near_miss:
-                try:
-                    ema20_dist = abs(px - ema20) / px if px > 0 else 1
-                    ema50_dist = abs(px - ema50) / px if px > 0 else 1
-
-                    # Check nearest pivot low (structural support)
-                    piv = find_pivot_points(df.tail(30), left_bars=3, right_bars=3)
-                    piv_lows = piv["pivot_lows"]
-                    near_pivot_low  = False
-                    nearest_pl_price = None
-                    if piv_lows:
-                        nearest_pl = min(piv_lows, key=lambda p: abs(p["price"] - px))
-                        pivot_dist = abs(nearest_pl["price"] - px) / px
-                        near_pivot_low   = pivot_dist <= 0.025   # within 2.5%
-                        nearest_pl_price = nearest_pl["price"]
-
-                    if ema20_dist <= 0.02:
-                        at_meaningful_level = True
-                        level_description   = f"near EMA20 (${ema20:.2f})"
-                        smart_score += 10
-                    elif ema50_dist <= 0.02:
-                        at_meaningful_level = True
-                        level_description   = f"near EMA50 (${ema50:.2f})"
-                        smart_score += 8
-                    elif near_pivot_low and nearest_pl_price:
-                        at_meaningful_level = True
-                        level_description   = f"near pivot low (${nearest_pl_price:.2f})"
-                        smart_score += 8
-                except Exception:
-                    pass
-
-            # Incorporate structural flags into the SetupContext label
-            if setup == "Breakout" and has_base:
-                setup_context = setup_context + " (from base)"
-            if setup == "Pullback" and at_meaningful_level and level_description:
-                setup_context = setup_context + f" at {level_description}"
-
-            smart_score = int(np.clip(smart_score, 0, 100))
-
-            # --- Volume Analysis ---
-            vol_analysis = analyze_volume(df, lookback=20)
-
-            # --- Support/Resistance Detection ---
-            sr_levels = find_support_resistance(df, window=10, num_levels=2)
-
-            # Adjust stop to nearest support if available
-            actual_stop = stop
-            if sr_levels["support"]:
-                nearest_support = sr_levels["support"][-1]  # closest support below price
-                # Use support if it's within reasonable range (not too far)
-                if px - nearest_support < atr * 3:
-                    actual_stop = nearest_support * 0.995  # just below support
-
-            # Adjust target to nearest resistance — only if it still gives 2:1 R:R
-            actual_target = target
-            actual_risk = abs(px - actual_stop)
-            if sr_levels["resistance"] and actual_risk > 0:
-                nearest_resistance = sr_levels["resistance"][0]
-                resistance_target  = nearest_resistance * 0.99  # just below resistance
-                resistance_reward  = abs(resistance_target - px)
-                resistance_rr      = resistance_reward / actual_risk
-                # Only use resistance target if it's closer AND still gives at least 2:1
-                if nearest_resistance < target and resistance_rr >= 2.0:
-                    actual_target = resistance_target
-
-            # ✅ Recalculate R:R from the ACTUAL displayed stop and target
-            actual_reward = abs(actual_target - px)
-            if actual_risk > 0:
-                rr_ratio = round(actual_reward / actual_risk, 2)
-                weak_rr  = rr_ratio < 2.0
-            else:
-                rr_ratio = 0.0
-                weak_rr  = True
-
-            # --- Fibonacci Retracement Analysis ---
-            fib_data = calculate_fibonacci_levels(df, lookback=20)
-
-            # Apply Fibonacci weighting to Smart Score
-            if fib_data:
-                fib_position = fib_data["current_fib_position"]
-                fib_zone = fib_data["zone"]
-
-                # Boost score for discount zone entries (better risk/reward)
-                if fib_zone == "discount":
-                    if fib_position <= 38.2:
-                        smart_score += 15  # Deep discount - excellent entry
-                    elif fib_position <= 50:
-                        smart_score += 10  # Discount zone - good entry
-
-                # Lower score for premium zone entries (worse risk/reward)
-                elif fib_zone == "premium":
-                    if fib_position >= 78.6:
-                        smart_score -= 15  # Extended premium - risky entry
-                    elif fib_position >= 61.8:
-                        smart_score -= 10  # Premium zone - less favorable
-
-                # Clamp again after Fibonacci adjustment
-                smart_score = max(0, min(100, round(smart_score, 1)))
-
-            # --- Get earnings date and sector ---
-            # DISABLED during scan to avoid rate limiting - will fetch on-demand when displaying results
-            earnings_date = None
-            days_to_earnings = None
-            earnings_warning = None
-            # try:
-            #     earnings_date = get_next_earnings_date(ticker, TIINGO_TOKEN)
-            #     if earnings_date and earnings_date not in ["N/A", "Not Scheduled", None]:
-            #         import pandas as pd
-            #         days_to_earnings = (pd.to_datetime(earnings_date) - pd.Timestamp.now()).days
-            #         if days_to_earnings <= 2:
-            #             earnings_warning = "🔴 Earnings in 0-2 days"
-            #         elif days_to_earnings <= 7:
-            #             earnings_warning = "🟡 Earnings in 3-7 days"
-            #         elif days_to_earnings <= 30:
-            #             earnings_warning = "🟢 Earnings in 8-30 days"
-            # except Exception as e:
-            #     # Silently fail - earnings data is optional
-            #     pass
-
-            # Get sector - DISABLED during scan to avoid rate limiting
-            # Sector will be fetched on-demand when displaying results
-            sector = "Unknown"
-            # try:
-            #     sector = get_tiingo_sector(ticker, TIINGO_TOKEN)
-            #     if not sector or sector == "":
-            #         sector = "Unknown"
-            # except Exception as e:
-            #     # Silently fail - sector data is optional
-            #     pass
-
-            # --- Pattern Recognition ---
-            top_pattern = None
-            try:
-                patterns = detect_patterns(df)
-                if patterns:
-                    top_pattern = patterns[0]  # highest confidence pattern
-            except Exception:
-                pass
+    # ---------------- Scan context (built once per scan) ----------------
+    def scan_context(mode: str, price_min: float, price_max: float, min_volume: float) -> ScanContext:
+        """Snapshot the session inputs a scan needs so card building stays Streamlit-free."""
+        market_bias = None
+        vol_regime = None
+        if st.session_state.get("smart_mode", False):
+            market = get_market_snapshot(TIINGO_TOKEN)
+            if market:
+                market_bias = market["bias"]          # "Uptrend" or "Downtrend"
+                vol_regime = market["vol_regime"]    # "High Volatility" / "Low Volatility"
+
+        return ScanContext(
+            mode=mode, price_min=price_min, price_max=price_max, min_volume=min_volume,
+            thresholds=dict(thresholds), market_bias=market_bias, vol_regime=vol_regime,
+            watchlist=frozenset(st.session_state.get("watchlist", [])),
+            sectors=dict(st.session_state.get("sector_map", {})),
+        )
 
-            # --- Build result card ---
-            # Note: Fundamental scores are fetched on-demand after scan to keep scans fast
-            card = {
-                "Symbol": ticker,
-                "Price": round(px, 2),
-                "Volume": int(vol),
-                "RSI14": round(rsi, 1),
-                "EMA20>EMA50": ema20 > ema50,
-                "BandPos20": round(band, 2),
-                "ATR14": round(atr, 2),
-                "Setup": setup or "NearMiss",
-                "Stop": round(actual_stop, 2),
-                "Target": round(actual_target, 2),
-                "RR_Ratio": round(rr_ratio, 2),
-                "WeakRR": weak_rr,  # Flag if R:R was below 2:1
-                "SmartScore": smart_score,
-                "NearMiss": near_miss,
-                "NearType": near_type,
-                "SetupContext": setup_context,
-                "RelVolume": vol_analysis.get("relative_volume", 1.0),
-                "VolSignal": vol_analysis.get("volume_signal", "Neutral"),
-                "Support": sr_levels["support"],
-                "Resistance": sr_levels["resistance"],
-                # Fibonacci data
-                "FibPosition": round(fib_data["current_fib_position"], 1) if fib_data else None,
-                "FibZone": fib_data["zone"] if fib_data else None,
-                "FibZoneLabel": get_fibonacci_zone_label(fib_data["current_fib_position"]) if fib_data else None,
-                "OptimalEntry": round(fib_data["optimal_entry"], 2) if fib_data else None,
-                "FibLevels": fib_data["fib_levels"] if fib_data else None,
-                "SwingHigh": round(fib_data["swing_high"], 2) if fib_data else None,
-                "SwingLow": round(fib_data["swing_low"], 2) if fib_data else None,
-                # Earnings and sector data
-                "EarningsDate": earnings_date,
-                "DaysToEarnings": days_to_earnings,
-                "EarningsWarning": earnings_warning,
-                "Sector": sector,
-                # Pattern recognition
-                "Pattern": top_pattern,
-                # Structural context
-                "HasBase": has_base,
-                "BaseTightness": base_tightness,
-                "AtMeaningfulLevel": at_meaningful_level,
-                "LevelDescription": level_description,
-            }
-
-            # --- Debug (optional, visible in console/UI logs) ---
-            # Commented out to improve scan speed
-            # if setup:
-            #     st.write(f"✅ {ticker}: Confirmed {setup} | Trend={trend_context}")
-            # elif near_miss:
-            #     st.write(f"🟡 {ticker}: Near Miss → {near_type} | Trend={trend_context}")
-            # else:
-            #     st.write(f"⚙️ {ticker}: No match | Trend={trend_context}")
-
-            return card
+    def lookup_sector(symbol: str) -> str:
+        """Sector for a displayed card, remembered for later scans' contexts."""
+        sector_map = st.session_state.setdefault("sector_map", {})
+        sector = sector_map.get(symbol) or get_tiingo_sector(symbol, TIINGO_TOKEN)
+        if sector != "Unknown":
+            sector_map[symbol] = sector
+        return sector
 
-        except Exception as e:
-            st.write(f"⚠️ {ticker} failed with error: {e}")
-            return None
+    # ---------------- Single ticker evaluation ----------------
+    def evaluate_ticker(ticker: str, mode: str, price_min: float, price_max: float, min_volume: float,
+                        df: pd.DataFrame | None = None, ctx: ScanContext | None = None) -> dict | None:
+        """
+        Evaluate a single ticker and return a metrics card with trend context + near-miss detection.
+        Pass `df` (preloaded daily bars) to skip the history fetch, and `ctx` to reuse a scan context.
+        """
+        if ctx is None:
+            ctx = scan_context(mode, price_min, price_max, min_volume)
+        if df is None:
+            df = tiingo_history(ticker, TIINGO_TOKEN, SCAN_LOOKBACK_DAYS)
+        return build_card(ticker, df, ctx)
 
 
     # ---------------- Scanner (full universe, concurrent) ----------------
     def run_full_scan(mode: str, price_min: float, price_max: float, min_volume: float,
-                    max_cards: int) -> list[dict]:
+                    max_cards: int, good_enough: float | None = None) -> list[dict]:
         st.write(f"🚀 **Starting scan with:** mode={mode}, price=${price_min}-${price_max}, min_vol={min_volume:,.0f}, max_cards={max_cards}")
 
         tickers = load_verified_universe(TIINGO_TOKEN)
@@ -648,55 +166,52 @@ def scanner_ui(TIINGO_TOKEN):
             st.error("❌ No tickers loaded! Check your universe file or Tiingo API.")
             return []
 
-        # ✅ Prioritize watchlist tickers (scan them first)
-        watchlist = st.session_state.get("watchlist", [])
-        watchlist_tickers = [t for t in watchlist if t in tickers]
-        non_watchlist_tickers = [t for t in tickers if t not in watchlist]
-
-        # Shuffle non-watchlist tickers for diversity
-        random.seed()
-        random.shuffle(non_watchlist_tickers)
+        # ✅ Session inputs (Smart Mode bias, thresholds, watchlist, sectors) captured once
+        ctx = scan_context(mode, price_min, price_max, min_volume)
+        # ✅ Session-wide cache: rescans reuse snapshots and cards for unchanged bars
+        engine = ScanEngine(TIINGO_TOKEN, cache=st.session_state.setdefault("scan_cache", ScanCache()))
 
-        # Combine: watchlist first, then shuffled universe
-        tickers = watchlist_tickers + non_watchlist_tickers
+        # ✅ Prioritize watchlist tickers (scan them first), shuffle the rest for diversity
+        watchlist = st.session_state.get("watchlist", [])
+        watchlist_count = len(set(watchlist) & set(tickers))
+        tickers = engine.scan_order(tickers, watchlist)
 
         # ✅ DEBUG: Show first 10 tickers to verify watchlist priority
         st.caption(f"🔀 **Scan Order (first 10):** {', '.join(tickers[:10])}")
-        st.caption(f"📊 **Total Universe:** {len(tickers)} tickers ({len(watchlist_tickers)} from watchlist)")
-
-        results: list[dict] = []
-        progress = st.progress(0, text="🔎 Scanning U.S. market…")
-        total = len(tickers)
-        scanned = 0
+        st.caption(f"📊 **Total Universe:** {len(tickers)} tickers ({watchlist_count} from watchlist)")
 
         # ✅ Scan ALL tickers (paid Tiingo account = no rate limits)
-        # Watchlist tickers are scanned first for priority
-        tickers_to_scan = tickers
+        st.caption(f"🔍 **Scanning ALL {len(tickers):,} tickers** (watchlist scanned first)")
+        progress = st.progress(0, text="🔎 Scanning U.S. market…")
 
-        st.caption(f"🔍 **Scanning ALL {len(tickers_to_scan):,} tickers** (watchlist scanned first)")
+        def on_progress(stage: str, done: int, total: int, hits: int):
+            if stage == "load":
+                progress.progress(done / total, text=f"📥 Loading price history… {done}/{total} tickers")
+            elif stage == "screen":
+                progress.progress(1.0, text=f"🔎 Screening {total:,} tickers…")
+            else:
+                progress.progress(done / total, text=f"🃏 Building cards… {done}/{total} | Hits: {hits}")
 
-        for i in range(0, len(tickers_to_scan), BATCH_TICKER_COUNT):
-            batch = tickers_to_scan[i:i + BATCH_TICKER_COUNT]
-            with futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
-                futs = [ex.submit(evaluate_ticker, t, mode, price_min, price_max, min_volume) for t in batch]
-                for f in futures.as_completed(futs):
-                    rec = f.result()
-                    if rec is not None:
-                        results.append(rec)
+        # ✅ Live leaderboard while cards stream into the top-K
+        leaders = st.empty()
 
-            scanned = min(i + len(batch), len(tickers_to_scan))
-            progress.progress(scanned / len(tickers_to_scan), text=f"🔎 Scanning… {scanned}/{len(tickers_to_scan)} tickers | Hits: {len(results)}")
-            time.sleep(REQUEST_PAUSE_S)
+        def on_results(top: list[dict]):
+            leaders.dataframe(
+                pd.DataFrame([{k: r.get(k) for k in ("Symbol", "Setup", "SmartScore", "Price")} for r in top[:10]]),
+                hide_index=True, use_container_width=True,
+            )
 
+        # ✅ Bulk history load, vectorized screen, then cards for the survivors that can rank
+        scan = engine.run(ctx, max_cards, tickers, progress_cb=on_progress,
+                          on_results=on_results, good_enough=good_enough)
         progress.empty()
+        leaders.empty()
+        results = scan["cards"]
+        candidates = scan["candidates"]
 
         # --- DEBUG: Show what we found ---
-        st.write(f"🔍 **Scan Complete:** Scanned {len(tickers_to_scan):,} tickers, found {len(results)} total results")
-
-        # --- Sort by SmartScore (comprehensive ranking) ---
-        # SmartScore already considers: RSI, BandPos, EMA trend, sector alignment, Fibonacci zone
-        # Higher SmartScore = better setup, so we negate for descending sort
-        results.sort(key=lambda r: -r.get("SmartScore", 0))
+        st.write(f"🔍 **Scan Complete:** Scanned {scan['scanned']:,} tickers, {len(candidates)} passed the screen, "
+                 f"built {scan['built']} cards")
 
         # --- Separate confirmed vs near misses ---
         confirmed = [r for r in results if r.get("Setup") in ["Breakout", "Pullback"]]
@@ -706,27 +221,19 @@ def scanner_ui(TIINGO_TOKEN):
         st.session_state["scanner_results_near"] = near_misses
         st.session_state["scanner_results"] = confirmed + near_misses   # ✅ add this line!
 
-        # --- remove duplicate symbols ---
-        unique_results = []
-        seen = set()
-        for r in results:
-            sym = r.get("Symbol")
-            if sym not in seen:
-                unique_results.append(r)
-                seen.add(sym)
-
         # ✅ DEBUG: Show all qualified tickers to verify variety
-        if unique_results:
-            all_symbols = [r.get("Symbol") for r in unique_results]
-            st.caption(f"✅ **All Qualified Tickers ({len(all_symbols)}):** {', '.join(all_symbols[:50])}" +
-                      (f" ... and {len(all_symbols) - 50} more" if len(all_symbols) > 50 else ""))
+        if candidates:
+            st.caption(f"✅ **All Qualified Tickers ({len(candidates)}):** {', '.join(candidates[:50])}" +
+                      (f" ... and {len(candidates) - 50} more" if len(candidates) > 50 else ""))
 
-        # ✅ Apply max_cards limit AFTER scanning (so we scan all tickers but only display top results)
-        if len(unique_results) > max_cards:
-            st.info(f"📊 Found {len(unique_results)} total setups, showing top {max_cards} by SmartScore")
-            return unique_results[:max_cards]
+        # ✅ max_cards applies to the built cards; the screen already covered every ticker
+        if scan["stopped_early"]:
+            st.info(f"⚡ Good-enough stop: {max_cards} setups scoring ≥{good_enough:.0f} found after "
+                    f"{scan['built']} cards (watchlist first) — remaining tickers were not ranked")
+        elif len(candidates) > max_cards:
+            st.info(f"📊 Found {len(candidates)} total setups, showing top {max_cards} by SmartScore")
 
-        return unique_results
+        return results
 
 
 
@@ -749,16 +256,12 @@ def scanner_ui(TIINGO_TOKEN):
             if last_volume < min_volume:
                 return f"failed volume filter (Vol {last_volume:,.0f} < {min_volume:,.0f})"
 
-            # Check technical setup criteria
-            delta = df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi_series = 100 - (100 / (1 + rs))
-            rsi = rsi_series.iloc[-1]
+            # Check technical setup criteria (same Wilder RSI the scan used)
+            close = df['Close'].to_numpy(dtype=float)
+            rsi = ta_kernels.rsi(close, 14)[-1]
 
-            ema20 = df['Close'].ewm(span=20, adjust=False).mean().iloc[-1]
-            ema50 = df['Close'].ewm(span=50, adjust=False).mean().iloc[-1]
+            ema20 = ta_kernels.ema(close, 20)[-1]
+            ema50 = ta_kernels.ema(close, 50)[-1]
 
             # Determine why it failed setup
             if rsi < 35:
@@ -798,9 +301,10 @@ def scanner_ui(TIINGO_TOKEN):
         total = len(watchlist)
         progress = st.progress(0, text=f"🎯 Scanning {total} watchlist symbols...")
 
+        ctx = scan_context(mode, price_min, price_max, min_volume)
         for i, ticker in enumerate(watchlist, start=1):
             try:
-                rec = evaluate_ticker(ticker, mode, price_min, price_max, min_volume)
+                rec = evaluate_ticker(ticker, mode, price_min, price_max, min_volume, ctx=ctx)
                 if rec:
                     results.append(rec)
                     debug_log.append(("✅", f"{ticker}: passed all filters"))
@@ -1073,6 +577,15 @@ def scanner_ui(TIINGO_TOKEN):
 
     min_volume = st.number_input("Min Volume (shares, latest bar)", value=1_000_000, step=50_000, min_value=0)
     max_cards  = st.slider("Max Cards to Show", min_value=24, max_value=500, value=120, step=12)
+    c_ge1, c_ge2 = st.columns([1, 2])
+    with c_ge1:
+        good_enough_mode = st.checkbox("⚡ Good-enough mode", value=False,
+                                       help="Scan watchlist first and stop as soon as Max Cards setups reach the "
+                                            "score below. Faster, but may miss higher scores later in the universe.")
+    with c_ge2:
+        good_enough_score = st.slider("Good-enough SmartScore", min_value=50, max_value=95, value=70, step=5,
+                                      disabled=not good_enough_mode)
+    good_enough = float(good_enough_score) if good_enough_mode else None
 
     # ✅ Store in session state for debug mode
     st.session_state["price_min"] = price_min
@@ -1136,7 +649,22 @@ def scanner_ui(TIINGO_TOKEN):
     with c4:
         st.session_state["risk_rr"] = st.number_input("Reward Ratio (R)", value=float(st.session_state["risk_rr"]), min_value=0.5, step=0.5)
 
-    run_scan = st.button("🚀 Run Full U.S. Scan", use_container_width=True)
+    # ---------------- Nightly snapshot (instant results; the scan button rescans live) ----------------
+    snapshot = None
+    if st.session_state.get("scanner_source") == "live":
+        if latest_run()[0] is not None and st.button("📦 Show Nightly Snapshot", key="scanner_use_snapshot"):
+            st.session_state["scanner_source"] = "snapshot"
+    if st.session_state.get("scanner_source") != "live":
+        snapshot = load_scanner_snapshot(scan_context(mode, price_min, price_max, min_volume))
+
+    run_scan = st.button("🔄 Rescan Live" if snapshot else "🚀 Run Full U.S. Scan",
+                         key="scanner_run_scan", use_container_width=True)
+
+    # After a live scan, filter changes re-rank from the session's scan cache
+    # (only tickers with a new bar are recomputed), so rerun it automatically
+    scan_filters = (mode, price_min, price_max, min_volume, max_cards, sensitivity, smart_mode, good_enough)
+    refilter = (not run_scan and st.session_state.get("scanner_source") == "live"
+                and st.session_state.get("scanner_filters") not in (None, scan_filters))
 
     # ---------------- UI: Results Grid ----------------
     if st.session_state.get("smart_mode", False):
@@ -1195,7 +723,9 @@ def scanner_ui(TIINGO_TOKEN):
     st.header("📊 Webull-Style Market Scanner — U.S. (Tiingo)")
     st.caption("All active U.S. equities. Filters: price, volume, and setup mode (Pullback/Breakout/Both). Cards show your Trade Plan target & stop.")
 
-    if run_scan:
+    if run_scan or refilter:
+        if refilter:
+            st.caption("♻️ Filters changed — re-ranking from cached indicator snapshots")
         st.session_state["scanner_running"] = True
         with st.spinner("Scanning the U.S. market... this may take 1–2 minutes"):
             current_mode = st.session_state.get("setup_mode", "Breakout")
@@ -1204,9 +734,12 @@ def scanner_ui(TIINGO_TOKEN):
                 price_min=price_min,
                 price_max=price_max,
                 min_volume=min_volume,
-                max_cards=max_cards
+                max_cards=max_cards,
+                good_enough=good_enough,
             )
         st.session_state["scanner_running"] = False
+        st.session_state["scanner_source"] = "live"
+        st.session_state["scanner_filters"] = scan_filters
 
         # ---------------- Smart Mode Context (Sector Trend Awareness) ----------------
         if st.session_state.get("smart_mode", False):
@@ -1218,6 +751,25 @@ def scanner_ui(TIINGO_TOKEN):
             except Exception as e:
                 st.warning(f"Smart Mode failed: {e}")
 
+    elif snapshot is not None:
+        # Ties keep snapshot (universe) order, with this session's watchlist first
+        watchlist = set(st.session_state.get("watchlist", []))
+        cards = sorted(snapshot["cards"], key=lambda r: (-r.get("SmartScore", 0), r.get("Symbol") not in watchlist))
+        cards = cards[:max_cards]
+        st.session_state["scanner_results_confirmed"] = [r for r in cards if r.get("Setup") in ["Breakout", "Pullback"]]
+        st.session_state["scanner_results_near"] = [r for r in cards if r.get("NearMiss")]
+        st.session_state["scanner_results"] = cards
+        st.session_state["scanner_source"] = "snapshot"
+        run_info = snapshot.get("run", {})
+        st.caption(f"📦 **Nightly snapshot** from {run_info.get('generated_at', snapshot.get('generated_at'))} "
+                   f"(bars through {run_info.get('as_of', '?')}) — {len(snapshot.get('candidates', []))} passed the screen. "
+                   f"Use **🔄 Rescan Live** for intraday data.")
+    elif st.session_state.get("scanner_source") == "snapshot":
+        # Filters moved to a combination the nightly job didn't cover
+        for key in ("scanner_results", "scanner_results_confirmed", "scanner_results_near"):
+            st.session_state[key] = []
+        st.session_state["scanner_source"] = None
+
     # safely retrieve results (don’t reset them on rerun)
     results = st.session_state.get("scanner_results", [])
 
@@ -1365,7 +917,7 @@ def scanner_ui(TIINGO_TOKEN):
                         favored_badge = ""
                         if st.session_state.get("smart_mode", False) and "smart_context" in st.session_state:
                             df = st.session_state["smart_context"]["sectors_df"]
-                            sector = get_tiingo_sector(rec["Symbol"], TIINGO_TOKEN)
+                            sector = lookup_sector(rec["Symbol"])
                             bias = df.loc[df["Sector"] == sector, "Bias"].values[0] if sector in df["Sector"].values else "Unknown"
                             if bias == "Uptrend" and rec["Setup"] == "Breakout":
                                 favored_badge = "🟢 Sector Uptrend"
@@ -1506,7 +1058,7 @@ def scanner_ui(TIINGO_TOKEN):
                         favored_badge = ""
                         if st.session_state.get("smart_mode", False) and "smart_context" in st.session_state:
                             df = st.session_state["smart_context"]["sectors_df"]
-                            sector = get_tiingo_sector(rec["Symbol"], TIINGO_TOKEN)
+                            sector = lookup_sector(rec["Symbol"])
                             bias = df.loc[df["Sector"] == sector, "Bias"].values[0] if sector in df["Sector"].values else "Unknown"
                             if bias == "Uptrend" and rec.get("NearMiss") == "Breakout":
                                 favored_badge = "🟢 Sector Uptrend"
@@ -0,0 +1,66 @@
+"""
+Micro-benchmark: vectorized find_pivot_points vs the original per-bar loop.
+
+Checks both produce identical pivots, then times them on 60-, 250- and
+2,000-bar inputs (the pattern lookback, ~1 year, and a long backtest).
+
+Usage (from the repo root):
+    python -m scripts.bench_pivots
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import find_pivot_points
+
+SIZES = (60, 250, 2000)
+REPEATS = 5
+
+
+def find_pivot_points_loop(df: pd.DataFrame, left_bars: int = 3, right_bars: int = 3) -> dict:
+    """The original implementation, kept here as the reference."""
+    n = len(df)
+    pivot_highs = []
+    pivot_lows = []
+    highs = df["High"].values
+    lows = df["Low"].values
+
+    for i in range(left_bars, n - right_bars):
+        h = highs[i]
+        lo = lows[i]
+        if (all(h >= highs[i - j] for j in range(1, left_bars + 1)) and
+                all(h >= highs[i + j] for j in range(1, right_bars + 1))):
+            pivot_highs.append({"bar": i, "price": float(h)})
+        if (all(lo <= lows[i - j] for j in range(1, left_bars + 1)) and
+                all(lo <= lows[i + j] for j in range(1, right_bars + 1))):
+            pivot_lows.append({"bar": i, "price": float(lo)})
+
+    return {"pivot_highs": pivot_highs, "pivot_lows": pivot_lows}
+
+
+def make_bars(n: int, seed: int = 0) -> pd.DataFrame:
+    """Random-walk OHLC, rounded to cents so ties (flat tops/bottoms) occur."""
+    rng = np.random.default_rng(seed)
+    close = np.round(50 * np.exp(np.cumsum(rng.normal(0, 0.015, n))), 2)
+    spread = np.round(np.abs(rng.normal(0, 0.5, n)), 2)
+    return pd.DataFrame({"High": close + spread, "Low": close - spread, "Close": close})
+
+
+def main():
+    print(f"{'bars':>6} {'loop ms':>10} {'vector ms':>10} {'speedup':>8}")
+    for n in SIZES:
+        df = make_bars(n)
+        for left, right in ((3, 3), (2, 2), (5, 3)):
+            assert find_pivot_points(df, left, right) == find_pivot_points_loop(df, left, right), \
+                f"pivot mismatch at {n} bars ({left}/{right})"
+
+        number = max(1, 20_000 // n)
+        loop = min(timeit.repeat(lambda: find_pivot_points_loop(df), number=number, repeat=REPEATS)) / number
+        vec = min(timeit.repeat(lambda: find_pivot_points(df), number=number, repeat=REPEATS)) / number
+        print(f"{n:>6} {loop * 1e3:>10.3f} {vec * 1e3:>10.3f} {loop / vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
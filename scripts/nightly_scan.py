@@ -0,0 +1,144 @@
+"""
+Nightly scan snapshots for the Scanner and Base Scanner pages.
+
+Run after the close, once Tiingo has the day's EOD bars. Loads the
+universe's history once, ranks it for every setup mode × sensitivity level
+(with and without the Smart Mode market bias), runs the base formation scan,
+and publishes everything as one versioned run under .cache/scan_snapshots/
+(see utils/scan_snapshots.py). The pages show the newest snapshot matching
+their filters instantly and keep their scan buttons as a live rescan.
+
+Needs TIINGO_TOKEN (or TIINGO_API_KEY) in the environment or .env.
+
+Usage (from the repo root):
+    python -m scripts.nightly_scan
+    python -m scripts.nightly_scan --price-min 5 --price-max 100 --no-smart
+
+Cron (weekdays at 6:30pm, after Tiingo's EOD update):
+    30 18 * * 1-5  cd /path/to/swing-finder && python -m scripts.nightly_scan >> .cache/nightly_scan.log 2>&1
+On Windows, point a Task Scheduler job at the same command.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from base_scanner import run_base_scan
+from utils import scan_snapshots
+from utils.scan_engine import (
+    ScanContext, ScanEngine, load_universe, results_document, SENSITIVITY_MAP,
+)
+from utils.tiingo_api import get_market_snapshot
+
+SETUP_MODES = ("Breakout", "Pullback", "Both")
+MAX_CARDS = 500          # the scanner page's "Max Cards to Show" ceiling
+BASE_MIN_SCORE = 4       # lowest score evaluate_base_formation returns; the page filters upward
+
+
+def positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Precompute scanner and base scanner snapshots.")
+    parser.add_argument("--price-min", type=float, default=10.0, help="Scanner min price")
+    parser.add_argument("--price-max", type=float, default=60.0, help="Scanner max price")
+    parser.add_argument("--min-volume", type=float, default=1_000_000, help="Scanner min volume (latest bar)")
+    parser.add_argument("--max-cards", type=int, default=MAX_CARDS)
+    parser.add_argument("--base-price-min", type=float, default=10.0)
+    parser.add_argument("--base-price-max", type=float, default=300.0)
+    parser.add_argument("--base-min-volume", type=float, default=500_000, help="Base scanner min avg volume")
+    parser.add_argument("--no-smart", action="store_true", help="Skip the Smart Mode (market bias) variants")
+    parser.add_argument("--keep", type=positive_int, default=scan_snapshots.KEEP_RUNS, help="Runs to keep on disk")
+    return parser.parse_args(argv)
+
+
+def last_bar_date(bars: dict) -> str | None:
+    """Newest bar date across the loaded history."""
+    dates = [pd.Timestamp(df["Date"].iloc[-1]) for df in bars.values() if df is not None and not df.empty]
+    return max(dates).date().isoformat() if dates else None
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    load_dotenv()
+    token = os.getenv("TIINGO_TOKEN") or os.getenv("TIINGO_API_KEY")
+    if not token:
+        print("❌ TIINGO_TOKEN is not set (environment or .env)")
+        return 1
+
+    tickers = load_universe(token)
+    if not tickers:
+        print("❌ No tickers loaded! Check your universe file or Tiingo API.")
+        return 1
+
+    start = time.perf_counter()
+    staging = scan_snapshots.begin_run()
+    engine = ScanEngine(token)
+    order = engine.scan_order(tickers, shuffle=False)
+
+    print(f"📥 Loading price history for {len(order):,} tickers…")
+    bars = engine.load_bars(order)
+
+    # Smart Mode variants use tonight's market bias; pages match on it
+    biases = [(None, None)]
+    if not args.no_smart:
+        market = get_market_snapshot(token)
+        if market:
+            biases.append((market["bias"], market["vol_regime"]))
+        else:
+            print("⚠️ Could not load SPY snapshot, skipping Smart Mode snapshots")
+
+    scanner_files = []
+    for market_bias, vol_regime in biases:
+        for mode in SETUP_MODES:
+            for sensitivity, thresholds in SENSITIVITY_MAP.items():
+                ctx = ScanContext(
+                    mode=mode, price_min=args.price_min, price_max=args.price_max,
+                    min_volume=args.min_volume, thresholds=dict(thresholds),
+                    market_bias=market_bias, vol_regime=vol_regime,
+                )
+                scan = engine.run(ctx, args.max_cards, order, bars=bars)
+                name = f"scanner_{scan_snapshots.scanner_key(ctx)}"
+                scan_snapshots.write_snapshot(staging, name, {
+                    **results_document(scan, ctx), "sensitivity": sensitivity,
+                })
+                scanner_files.append({"file": name, "mode": mode, "sensitivity": sensitivity,
+                                      "market_bias": market_bias, "cards": len(scan["cards"])})
+                print(f"🃏 {mode:<8} sensitivity {sensitivity} bias={market_bias or '-'}: "
+                      f"{len(scan['candidates'])} passed, {len(scan['cards'])} cards")
+
+    print("🔭 Running base formation scan…")
+    base = run_base_scan(order, token, args.base_price_min, args.base_price_max,
+                         args.base_min_volume, min_score=BASE_MIN_SCORE)
+    base_name = f"base_{scan_snapshots.base_key(args.base_price_min, args.base_price_max, args.base_min_volume)}"
+    scan_snapshots.write_snapshot(staging, base_name, {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "filters": {"price_min": args.base_price_min, "price_max": args.base_price_max,
+                    "min_avg_vol": args.base_min_volume, "min_score": BASE_MIN_SCORE},
+        **base,
+    })
+    print(f"🔭 {len(base['results'])} base formation(s), {len(base['excluded_earnings'])} excluded (earnings ≤14 days)")
+
+    run_dir = scan_snapshots.publish_run(staging, {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "as_of": last_bar_date(bars),
+        "universe": len(order),
+        "scanner": scanner_files,
+        "base": [{"file": base_name, "results": len(base["results"])}],
+    }, keep=args.keep)
+
+    print(f"✅ Published {len(scanner_files) + 1} snapshots in {time.perf_counter() - start:.1f}s → {run_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
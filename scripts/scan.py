@@ -0,0 +1,103 @@
+"""
+Headless full-universe scan — the scanner page's "Run Scan" without Streamlit.
+
+Loads the quality universe, runs utils.scan_engine.ScanEngine and writes the
+ranked cards (plus the scan context and counts) to a JSON file, so scans can
+be precomputed before the open and the UI can just load the result.
+
+Needs TIINGO_TOKEN (or TIINGO_API_KEY) in the environment or .env.
+
+Usage (from the repo root):
+    python -m scripts.scan --mode Both --out results.json
+    python -m scripts.scan --mode Pullback --sensitivity 2 --price-min 5 --price-max 100 --smart --out pullbacks.json
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from utils.scan_engine import (
+    ScanContext, ScanEngine, load_universe, results_document, save_results,
+    SCAN_LOOKBACK_DAYS, SENSITIVITY_MAP,
+)
+from utils.tiingo_bars import get_market_snapshot
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the swing scanner headless and save the results as JSON.")
+    parser.add_argument("--mode", choices=["Breakout", "Pullback", "Both"], default="Both")
+    parser.add_argument("--sensitivity", type=int, choices=sorted(SENSITIVITY_MAP), default=3,
+                        help="1=Very Strict | 3=Balanced | 5=Relaxed")
+    parser.add_argument("--price-min", type=float, default=10.0)
+    parser.add_argument("--price-max", type=float, default=60.0)
+    parser.add_argument("--min-volume", type=float, default=1_000_000)
+    parser.add_argument("--max-cards", type=int, default=120)
+    parser.add_argument("--lookback-days", type=int, default=SCAN_LOOKBACK_DAYS)
+    parser.add_argument("--smart", action="store_true",
+                        help="Smart Mode: adjust thresholds to the SPY/VIX market bias")
+    parser.add_argument("--good-enough", type=float, default=None, metavar="SCORE",
+                        help="Stop once --max-cards cards score at least SCORE (watchlist-first order)")
+    parser.add_argument("--watchlist", default="",
+                        help="Comma-separated tickers to scan first")
+    parser.add_argument("--out", default="results.json", help="Output JSON path")
+    return parser.parse_args(argv)
+
+
+def build_context(args: argparse.Namespace, token: str, watchlist: list[str]) -> ScanContext:
+    market_bias = vol_regime = None
+    if args.smart:
+        market = get_market_snapshot(token)
+        if market:
+            market_bias, vol_regime = market["bias"], market["vol_regime"]
+
+    return ScanContext(
+        mode=args.mode, price_min=args.price_min, price_max=args.price_max,
+        min_volume=args.min_volume, thresholds=dict(SENSITIVITY_MAP[args.sensitivity]),
+        market_bias=market_bias, vol_regime=vol_regime, watchlist=frozenset(watchlist),
+    )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    load_dotenv()
+    token = os.getenv("TIINGO_TOKEN") or os.getenv("TIINGO_API_KEY")
+    if not token:
+        print("❌ TIINGO_TOKEN is not set (environment or .env)")
+        return 1
+
+    tickers = load_universe(token)
+    if not tickers:
+        print("❌ No tickers loaded! Check your universe file or Tiingo API.")
+        return 1
+
+    watchlist = [t.strip().upper() for t in args.watchlist.split(",") if t.strip()]
+    ctx = build_context(args, token, watchlist)
+    engine = ScanEngine(token, lookback_days=args.lookback_days)
+    order = engine.scan_order(tickers, watchlist)
+
+    def on_progress(stage: str, done: int, total: int, hits: int):
+        if stage == "screen":
+            print(f"🔎 Screening {total:,} tickers…")
+        elif stage == "cards":
+            print(f"🃏 Building cards… {done}/{total} | Hits: {hits}")
+        elif done == total:
+            print(f"📥 Loaded price history for {total:,} tickers")
+
+    print(f"🚀 Scanning {len(order):,} tickers: mode={args.mode}, sensitivity={args.sensitivity}, "
+          f"price=${args.price_min:g}-${args.price_max:g}, min_vol={args.min_volume:,.0f}")
+    start = time.perf_counter()
+    scan = engine.run(ctx, args.max_cards, order, progress_cb=on_progress, good_enough=args.good_enough)
+    path = save_results(args.out, results_document(scan, ctx))
+
+    if scan["stopped_early"]:
+        print(f"⚡ Good-enough stop after {scan['built']} cards")
+    print(f"✅ {len(scan['candidates'])} passed the screen, kept {len(scan['cards'])} cards "
+          f"in {time.perf_counter() - start:.1f}s → {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,7 @@ import anthropic
 from typing import List, Dict
 from utils.tiingo_api import tiingo_history
 from utils.claude_analyzer import get_stock_news, get_market_context
+from utils import http_client
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -290,7 +291,7 @@ Target: {', '.join([str(t.get('target', 'N/A')) for t in selected_trades])}"""
         )
         
         # Call Claude API with prompt caching
-        client = anthropic.Anthropic(api_key=api_key)
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
         
         message = client.messages.create(
             model="claude-sonnet-4-5-20250929",
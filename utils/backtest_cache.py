@@ -0,0 +1,123 @@
+"""
+Persistent on-disk cache of per-ticker backtest trades.
+
+Results are grouped by a hash of the simulation parameters, with one JSON
+file per ticker holding its trade list and a fingerprint of the bars it was
+simulated on (first and last bar date, row count). A rerun on unchanged bars
+reuses the stored trades as-is; when the bar store has only appended new
+sessions, utils.backtesting keeps the trades that could not be affected and
+resimulates just the tail.
+
+Backtest history windows are anchored to the first of the month (see
+anchored_days()) so the series start stays fixed between reruns and new
+bars really are appends.
+
+Layout:
+    .cache/backtests/<params hash>/AAPL.json
+        {"fingerprint": {"first": ..., "last": ..., "rows": 250}, "trades": [...]}
+"""
+
+import datetime as dt
+import hashlib
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_logger
+from utils.storage import CACHE_DIR
+
+logger = get_logger(__name__)
+
+RESULT_DIR = CACHE_DIR / "backtests"
+
+# Bump when the simulation logic changes so stale trade lists are ignored
+CACHE_VERSION = 1
+
+DATE_FIELDS = ("entry_date", "exit_date")
+
+
+def params_key(params: dict) -> str:
+    """Stable short hash of the simulation parameters."""
+    payload = json.dumps({"version": CACHE_VERSION, **params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def anchored_days(days: int, today: dt.date | None = None) -> int:
+    """
+    Days of history needed to reach back to the first of the month `days`
+    ago. Requesting this instead of a rolling `days` keeps the window start
+    fixed for a month, so each new session extends the same series.
+    """
+    today = today or dt.date.today()
+    start = (today - dt.timedelta(days=days)).replace(day=1)
+    return (today - start).days
+
+
+def fingerprint(df: pd.DataFrame) -> dict:
+    """Identify the bars a trade list was simulated on."""
+    dates = df["Date"]
+    return {
+        "first": pd.Timestamp(dates.iloc[0]).isoformat(),
+        "last": pd.Timestamp(dates.iloc[-1]).isoformat(),
+        "rows": int(len(df)),
+    }
+
+
+def _path(key: str, ticker: str) -> Path:
+    safe = re.sub(r"[^A-Z0-9._-]", "_", ticker.upper())
+    return RESULT_DIR / key / f"{safe}.json"
+
+
+def _json_default(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+# ---------------- Read / Write ----------------
+def load_trades(key: str, ticker: str) -> dict | None:
+    """
+    Stored {"fingerprint", "trades"} for a ticker under a parameter hash.
+    Returns None when nothing is stored or the file is unreadable.
+    """
+    path = _path(key, ticker)
+    if not path.exists():
+        return None
+    try:
+        record = json.loads(path.read_text(encoding="utf-8"))
+        for trade in record["trades"]:
+            for field in DATE_FIELDS:
+                trade[field] = pd.Timestamp(trade[field])
+        return record
+    except Exception as e:
+        logger.warning(f"Backtest cache read failed for {ticker}: {e}")
+        return None
+
+
+def save_trades(key: str, ticker: str, fp: dict, trades: list) -> None:
+    """Atomically store a ticker's trade list and bar fingerprint."""
+    path = _path(key, ticker)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({"fingerprint": fp, "trades": trades}, default=_json_default),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning(f"Backtest cache write failed for {ticker}: {e}")
+
+
+def clear_results(key: str | None = None) -> None:
+    """Delete cached trades for one parameter hash, or the whole cache."""
+    target = RESULT_DIR / key if key else RESULT_DIR
+    try:
+        shutil.rmtree(target, ignore_errors=True)
+    except Exception as e:
+        logger.warning(f"Backtest cache cleanup failed for {target}: {e}")
@@ -3,13 +3,36 @@ Backtesting Engine for SwingFinder
 Test scanner strategies on historical data to validate performance
 """
 
+import concurrent.futures as futures
+import itertools
 import pandas as pd
 import numpy as np
 import streamlit as st
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from utils.tiingo_api import tiingo_history
-from utils.indicators import compute_indicators, detect_patterns
+from utils import backtest_cache
+from utils.fetch_engine import CPU_WORKERS
+from utils.logger import get_logger
+from utils.tiingo_api import tiingo_history_many
+from utils.indicators import PatternTracker, compute_indicators
+from utils.portfolio_sim import close_panel, simulate_portfolio
+from utils.robustness import walk_forward_folds
+
+logger = get_logger(__name__)
+
+WARMUP_BARS = 60  # bars of history needed before the first simulated entry
+
+# Scanner thresholds per sensitivity level (1 = strict … 5 = loose)
+SENSITIVITY_THRESHOLDS = {
+    1: {"breakout_rsi": 65, "breakout_band": 0.70, "pullback_rsi_max": 40, "pullback_band": 0.30},
+    2: {"breakout_rsi": 60, "breakout_band": 0.65, "pullback_rsi_max": 45, "pullback_band": 0.35},
+    3: {"breakout_rsi": 55, "breakout_band": 0.55, "pullback_rsi_max": 50, "pullback_band": 0.45},
+    4: {"breakout_rsi": 52, "breakout_band": 0.50, "pullback_rsi_max": 52, "pullback_band": 0.50},
+    5: {"breakout_rsi": 50, "breakout_band": 0.45, "pullback_rsi_max": 55, "pullback_band": 0.55},
+}
+
+# Tickers per worker task; small enough for steady progress updates
+BACKTEST_CHUNK = 16
 
 
 def classify_setup(last: pd.Series) -> str:
@@ -59,15 +82,7 @@ def passes_filters(last: pd.Series, sensitivity: int, setup_type: str,
             return False
 
         # Sensitivity-based thresholds
-        sensitivity_map = {
-            1: {"breakout_rsi": 65, "breakout_band": 0.70, "pullback_rsi_max": 40, "pullback_band": 0.30},
-            2: {"breakout_rsi": 60, "breakout_band": 0.65, "pullback_rsi_max": 45, "pullback_band": 0.35},
-            3: {"breakout_rsi": 55, "breakout_band": 0.55, "pullback_rsi_max": 50, "pullback_band": 0.45},
-            4: {"breakout_rsi": 52, "breakout_band": 0.50, "pullback_rsi_max": 52, "pullback_band": 0.50},
-            5: {"breakout_rsi": 50, "breakout_band": 0.45, "pullback_rsi_max": 55, "pullback_band": 0.55},
-        }
-
-        thresholds = sensitivity_map.get(sensitivity, sensitivity_map[3])
+        thresholds = SENSITIVITY_THRESHOLDS.get(sensitivity, SENSITIVITY_THRESHOLDS[3])
 
         # Apply setup-specific filters
         if setup_type == "Breakout":
@@ -85,6 +100,601 @@ def passes_filters(last: pd.Series, sensitivity: int, setup_type: str,
         return False
 
 
+# ---------------- Vectorized Core ----------------
+def _column(df: pd.DataFrame, name: str, default: float = np.nan) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), default)
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+
+
+def classify_setups(ema20: np.ndarray, ema50: np.ndarray, rsi: np.ndarray) -> np.ndarray:
+    """classify_setup() for every bar at once; NaN inputs classify as Neutral."""
+    ema_up = ema20 > ema50
+    return np.where(ema_up & (rsi >= 55), "Breakout",
+                    np.where(ema_up & (rsi >= 35) & (rsi < 55), "Pullback", "Neutral"))
+
+
+def filter_mask(df: pd.DataFrame, setups: np.ndarray, sensitivity: int,
+                price_min: float, price_max: float, min_volume: int) -> np.ndarray:
+    """passes_filters() for every bar at once."""
+    px = _column(df, "Close")
+    vol = _column(df, "Volume")
+    rsi = _column(df, "RSI14", 50)
+    ema_up = _column(df, "EMA20") > _column(df, "EMA50")
+    band = _column(df, "BandPos20", 0.5)
+    thresholds = SENSITIVITY_THRESHOLDS.get(sensitivity, SENSITIVITY_THRESHOLDS[3])
+
+    # NaN price/volume fail every comparison, matching the pd.isna() guard
+    basic = (px >= price_min) & (px <= price_max) & (vol >= min_volume)
+    breakout = (rsi >= thresholds["breakout_rsi"]) & (band >= thresholds["breakout_band"])
+    pullback = (rsi <= thresholds["pullback_rsi_max"]) & (band <= thresholds["pullback_band"])
+    setup_ok = np.where(setups == "Breakout", breakout,
+                        np.where(setups == "Pullback", pullback, True))
+    return basic & ema_up & setup_ok
+
+
+def resolve_exits(entries: np.ndarray, low: np.ndarray, high: np.ndarray, close: np.ndarray,
+                  stop: np.ndarray, target: np.ndarray, hold_days: int) -> tuple:
+    """
+    First stop/target hit in the hold_days bars after each entry bar.
+    The stop is checked before the target on the same bar; with neither hit
+    the trade exits at the close hold_days bars later.
+
+    Returns (exit_bar, exit_price, exit_reason) arrays aligned with entries.
+    """
+    bars = entries[:, None] + np.arange(1, hold_days + 1)
+    stop_hit = low[bars] <= stop[:, None]
+    target_hit = high[bars] >= target[:, None]
+    hit = stop_hit | target_hit
+
+    first = hit.argmax(axis=1)
+    any_hit = hit.any(axis=1)
+    rows = np.arange(len(entries))
+    is_stop = stop_hit[rows, first]
+
+    exit_bar = np.where(any_hit, entries + 1 + first, entries + hold_days)
+    exit_price = np.where(any_hit, np.where(is_stop, stop, target), close[exit_bar])
+    exit_reason = np.where(any_hit, np.where(is_stop, "Stop Loss", "Take Profit"), "Time Exit")
+    return exit_bar, exit_price, exit_reason
+
+
+class TickerSetups:
+    """
+    One ticker's indicator arrays, prepared once and shared by every
+    parameter combination: setup masks are cached per filter setting and
+    pattern labels per bar, so a sweep only re-resolves exits.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n = len(df)
+        self.close = _column(df, "Close")
+        self.low = _column(df, "Low")
+        self.high = _column(df, "High")
+        self.atr = _column(df, "ATR14")
+        self.setups = classify_setups(_column(df, "EMA20"), _column(df, "EMA50"), _column(df, "RSI14"))
+        self._masks = {}
+        self._tracker = None
+        self._patterns = {}
+
+    def entries(self, setup_mode: str, sensitivity: int, price_min: float, price_max: float,
+                min_volume: int, hold_days: int) -> np.ndarray:
+        """Bars the scanner would have flagged, leaving hold_days bars to exit."""
+        key = (setup_mode, sensitivity, price_min, price_max, min_volume)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = filter_mask(self.df, self.setups, sensitivity, price_min, price_max, min_volume)
+            if setup_mode in ("Pullback", "Breakout"):
+                mask &= self.setups == setup_mode
+            mask[:WARMUP_BARS] = False
+            self._masks[key] = mask
+        last_entry = self.n - hold_days
+        return np.flatnonzero(mask[:max(last_entry, 0)])
+
+    def pattern_at(self, i: int) -> tuple[str, int]:
+        """(pattern type, confidence) at bar i; ("None", 0) if detection fails."""
+        if i not in self._patterns:
+            try:
+                if self._tracker is None:
+                    self._tracker = PatternTracker(self.df)
+                self._patterns[i] = self._tracker.top_at(i)
+            except Exception:
+                self._patterns[i] = ("None", 0)
+        return self._patterns[i]
+
+    def take_trades(self, entries: np.ndarray, hold_days: int, stop_loss_atr_mult: float,
+                    take_profit_r_mult: float, pattern_filter: str = "Any",
+                    next_entry_bar: int = WARMUP_BARS) -> dict:
+        """
+        Resolve every candidate's exit, then walk the candidates applying the
+        no-overlap guard: after a trade is entered on bar i, skip all bars up
+        to and including the bar where it exits, so the same setup isn't
+        counted multiple times while a position is open. `next_entry_bar` is
+        the first bar the walk may enter on.
+
+        Returns arrays (one element per trade taken) keyed like the trade dict.
+        """
+        entry_price = self.close[entries]
+        atr = self.atr[entries]
+        stop = entry_price - (stop_loss_atr_mult * atr)
+        risk = entry_price - stop
+        target = entry_price + (take_profit_r_mult * risk)
+        exit_bar, exit_price, exit_reason = resolve_exits(
+            entries, self.low, self.high, self.close, stop, target, hold_days
+        )
+
+        taken = []
+        for k, i in enumerate(entries):
+            if i < next_entry_bar:
+                continue
+            if pattern_filter != "Any" and self.pattern_at(i)[0] != pattern_filter:
+                continue
+            taken.append(k)
+            next_entry_bar = exit_bar[k] + 1
+
+        taken = np.array(taken, dtype=np.int64)
+        entry_price = entry_price[taken]
+        exit_price = exit_price[taken]
+        risk = risk[taken]
+        pnl = exit_price - entry_price
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r_multiple = np.where(risk > 0, pnl / risk, 0.0)
+        return {
+            "bar": entries[taken],
+            "entry_price": entry_price,
+            "exit_bar": exit_bar[taken],
+            "exit_price": exit_price,
+            "exit_reason": exit_reason[taken],
+            "pnl": pnl,
+            "pnl_pct": (pnl / entry_price) * 100,
+            "r_multiple": r_multiple,
+            "stop_price": stop[taken],
+            "target_price": target[taken],
+            "atr": atr[taken],
+        }
+
+
+def simulate_ticker(
+    ticker: str,
+    df: pd.DataFrame,
+    setup_mode: str = "Both",
+    sensitivity: int = 3,
+    price_min: float = 10.0,
+    price_max: float = 60.0,
+    min_volume: int = 500000,
+    hold_days: int = 5,
+    stop_loss_atr_mult: float = 1.5,
+    take_profit_r_mult: float = 2.0,
+    pattern_filter: str = "Any",
+    first_bar: int = WARMUP_BARS,
+) -> list:
+    """
+    Simulated trades for one ticker whose indicators are already computed,
+    entering no earlier than `first_bar` (later when resuming a cached run).
+
+    Setup classification, scanner filters and every candidate's exit are
+    resolved on NumPy arrays up front; the remaining walk over candidate
+    bars only applies the no-overlap guard and the pattern filter.
+    """
+    if len(df) - hold_days <= first_bar:
+        return []
+
+    setups = TickerSetups(df)
+    entries = setups.entries(setup_mode, sensitivity, price_min, price_max, min_volume, hold_days)
+    entries = entries[entries >= first_bar]
+    if len(entries) == 0:
+        return []
+    t = setups.take_trades(entries, hold_days, stop_loss_atr_mult, take_profit_r_mult,
+                           pattern_filter, next_entry_bar=first_bar)
+
+    dates = df["Date"]
+    trades = []
+    for k, i in enumerate(t["bar"]):
+        entry_date = dates.iloc[i]
+        exit_date = dates.iloc[t["exit_bar"][k]]
+        detected_pattern, detected_pattern_conf = setups.pattern_at(i)
+        trades.append({
+            "ticker": ticker,
+            "setup_type": str(setups.setups[i]),
+            "entry_date": entry_date,
+            "entry_price": float(t["entry_price"][k]),
+            "exit_date": exit_date,
+            "exit_price": float(t["exit_price"][k]),
+            "exit_reason": str(t["exit_reason"][k]),
+            "pnl": float(t["pnl"][k]),
+            "pnl_pct": float(t["pnl_pct"][k]),
+            "r_multiple": float(t["r_multiple"][k]),
+            "hold_days": (pd.to_datetime(exit_date) - pd.to_datetime(entry_date)).days,
+            "stop_price": float(t["stop_price"][k]),
+            "target_price": float(t["target_price"][k]),
+            "atr": float(t["atr"][k]),
+            "pattern": detected_pattern,
+            "pattern_confidence": detected_pattern_conf,
+        })
+
+    return trades
+
+
+# ---------------- Result Cache ----------------
+def _reusable_trades(cached: dict, df: pd.DataFrame, hold_days: int) -> tuple[list, int]:
+    """
+    Split a cached trade list for resimulation on `df`.
+
+    Indicators, setups and patterns only look back, so when `df` extends
+    the cached bars (same first bar, same date at the old last row) every
+    decision made before the old last bar still holds. The last cached bar
+    may have been revised by the bar-store top-up, so trades whose exit
+    reached it are dropped along with everything after them.
+
+    Returns (kept trades, first bar to resimulate from); ([], WARMUP_BARS)
+    when the bars were not a pure append.
+    """
+    fp = cached["fingerprint"]
+    rows = fp["rows"]
+    dates = df["Date"]
+    if (rows > len(df) or pd.Timestamp(dates.iloc[0]).isoformat() != fp["first"]
+            or pd.Timestamp(dates.iloc[rows - 1]).isoformat() != fp["last"]):
+        return [], WARMUP_BARS
+
+    bar_of = {pd.Timestamp(d).isoformat(): k for k, d in enumerate(dates.iloc[:rows])}
+    kept = []
+    resume = rows - hold_days  # first candidate the cached run never scanned
+    for trade in cached["trades"]:
+        entry_bar = bar_of.get(trade["entry_date"].isoformat())
+        exit_bar = bar_of.get(trade["exit_date"].isoformat())
+        if entry_bar is None or exit_bar is None:
+            return [], WARMUP_BARS
+        if exit_bar >= rows - 1:
+            resume = min(resume, entry_bar)
+            break
+        kept.append(trade)
+        resume = max(resume, exit_bar + 1)
+    return kept, max(resume, WARMUP_BARS)
+
+
+# ---------------- Parallel Runner ----------------
+def _backtest_one(ticker: str, df: pd.DataFrame | None, params: dict,
+                  cache_key: str | None = None) -> list | None:
+    """
+    Trades for one ticker, or None if it has too little data or fails.
+    With a cache_key, stored trades are reused (in full when the bars are
+    unchanged, up to the new tail otherwise) and the result is stored back.
+    """
+    try:
+        if df is None or len(df) < WARMUP_BARS:
+            return None
+        fp = backtest_cache.fingerprint(df)
+        cached = backtest_cache.load_trades(cache_key, ticker) if cache_key else None
+        if cached and cached["fingerprint"] == fp:
+            return cached["trades"]
+
+        kept, first_bar = ([], WARMUP_BARS) if not cached else \
+            _reusable_trades(cached, df, params["hold_days"])
+        trades = kept + simulate_ticker(ticker, compute_indicators(df), first_bar=first_bar, **params)
+        if cache_key:
+            backtest_cache.save_trades(cache_key, ticker, fp, trades)
+        return trades
+    except Exception:
+        return None
+
+
+def _backtest_chunk(chunk: list, params: dict, cache_key: str | None = None) -> list:
+    """Worker task: [(ticker, df), ...] -> [(ticker, trades | None), ...]."""
+    return [(ticker, _backtest_one(ticker, df, params, cache_key)) for ticker, df in chunk]
+
+
+def _run_chunks(history: dict, tickers: list, task, args: tuple, on_chunk,
+                workers: int = CPU_WORKERS) -> dict:
+    """
+    Run task(chunk, *args) over BACKTEST_CHUNK-sized [(ticker, df), ...] chunks
+    in a process pool. Each ticker's frame is shipped to exactly one worker.
+    on_chunk(results) runs on the calling thread as each chunk completes.
+    Falls back to running in this process when a pool can't be started.
+
+    Returns {ticker: result}.
+    """
+    chunks = [
+        [(t, history.get(t)) for t in tickers[k:k + BACKTEST_CHUNK]]
+        for k in range(0, len(tickers), BACKTEST_CHUNK)
+    ]
+    by_ticker = {}
+
+    def collect(results):
+        by_ticker.update(results)
+        on_chunk(results)
+
+    pending = chunks
+    done = set()
+    if workers > 1 and len(chunks) > 1:
+        try:
+            with futures.ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                jobs = {pool.submit(task, chunk, *args): i for i, chunk in enumerate(chunks)}
+                for job in futures.as_completed(jobs):
+                    collect(job.result())
+                    done.add(jobs[job])
+            pending = []
+        except Exception as e:
+            logger.warning(f"Backtest process pool unavailable ({e}); running in-process")
+            pending = [chunk for i, chunk in enumerate(chunks) if i not in done]
+
+    for chunk in pending:
+        collect(task(chunk, *args))
+    return by_ticker
+
+
+def run_backtests(history: dict, tickers: list, params: dict, progress_cb=None,
+                  workers: int = CPU_WORKERS, cache: bool = False) -> tuple[list, list]:
+    """
+    Simulate every ticker across a process pool.
+
+    History is loaded once by the caller; workers compute indicators and
+    trades per ticker. progress_cb(done, total, trades_so_far) runs after
+    each chunk streams back. With cache=True, per-ticker trades persist in
+    utils.backtest_cache under a hash of `params`.
+
+    Returns (all_trades, failed_tickers), both in `tickers` order regardless
+    of completion order, so results don't depend on scheduling.
+    """
+    streamed = []
+    finished = set()
+
+    def on_chunk(results):
+        for ticker, trades in results:
+            finished.add(ticker)
+            streamed.extend(trades or [])
+        if progress_cb:
+            progress_cb(len(finished), len(tickers), streamed)
+
+    cache_key = backtest_cache.params_key(params) if cache else None
+    by_ticker = _run_chunks(history, tickers, _backtest_chunk, (params, cache_key), on_chunk, workers)
+
+    all_trades, failed_tickers = [], []
+    for ticker in tickers:
+        trades = by_ticker.get(ticker)
+        if trades is None:
+            failed_tickers.append(ticker)
+        else:
+            all_trades.extend(trades)
+    return all_trades, failed_tickers
+
+
+# ---------------- Parameter Sweep ----------------
+# Parameters a sweep grid may vary; anything left out uses the fixed value
+SWEEP_PARAMS = ("setup_mode", "sensitivity", "hold_days", "stop_loss_atr_mult", "take_profit_r_mult")
+
+
+def expand_grid(grid: dict, fixed: dict) -> list:
+    """Every combination of the grid's values, filled in from `fixed`."""
+    axes = {name: list(grid.get(name) or [fixed[name]]) for name in SWEEP_PARAMS}
+    return [dict(zip(axes, values)) for values in itertools.product(*axes.values())]
+
+
+def _entry_days(df: pd.DataFrame) -> np.ndarray:
+    """Bar dates as integer day numbers (for date-window lookups)."""
+    dates = pd.to_datetime(df["Date"])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+def _sweep_one(df: pd.DataFrame | None, combos: list, fixed: dict) -> list | None:
+    """Per-combination trade arrays (day, exit_day, pnl, pnl_pct, r_multiple) for one ticker."""
+    try:
+        if df is None or len(df) < WARMUP_BARS:
+            return None
+        setups = TickerSetups(compute_indicators(df))
+        days = _entry_days(setups.df)
+        out = []
+        for combo in combos:
+            entries = setups.entries(combo["setup_mode"], combo["sensitivity"], fixed["price_min"],
+                                     fixed["price_max"], fixed["min_volume"], combo["hold_days"])
+            t = setups.take_trades(entries, combo["hold_days"], combo["stop_loss_atr_mult"],
+                                   combo["take_profit_r_mult"], fixed["pattern_filter"])
+            out.append({"day": days[t["bar"]], "exit_day": days[t["exit_bar"]], "pnl": t["pnl"],
+                        "pnl_pct": t["pnl_pct"], "r_multiple": t["r_multiple"]})
+        return out
+    except Exception:
+        return None
+
+
+def _sweep_chunk(chunk: list, combos: list, fixed: dict) -> list:
+    return [(ticker, _sweep_one(df, combos, fixed)) for ticker, df in chunk]
+
+
+def _max_streak(flags: np.ndarray) -> int:
+    """Longest run of True values."""
+    if not flags.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    return int((np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)).max())
+
+
+def _nanmean(values: np.ndarray) -> float:
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) else float("nan")
+
+
+def sweep_stats(pnl: np.ndarray, pnl_pct: np.ndarray, r_multiple: np.ndarray) -> dict:
+    """The summarize_trades() headline numbers for one combination's trades."""
+    if len(pnl) == 0:
+        return {"trades": 0, "win_rate": 0.0, "avg_return": 0.0, "avg_r": 0.0,
+                "expectancy": 0.0, "profit_factor": 0.0, "max_loss_streak": 0}
+    # Same NaN handling as the pandas stats: a trade with no exit price is
+    # neither a win nor a loss, but breaks a winning streak
+    wins = pnl > 0
+    gross_profit = pnl[wins].sum()
+    gross_loss = abs(pnl[pnl <= 0].sum())
+    return {
+        "trades": len(pnl),
+        "win_rate": wins.mean() * 100,
+        "avg_return": _nanmean(pnl_pct),
+        "avg_r": _nanmean(r_multiple),
+        "expectancy": _nanmean(pnl),
+        "profit_factor": gross_profit / gross_loss if gross_loss > 0 else float("inf"),
+        "max_loss_streak": _max_streak(~wins),
+    }
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def sweep_strategy(
+    tickers: List[str],
+    token: str,
+    grid: Dict[str, list],
+    lookback_days: int = 365,
+    setup_mode: str = "Both",
+    sensitivity: int = 3,
+    price_min: float = 10.0,
+    price_max: float = 60.0,
+    min_volume: int = 500000,
+    hold_days: int = 5,
+    stop_loss_atr_mult: float = 1.5,
+    take_profit_r_mult: float = 2.0,
+    pattern_filter: str = "Any",
+    _progress_cb=None,
+) -> pd.DataFrame:
+    """
+    Grid-search the strategy parameters in one pass over the data.
+
+    History is fetched once and each worker computes a ticker's indicators
+    and setup masks once, then evaluates every combination in `grid` (keys
+    from SWEEP_PARAMS, each a list of values) against those shared arrays.
+    Parameters not in the grid keep the values passed here.
+
+    Returns one row per combination, ranked by expectancy then profit
+    factor: the parameters plus trades, win_rate, avg_return, avg_r,
+    expectancy, profit_factor and max_loss_streak. Metrics match what
+    backtest_strategy reports for the same settings.
+    """
+    fixed = dict(
+        setup_mode=setup_mode, sensitivity=sensitivity, price_min=price_min,
+        price_max=price_max, min_volume=min_volume, hold_days=hold_days,
+        stop_loss_atr_mult=stop_loss_atr_mult, take_profit_r_mult=take_profit_r_mult,
+        pattern_filter=pattern_filter,
+    )
+    combos = expand_grid(grid, fixed)
+    history = tiingo_history_many(tickers, token, lookback_days + 60)
+    trades = collect_sweep_trades(history, tickers, combos, fixed, _progress_cb)
+
+    rows = [
+        {**combo, **sweep_stats(t["pnl"], t["pnl_pct"], t["r_multiple"])}
+        for combo, t in zip(combos, trades)
+    ]
+    table = pd.DataFrame(rows)
+    return table.sort_values(["expectancy", "profit_factor"], ascending=False, kind="stable").reset_index(drop=True)
+
+
+def collect_sweep_trades(history: dict, tickers: list, combos: list, fixed: dict,
+                         progress_cb=None) -> list:
+    """
+    Simulate every combination on every ticker (indicators and setup masks
+    computed once per ticker, in the process pool).
+
+    Returns one dict of arrays per combination — day, exit_day, pnl,
+    pnl_pct, r_multiple — with trades concatenated in `tickers` order.
+    """
+    finished = set()
+
+    def on_chunk(results):
+        finished.update(ticker for ticker, _ in results)
+        if progress_cb:
+            progress_cb(len(finished), len(tickers))
+
+    by_ticker = _run_chunks(history, tickers, _sweep_chunk, (combos, fixed), on_chunk)
+    per_ticker = [by_ticker[t] for t in tickers if by_ticker.get(t) is not None]
+
+    trades = []
+    for c in range(len(combos)):
+        parts = [res[c] for res in per_ticker]
+        trades.append({
+            key: np.concatenate([p[key] for p in parts]) if parts
+            else np.empty(0, dtype=np.int64 if key in ("day", "exit_day") else float)
+            for key in ("day", "exit_day", "pnl", "pnl_pct", "r_multiple")
+        })
+    return trades
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def walk_forward_strategy(
+    tickers: List[str],
+    token: str,
+    grid: Dict[str, list],
+    lookback_days: int = 730,
+    train_days: int = 180,
+    test_days: int = 60,
+    min_trades: int = 10,
+    setup_mode: str = "Both",
+    sensitivity: int = 3,
+    price_min: float = 10.0,
+    price_max: float = 60.0,
+    min_volume: int = 500000,
+    hold_days: int = 5,
+    stop_loss_atr_mult: float = 1.5,
+    take_profit_r_mult: float = 2.0,
+    pattern_filter: str = "Any",
+    _progress_cb=None,
+) -> Dict[str, Any]:
+    """
+    Walk-forward test of the parameter grid: on each rolling train window
+    (train_days calendar days) pick the combination with the best
+    expectancy, then trade it on the next test_days it never saw.
+
+    Returns:
+        folds        — one row per fold: dates, chosen parameters, in-sample
+                       and out-of-sample trades / expectancy / avg R
+        oos          — sweep_stats() of all out-of-sample trades combined
+        in_sample    — sweep_stats() of the best combination over the whole
+                       period (what a plain sweep would report)
+        efficiency   — out-of-sample / in-sample expectancy
+        oos_r        — out-of-sample R-multiples in date order (for Monte Carlo)
+    or {"error": ...} when there isn't enough history for one fold.
+    """
+    fixed = dict(
+        setup_mode=setup_mode, sensitivity=sensitivity, price_min=price_min,
+        price_max=price_max, min_volume=min_volume, hold_days=hold_days,
+        stop_loss_atr_mult=stop_loss_atr_mult, take_profit_r_mult=take_profit_r_mult,
+        pattern_filter=pattern_filter,
+    )
+    combos = expand_grid(grid, fixed)
+    history = tiingo_history_many(tickers, token, lookback_days + 60)
+    trades = collect_sweep_trades(history, tickers, combos, fixed, _progress_cb)
+
+    folds = walk_forward_folds(trades, train_days, test_days, min_trades)
+    if not folds:
+        return {"error": "Not enough trades for a train/test fold — widen the period or loosen the grid"}
+
+    to_date = lambda day: pd.Timestamp(np.datetime64(day, "D"))
+    fold_rows = []
+    for f in folds:
+        fold_rows.append({
+            "train_start": to_date(f["train_start"]),
+            "test_start": to_date(f["test_start"]),
+            "test_end": to_date(f["test_end"]),
+            **combos[f["combo"]],
+            **{k: f[k] for k in ("is_trades", "is_expectancy", "is_avg_r",
+                                 "oos_trades", "oos_expectancy", "oos_avg_r")},
+        })
+
+    oos_trades = {key: np.concatenate([f["oos"][key] for f in folds])
+                  for key in ("pnl", "pnl_pct", "r_multiple")}
+    oos = sweep_stats(oos_trades["pnl"], oos_trades["pnl_pct"], oos_trades["r_multiple"])
+
+    full = [sweep_stats(t["pnl"], t["pnl_pct"], t["r_multiple"]) for t in trades]
+    best = max(range(len(full)), key=lambda c: (
+        full[c]["trades"] >= min_trades,
+        full[c]["expectancy"] if np.isfinite(full[c]["expectancy"]) else -np.inf,
+    ))
+    in_sample = {**combos[best], **full[best]}
+
+    return {
+        "folds": pd.DataFrame(fold_rows),
+        "oos": oos,
+        "in_sample": in_sample,
+        "efficiency": oos["expectancy"] / in_sample["expectancy"]
+                      if in_sample["expectancy"] and in_sample["expectancy"] > 0 else float("nan"),
+        "oos_r": oos_trades["r_multiple"],
+    }
+
+
 @st.cache_data(ttl=3600, show_spinner=False)
 def backtest_strategy(
     tickers: List[str],
@@ -99,6 +709,7 @@ def backtest_strategy(
     stop_loss_atr_mult: float = 1.5,
     take_profit_r_mult: float = 2.0,
     pattern_filter: str = "Any",
+    _progress_cb=None,
 ) -> Dict[str, Any]:
     """
     Backtest scanner strategy on historical data.
@@ -114,155 +725,84 @@ def backtest_strategy(
         hold_days: How many days to hold each trade
         stop_loss_atr_mult: Stop loss multiplier (e.g., 1.5x ATR)
         take_profit_r_mult: Take profit multiplier (e.g., 2R)
+        _progress_cb: Optional callable(done, total, trades_so_far), called as
+            ticker results stream back (not part of the cache key)
+
+    Per-ticker trades also persist on disk (utils.backtest_cache), so after
+    a restart or a new trading day only changed tickers are resimulated.
     
     Returns:
         Dictionary with backtest results
     """
     
-    all_trades = []
-    failed_tickers = []
-    
-    # Test each ticker
-    for ticker in tickers:
-        try:
-            # Fetch historical data
-            df = tiingo_history(ticker, token, lookback_days + 60)  # Extra buffer for indicators
-            
-            if df is None or len(df) < 60:
-                failed_tickers.append(ticker)
-                continue
-            
-            # Compute indicators
-            df = compute_indicators(df)
-
-            # ── Duplicate-signal guard ──────────────────────────────────────
-            # Track the first bar index we're allowed to enter a NEW trade.
-            # After a trade is entered on bar i, we skip all bars up to and
-            # including the bar where that trade exits, preventing the same
-            # setup from being counted multiple times while a position is open.
-            next_entry_bar = 60  # start of the testable range
-
-            # Simulate scanning each day
-            for i in range(60, len(df) - hold_days):  # Need buffer for indicators and exit
-
-                # ── Skip bars where a position is still open ───────────────
-                if i < next_entry_bar:
-                    continue
-
-                row = df.iloc[i]
-
-                # Check if this setup would have been flagged by scanner
-                setup_type = classify_setup(row)
-
-                # Apply setup mode filter
-                if setup_mode == "Pullback" and setup_type != "Pullback":
-                    continue
-                elif setup_mode == "Breakout" and setup_type != "Breakout":
-                    continue
-
-                # Apply scanner filters
-                if not passes_filters(row, sensitivity, setup_type, price_min, price_max, min_volume):
-                    continue
-
-                # ── Pattern Detection ───────────────────────────────────────
-                # Only runs on bars that already pass scanner filters (fast).
-                # Uses up to 60 bars of history ending at bar i to match the
-                # same lookback windows used by detect_patterns() in production.
-                detected_pattern = "None"
-                try:
-                    pattern_slice = df.iloc[max(0, i - 59): i + 1]
-                    patterns = detect_patterns(pattern_slice)
-                    if patterns:
-                        detected_pattern = patterns[0]["name"]
-                        detected_pattern_conf = patterns[0]["confidence"]
-                    else:
-                        detected_pattern_conf = 0
-                except Exception:
-                    detected_pattern_conf = 0
-
-                # Apply pattern filter — skip if we need a specific pattern
-                if pattern_filter != "Any" and detected_pattern != pattern_filter:
-                    continue
-
-                # This would have been a scanner hit! Simulate the trade
-                entry_price = float(row["Close"])
-                entry_date = row["Date"]
-                atr = float(row["ATR14"])
-
-                # Calculate stop and target
-                stop_price = entry_price - (stop_loss_atr_mult * atr)
-                risk = entry_price - stop_price
-                target_price = entry_price + (take_profit_r_mult * risk)
-
-                # Simulate holding for N days or until stop/target hit
-                exit_price = None
-                exit_date = None
-                exit_reason = "Time"
-                exit_bar = i + hold_days  # default: time exit bar index
-
-                for j in range(i + 1, min(i + 1 + hold_days, len(df))):
-                    future_row = df.iloc[j]
-                    low = float(future_row["Low"])
-                    high = float(future_row["High"])
-
-                    # Check stop loss
-                    if low <= stop_price:
-                        exit_price = stop_price
-                        exit_date = future_row["Date"]
-                        exit_reason = "Stop Loss"
-                        exit_bar = j
-                        break
-
-                    # Check take profit
-                    if high >= target_price:
-                        exit_price = target_price
-                        exit_date = future_row["Date"]
-                        exit_reason = "Take Profit"
-                        exit_bar = j
-                        break
-
-                # If no stop/target hit, exit at close after hold_days
-                if exit_price is None:
-                    exit_idx = min(i + hold_days, len(df) - 1)
-                    exit_row = df.iloc[exit_idx]
-                    exit_price = float(exit_row["Close"])
-                    exit_date = exit_row["Date"]
-                    exit_reason = "Time Exit"
-                    exit_bar = exit_idx
-
-                # ── Advance the guard: no new entry until this trade closes ─
-                next_entry_bar = exit_bar + 1
-
-                # Calculate trade result
-                pnl = exit_price - entry_price
-                pnl_pct = (pnl / entry_price) * 100
-                r_multiple = pnl / risk if risk > 0 else 0
-
-                trade = {
-                    "ticker": ticker,
-                    "setup_type": setup_type,
-                    "entry_date": entry_date,
-                    "entry_price": entry_price,
-                    "exit_date": exit_date,
-                    "exit_price": exit_price,
-                    "exit_reason": exit_reason,
-                    "pnl": pnl,
-                    "pnl_pct": pnl_pct,
-                    "r_multiple": r_multiple,
-                    "hold_days": (pd.to_datetime(exit_date) - pd.to_datetime(entry_date)).days,
-                    "stop_price": stop_price,
-                    "target_price": target_price,
-                    "atr": atr,
-                    "pattern": detected_pattern,
-                    "pattern_confidence": detected_pattern_conf,
-                }
-
-                all_trades.append(trade)
-                
-        except Exception as e:
-            failed_tickers.append(ticker)
-            continue
-    
+    # Load every ticker's history up front on the async fetch engine. The
+    # window start is anchored to the month so cached results extend cleanly.
+    history = tiingo_history_many(
+        tickers, token, backtest_cache.anchored_days(lookback_days + 60)  # Extra buffer for indicators
+    )
+
+    # Simulate each ticker across the process pool
+    params = dict(
+        setup_mode=setup_mode, sensitivity=sensitivity, price_min=price_min,
+        price_max=price_max, min_volume=min_volume, hold_days=hold_days,
+        stop_loss_atr_mult=stop_loss_atr_mult, take_profit_r_mult=take_profit_r_mult,
+        pattern_filter=pattern_filter,
+    )
+    all_trades, failed_tickers = run_backtests(history, tickers, params, progress_cb=_progress_cb,
+                                               cache=True)
+    return summarize_trades(all_trades, failed_tickers, len(tickers))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def portfolio_backtest(
+    tickers: List[str],
+    token: str,
+    account_value: float,
+    risk_pct: float,
+    max_positions: int,
+    lookback_days: int = 365,
+    setup_mode: str = "Both",
+    sensitivity: int = 3,
+    price_min: float = 10.0,
+    price_max: float = 60.0,
+    min_volume: int = 500000,
+    hold_days: int = 5,
+    stop_loss_atr_mult: float = 1.5,
+    take_profit_r_mult: float = 2.0,
+    pattern_filter: str = "Any",
+    _progress_cb=None,
+) -> Dict[str, Any]:
+    """
+    Run the strategy through one account (see utils.portfolio_sim): the
+    per-ticker signals from backtest_strategy, sized at risk_pct of equity
+    with at most max_positions open, marked to market daily.
+
+    Returns simulate_portfolio()'s equity / exposure / drawdown / positions
+    series, executed trades and stats, or {"error": ...}.
+    """
+    history = tiingo_history_many(tickers, token, backtest_cache.anchored_days(lookback_days + 60))
+    params = dict(
+        setup_mode=setup_mode, sensitivity=sensitivity, price_min=price_min,
+        price_max=price_max, min_volume=min_volume, hold_days=hold_days,
+        stop_loss_atr_mult=stop_loss_atr_mult, take_profit_r_mult=take_profit_r_mult,
+        pattern_filter=pattern_filter,
+    )
+    all_trades, _ = run_backtests(history, tickers, params, progress_cb=_progress_cb, cache=True)
+    if not all_trades:
+        return {"error": "No trades found with these settings"}
+
+    # Equity curve starts where the first entries become possible
+    starts = [df["Date"].iloc[WARMUP_BARS] for df in history.values()
+              if df is not None and len(df) > WARMUP_BARS]
+    trades = pd.DataFrame(all_trades)
+    closes = close_panel(history, sorted(trades["ticker"].unique()),
+                         start=min(pd.to_datetime(starts)) if starts else None)
+    result = simulate_portfolio(trades, closes, account_value, risk_pct, max_positions)
+    return result or {"error": "No trades could be placed with these settings"}
+
+
+def summarize_trades(all_trades: list, failed_tickers: list, ticker_count: int) -> Dict[str, Any]:
+    """Aggregate simulated trades into the results dict shown on the backtest page."""
     # Calculate statistics
     if not all_trades:
         return {
@@ -365,7 +905,7 @@ def backtest_strategy(
         "max_loss_streak": int(max_loss_streak),
         "all_trades": trades_df.to_dict("records"),
         "failed_tickers": failed_tickers,
-        "tested_tickers": len(tickers) - len(failed_tickers),
+        "tested_tickers": ticker_count - len(failed_tickers),
         "pattern_stats": pattern_stats,
     }
 
@@ -0,0 +1,194 @@
+"""
+Persistent on-disk OHLCV bar store.
+
+Daily bars are kept as one Parquet file per ticker under .cache/bars/, with a
+small JSON sidecar recording which window has been fetched and when.  The
+store survives Streamlit restarts, so tiingo_history() can serve a warm scan
+from disk instead of going back to the network for every ticker.
+
+Each ticker holds the widest window fetched so far; loaded frames are also
+kept in process memory so repeated reads within a session skip the disk.
+Frames handed out by this module are shared — callers get copies through
+slice_window() and must not mutate what load_bars() returns.
+
+Layout:
+    .cache/bars/AAPL.parquet   Date, Open, High, Low, Close, Volume
+    .cache/bars/AAPL.json      {"start": "2024-01-02", "fetched_at": 1718000000.0}
+"""
+
+import datetime as dt
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytz
+
+from utils.logger import get_logger
+from utils.storage import CACHE_DIR
+
+logger = get_logger(__name__)
+
+BAR_DIR = CACHE_DIR / "bars"
+BAR_COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume"]
+
+# Tiingo publishes end-of-day bars roughly an hour and a half after the close.
+# A ticker fetched after the most recent publish time cannot have new bars yet.
+MARKET_TZ = pytz.timezone("US/Eastern")
+EOD_PUBLISH_HOUR_ET = 18
+
+# One lock per ticker so concurrent scanner threads don't interleave writes.
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+# In-process mirror of the store: {key: (bars, meta)}
+_memory: dict[str, tuple[pd.DataFrame, dict]] = {}
+
+
+def _ticker_lock(ticker: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(ticker, threading.Lock())
+
+
+def _key(ticker: str) -> str:
+    """Filesystem-safe key for a ticker (BRK.B, BF-B, ...)."""
+    return re.sub(r"[^A-Z0-9._-]", "_", ticker.upper())
+
+
+def _paths(ticker: str) -> tuple[Path, Path]:
+    key = _key(ticker)
+    return BAR_DIR / f"{key}.parquet", BAR_DIR / f"{key}.json"
+
+
+def _to_timestamp(day: dt.date, like: pd.Series) -> pd.Timestamp:
+    """Build a timestamp comparable with the Date column (tz-aware or naive)."""
+    ts = pd.Timestamp(day)
+    tz = getattr(like.dt, "tz", None)
+    return ts.tz_localize(tz) if tz is not None else ts
+
+
+# ---------------- Freshness ----------------
+def last_publish_time(now: dt.datetime | None = None) -> float:
+    """Epoch seconds of the most recent weekday EOD publish (18:00 ET)."""
+    now_et = (now or dt.datetime.now(pytz.utc)).astimezone(MARKET_TZ)
+    day = now_et.date()
+    if now_et.hour < EOD_PUBLISH_HOUR_ET:
+        day -= dt.timedelta(days=1)
+    while day.weekday() >= 5:  # Saturday / Sunday
+        day -= dt.timedelta(days=1)
+    publish = MARKET_TZ.localize(dt.datetime(day.year, day.month, day.day, EOD_PUBLISH_HOUR_ET))
+    return publish.timestamp()
+
+
+def is_fresh(meta: dict, now: dt.datetime | None = None) -> bool:
+    """True when the stored bars were fetched after the latest EOD publish."""
+    fetched_at = meta.get("fetched_at")
+    if fetched_at is None:
+        return False
+    return float(fetched_at) >= last_publish_time(now)
+
+
+def stored_start(meta: dict) -> dt.date | None:
+    """First date the stored window was requested from."""
+    start = meta.get("start")
+    return dt.date.fromisoformat(start) if start else None
+
+
+def covers(meta: dict, start: dt.date) -> bool:
+    """True when the stored window already reaches back to `start`."""
+    first = stored_start(meta)
+    return first is not None and first <= start
+
+
+# ---------------- Read / Write ----------------
+def load_bars(ticker: str) -> tuple[pd.DataFrame | None, dict]:
+    """
+    Load stored bars and metadata for a ticker.
+    Returns (None, {}) when nothing is stored or the files are unreadable.
+    """
+    key = _key(ticker)
+    if key in _memory:
+        return _memory[key]
+
+    data_path, meta_path = _paths(ticker)
+    if not data_path.exists() or not meta_path.exists():
+        return None, {}
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        df = pd.read_parquet(data_path)
+        _memory[key] = (df, meta)
+        return df, meta
+    except Exception as e:
+        logger.warning(f"Bar store read failed for {ticker}: {e}")
+        return None, {}
+
+
+def save_bars(ticker: str, df: pd.DataFrame, start: dt.date,
+              refreshed: bool = True) -> pd.DataFrame:
+    """
+    Merge freshly fetched bars into the store and return the merged frame.
+
+    `start` is the earliest startDate requested; the stored window start only
+    ever moves earlier, so a narrow refresh never shrinks it. Pass
+    refreshed=False when the fetch did not reach today (an older-prefix
+    backfill) so the stored fetch time is kept.
+    """
+    data_path, meta_path = _paths(ticker)
+    with _ticker_lock(ticker):
+        existing, meta = load_bars(ticker)
+        merged = df[BAR_COLUMNS]
+        if existing is not None and not existing.empty:
+            parts = [existing[BAR_COLUMNS]] + ([merged] if not merged.empty else [])
+            merged = pd.concat(parts, ignore_index=True)
+            merged = merged.drop_duplicates(subset="Date", keep="last")
+        merged = merged.sort_values("Date").reset_index(drop=True)
+
+        first = stored_start(meta)
+        new_meta = {
+            "start": min(first, start).isoformat() if first else start.isoformat(),
+            "fetched_at": time.time() if refreshed or not meta else meta["fetched_at"],
+        }
+        _memory[_key(ticker)] = (merged, new_meta)
+
+        try:
+            BAR_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_data = data_path.with_suffix(".parquet.tmp")
+            tmp_meta = meta_path.with_suffix(".json.tmp")
+            merged.to_parquet(tmp_data, index=False)
+            tmp_meta.write_text(json.dumps(new_meta), encoding="utf-8")
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_meta, meta_path)
+        except Exception as e:
+            logger.warning(f"Bar store write failed for {ticker}: {e}")
+
+        return merged
+
+
+def slice_window(df: pd.DataFrame, start: dt.date) -> pd.DataFrame:
+    """Return the bars on or after `start` as a fresh frame."""
+    # Stored frames are date-sorted with exactly BAR_COLUMNS (see save_bars)
+    dates = df["Date"]
+    first = dates.searchsorted(_to_timestamp(start, dates))
+    return df.iloc[first:].reset_index(drop=True)
+
+
+def last_bar_date(df: pd.DataFrame) -> dt.date:
+    """Calendar date of the newest stored bar."""
+    return pd.Timestamp(df["Date"].max()).date()
+
+
+def clear_bars(ticker: str | None = None) -> None:
+    """Delete stored bars for one ticker, or the whole store when ticker is None."""
+    if ticker:
+        _memory.pop(_key(ticker), None)
+    else:
+        _memory.clear()
+    targets = _paths(ticker) if ticker else tuple(BAR_DIR.glob("*"))
+    for path in targets:
+        try:
+            path.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Bar store cleanup failed for {path}: {e}")
@@ -5,10 +5,10 @@ Uses multiple sources to ensure comprehensive coverage of liquid, tradeable stoc
 
 import os
 import json
-import requests
-import time
 from datetime import datetime
 
+from utils import http_client
+
 TIINGO_TOKEN = os.getenv("TIINGO_TOKEN")
 CACHE_PATH = os.path.join(os.path.dirname(__file__), "filtered_universe.json")
 
@@ -162,7 +162,8 @@ def validate_and_enrich_tickers(tickers: list[str], token: str) -> list[dict]:
         try:
             # Get ticker metadata
             url = f"https://api.tiingo.com/tiingo/daily/{ticker.lower()}"
-            resp = requests.get(url, headers=headers, timeout=10)
+            # Paced by the Tiingo bucket; 429s are re-sent after it backs off
+            resp = http_client.get(url, headers=headers, timeout=10)
             
             if resp.ok:
                 data = resp.json()
@@ -178,8 +179,6 @@ def validate_and_enrich_tickers(tickers: list[str], token: str) -> list[dict]:
             else:
                 print(f"  ⚠️ Skipped {ticker} (not found)")
             
-            time.sleep(0.15)  # Rate limit protection
-            
         except Exception as e:
             print(f"  ⚠️ Error validating {ticker}: {e}")
             continue
@@ -16,6 +16,7 @@ from utils.tiingo_api import (
 )
 from utils.fundamentals import get_tiingo_fundamentals_for_claude, format_fundamentals_for_prompt
 from utils.indicators import detect_patterns
+from utils import http_client, ta_kernels
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -40,7 +41,6 @@ def get_stock_news(symbol: str, days: int = 7, token: str = "") -> List[Dict[str
         title, description, category, sentiment, source, time_ago
     """
     import os
-    import requests as _requests
     from utils.news_feed import categorize_news, analyze_sentiment, format_news_time
 
     # --- 1. Try Tiingo News API ---
@@ -63,7 +63,7 @@ def get_stock_news(symbol: str, days: int = 7, token: str = "") -> List[Dict[str
                 "sortBy": "publishedDate",
             }
             headers = {"Authorization": f"Token {tiingo_token}"}
-            resp = _requests.get(url, params=params, headers=headers, timeout=8)
+            resp = http_client.get(url, params=params, headers=headers, timeout=8)
 
             if resp.status_code == 200:
                 raw_articles = resp.json()
@@ -339,13 +339,8 @@ def get_stock_data_for_claude(symbol: str, stock_info: Dict, token: str) -> Dict
         avg_volume = df_recent['Volume'].mean()
         volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1.0
 
-        # Calculate RSI (14-period) using full history for accuracy
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        current_rsi = rsi.iloc[-1] if not rsi.empty else 50
+        # Calculate RSI (14-period, Wilder) using full history for accuracy
+        current_rsi = float(ta_kernels.rsi(df['Close'].to_numpy(dtype=float), 14)[-1])
 
         # Recent price action (last 5 days)
         recent_closes = df['Close'].tail(5).tolist()
@@ -522,7 +517,7 @@ def quick_analyze_watchlist(watchlist: List[Dict], token: str, api_key: str) ->
         )
 
         # Call Claude API with system prompt caching
-        client = anthropic.Anthropic(api_key=api_key)
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
 
         message = client.messages.create(
             model="claude-sonnet-4-5-20250929",
@@ -672,7 +667,7 @@ def deep_analyze_stocks(selected_stocks: List[Dict], token: str, api_key: str,
         )
 
         # Call Claude API with prompt caching
-        client = anthropic.Anthropic(api_key=api_key)
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
 
         message = client.messages.create(
             model="claude-sonnet-4-5-20250929",
@@ -838,7 +833,7 @@ Be direct and specific. Traders need decisions, not analysis."""
             f"Use the live news, 52W/6M trend, and market context above — not your training data."
         )
 
-        client = anthropic.Anthropic(api_key=api_key)
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
         message = client.messages.create(
             model="claude-sonnet-4-5-20250929",
             max_tokens=1600,
@@ -973,7 +968,7 @@ Be specific with price levels. Give the trader clear decisions they can act on i
             f"Be direct. Give specific price levels. No vague advice."
         )
 
-        client = anthropic.Anthropic(api_key=api_key)
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
         message = client.messages.create(
             model="claude-sonnet-4-5-20250929",
             max_tokens=1800,
@@ -1055,7 +1050,7 @@ def review_single_trade(trade: Dict[str, Any], api_key: str) -> str:
             "Be direct and specific. Grade honestly — a C or D is more useful than false praise."
         )
 
-        client = anthropic.Anthropic(api_key=api_key)
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
         message = client.messages.create(
             model="claude-sonnet-4-5-20250929",
             max_tokens=900,
@@ -1190,7 +1185,7 @@ def coach_trading_performance(trades: List[Dict[str, Any]], focus: str, api_key:
             "Be specific and honest. Give me 3-5 concrete action items I can apply to my next trade."
         )
 
-        client = anthropic.Anthropic(api_key=api_key)
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
         message = client.messages.create(
             model="claude-sonnet-4-5-20250929",
             max_tokens=1200,
@@ -1349,7 +1344,7 @@ Be decisive. A trader reading this needs to know exactly what to do."""
             f"favor anticipation entries, and a 'VIX GATE' note if VIX is near or above 20."
         )
 
-        client = anthropic.Anthropic(api_key=api_key)
+        client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
         message = client.messages.create(
             model="claude-sonnet-4-5-20250929",
             max_tokens=2000,
@@ -1426,7 +1421,7 @@ def render_ai_chat(context_key: str, api_key: str, initial_analysis: str) -> Non
 
         with st.spinner("🤖 Thinking…"):
             try:
-                client = anthropic.Anthropic(api_key=api_key)
+                client = anthropic.Anthropic(api_key=api_key, http_client=http_client.httpx_client())
                 resp = client.messages.create(
                     model="claude-sonnet-4-5-20250929",
                     max_tokens=800,
@@ -3,12 +3,13 @@ Earnings Analysis Module
 Track earnings history, beat rates, and post-earnings moves
 """
 
-import requests
 import pandas as pd
 import streamlit as st
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
+from utils import http_client
+
 
 @st.cache_data(ttl=86400, show_spinner=False)  # Cache for 24 hours
 def get_earnings_history(ticker: str, token: str) -> Optional[List[Dict[str, Any]]]:
@@ -20,7 +21,7 @@ def get_earnings_history(ticker: str, token: str) -> Optional[List[Dict[str, Any
         url = f"https://api.tiingo.com/tiingo/fundamentals/{ticker.lower()}/statements"
         headers = {"Authorization": f"Token {token}"}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         
         if response.status_code != 200:
             return None
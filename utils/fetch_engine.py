@@ -0,0 +1,150 @@
+"""
+Asyncio fetch engine for universe-wide loads.
+
+A scan used to be capped by a handful of OS threads each blocked on one HTTP
+request. This engine keeps hundreds of requests in flight on a single event
+loop, bounded by a configurable semaphore, so a full-universe load is limited
+by the API rate limit rather than by thread count.
+
+Requests are paced by the per-provider token buckets in utils.rate_limiter,
+so the semaphore only caps sockets; the API budget is enforced separately.
+
+CPU-bound work (indicators, scoring) doesn't belong on the event loop: pass a
+`process` callable and it runs in a separate executor as soon as each fetch
+lands, overlapping compute with the remaining network I/O.
+
+Usage:
+    async def fetch(client, ticker):
+        r = await fetch_engine.get(client, url_for(ticker))
+        return r.json()
+
+    results = fetch_engine.map_bounded(tickers, fetch, concurrency=64,
+                                       process=score, progress_cb=update_bar)
+"""
+
+import asyncio
+import concurrent.futures as futures
+import os
+
+import httpx
+
+from utils import http_client
+from utils.logger import get_logger
+from utils.rate_limiter import bucket_for_url
+
+logger = get_logger(__name__)
+
+DEFAULT_CONCURRENCY = 32
+CPU_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+
+def async_client(concurrency: int = DEFAULT_CONCURRENCY) -> httpx.AsyncClient:
+    """Keep-alive async client with one pooled connection per concurrent request."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=http_client.DEFAULT_TIMEOUT,
+        headers={"Accept-Encoding": "gzip, deflate"},
+    )
+
+
+async def get(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """
+    Rate-limited GET with the same policy as utils.http_client: waits on the
+    provider's token bucket, re-sends 429s once the bucket has backed off, and
+    retries 5xx/transport errors with exponential backoff. The final response
+    is returned even if it is still an error status.
+    """
+    bucket = bucket_for_url(url)
+    attempts = max(http_client.RETRY_TOTAL, http_client.THROTTLE_RETRIES) + 1
+    for attempt in range(attempts):
+        last_try = attempt == attempts - 1
+        delay = http_client.RETRY_BACKOFF * (2 ** attempt)
+        if bucket:
+            await bucket.acquire_async()
+        try:
+            r = await client.get(url, **kwargs)
+        except httpx.TransportError:
+            if last_try:
+                raise
+            await asyncio.sleep(delay)
+            continue
+
+        throttled = bucket.observe(r.status_code, r.headers) if bucket else False
+        if last_try or not (throttled or r.status_code in http_client.RETRY_STATUSES):
+            return r
+        if not throttled:
+            await asyncio.sleep(delay)
+    return r
+
+
+def run(coro):
+    """Run a coroutine to completion from synchronous code."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Already inside an event loop (e.g. a notebook): use a helper thread
+    with futures.ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+
+def map_bounded(keys, fetch, concurrency: int = DEFAULT_CONCURRENCY,
+                process=None, cpu_executor: futures.Executor | None = None,
+                progress_cb=None) -> dict:
+    """
+    Run `await fetch(client, key)` for every key with at most `concurrency`
+    requests in flight, and return {key: result}.
+
+    Args:
+        keys: Iterable of hashable keys (tickers), deduped in order.
+        fetch: async (client, key) -> result, or None on failure.
+        concurrency: Max simultaneous fetches.
+        process: Optional sync (key, result) -> value, run in `cpu_executor`
+            for every non-None result as soon as it arrives. Its return value
+            replaces the fetch result.
+        cpu_executor: Executor for `process`. Defaults to a dedicated thread
+            pool; pass a ProcessPoolExecutor when `process` is picklable.
+        progress_cb: Optional (done, total) callback, called on the calling
+            thread, so it can update Streamlit widgets.
+    """
+    keys = list(dict.fromkeys(keys))
+    total = len(keys)
+    if not keys:
+        return {}
+
+    async def _main():
+        sem = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+
+        async with async_client(concurrency) as client:
+            async def _one(key):
+                try:
+                    async with sem:
+                        result = await fetch(client, key)
+                    if process is not None and result is not None:
+                        result = await loop.run_in_executor(executor, process, key, result)
+                    return key, result
+                except Exception as e:
+                    logger.error(f"Fetch failed for {key}: {e}")
+                    return key, None
+
+            tasks = [asyncio.create_task(_one(k)) for k in keys]
+            results = {}
+            for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+                key, result = await task
+                results[key] = result
+                if progress_cb:
+                    progress_cb(done, total)
+            return results
+
+    own_executor = process is not None and cpu_executor is None
+    executor = futures.ThreadPoolExecutor(max_workers=CPU_WORKERS) if own_executor else cpu_executor
+    try:
+        results = run(_main())
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+    # Preserve the caller's key order
+    return {k: results.get(k) for k in keys}
@@ -4,11 +4,12 @@ Fetch and analyze fundamental data for stocks
 """
 
 import datetime as dt
-import requests
 import pandas as pd
 import streamlit as st
 from typing import Dict, Any, Optional
 
+from utils import http_client
+
 
 @st.cache_data(ttl=86400, show_spinner=False)  # Cache for 24 hours
 def get_fundamentals(ticker: str, token: str) -> Optional[Dict[str, Any]]:
@@ -25,7 +26,7 @@ def get_fundamentals(ticker: str, token: str) -> Optional[Dict[str, Any]]:
         url = f"https://api.tiingo.com/tiingo/fundamentals/{ticker.upper()}/statements"
         headers = {"Authorization": f"Token {token}", "Content-Type": "application/json"}
 
-        response = requests.get(url, headers=headers, params={"token": token}, timeout=10)
+        response = http_client.get(url, headers=headers, params={"token": token}, timeout=10)
         
         if response.status_code != 200:
             return None
@@ -63,7 +64,7 @@ def get_daily_metrics(ticker: str, token: str) -> Optional[pd.DataFrame]:
         headers = {"Authorization": f"Token {token}", "Content-Type": "application/json"}
         params = {"startDate": "2020-01-01", "token": token}
 
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_client.get(url, headers=headers, params=params, timeout=10)
         
         if response.status_code != 200:
             return None
@@ -104,7 +105,7 @@ def get_tiingo_fundamentals_for_claude(ticker: str, token: str) -> Dict[str, Any
     try:
         start = (dt.date.today() - dt.timedelta(days=45)).isoformat()
         url = f"https://api.tiingo.com/tiingo/fundamentals/{ticker.upper()}/daily"
-        r = requests.get(url, headers=headers, params={"startDate": start, "token": token}, timeout=10)
+        r = http_client.get(url, headers=headers, params={"startDate": start, "token": token}, timeout=10)
         daily_status = r.status_code
         if not r.ok:
             daily_body = r.text[:200]  # Capture the error body
@@ -127,7 +128,7 @@ def get_tiingo_fundamentals_for_claude(ticker: str, token: str) -> Dict[str, Any
     stmt_body = ""
     try:
         url = f"https://api.tiingo.com/tiingo/fundamentals/{ticker.upper()}/statements"
-        r = requests.get(url, headers=headers, params={"token": token}, timeout=10)
+        r = http_client.get(url, headers=headers, params={"token": token}, timeout=10)
         stmt_status = r.status_code
         if not r.ok:
             stmt_body = r.text[:200]  # Capture the error body
@@ -0,0 +1,135 @@
+"""
+Shared HTTP client for every outbound API call (Tiingo, Yahoo, GitHub).
+
+All fetchers go through one pooled requests.Session instead of bare
+requests.get(), so concurrent scanner threads reuse keep-alive connections
+instead of paying a TCP+TLS handshake per ticker.
+
+The session:
+  - keeps up to POOL_SIZE connections per host alive
+  - asks for gzip/deflate payloads
+  - retries 5xx responses (and connection errors) with exponential backoff
+  - paces every call through the provider's token bucket (utils.rate_limiter)
+    and re-sends 429s once the bucket has backed off
+
+Streamlit-free on purpose: check_alerts.py imports this from GitHub Actions.
+
+Usage:
+    from utils import http_client
+    r = http_client.get(url, headers=headers, params=params, timeout=10)
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.logger import get_logger
+from utils.rate_limiter import bucket_for_url
+
+logger = get_logger(__name__)
+
+# Sized to the widest concurrent fan-out (tiingo_history_many workers)
+POOL_SIZE = 16
+DEFAULT_TIMEOUT = 15  # seconds, when the caller doesn't pass one
+
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5  # sleeps 0.5s, 1s, 2s between attempts
+RETRY_STATUSES = (500, 502, 503, 504)
+THROTTLE_RETRIES = 3  # 429s are re-sent after the rate limiter backs off
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_httpx_client = None  # httpx.Client, imported lazily (only the SDK callers need httpx)
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the final 429/5xx back to the caller
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+                logger.debug(f"HTTP session created (pool={POOL_SIZE}, retries={RETRY_TOTAL})")
+    return _session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a rate-limited request through the shared session with a default timeout."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    bucket = bucket_for_url(url)
+    if bucket is None:
+        return get_session().request(method, url, **kwargs)
+
+    for attempt in range(THROTTLE_RETRIES + 1):
+        bucket.acquire()
+        r = get_session().request(method, url, **kwargs)
+        if not bucket.observe(r.status_code, r.headers) or attempt == THROTTLE_RETRIES:
+            return r
+    return r
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def patch(url: str, **kwargs) -> requests.Response:
+    return request("PATCH", url, **kwargs)
+
+
+def _httpx_before(req) -> None:
+    bucket = bucket_for_url(str(req.url))
+    if bucket:
+        bucket.acquire()
+
+
+def _httpx_after(resp) -> None:
+    bucket = bucket_for_url(str(resp.request.url))
+    if bucket:
+        bucket.observe(resp.status_code, resp.headers)
+
+
+def httpx_client():
+    """
+    Process-wide httpx.Client for third-party SDKs (e.g. anthropic.Anthropic(http_client=...))
+    whose requests should still go through the provider rate limiter. Created on first
+    use and shared, so every SDK client reuses the same connection pool.
+    """
+    global _httpx_client
+    if _httpx_client is None:
+        with _session_lock:
+            if _httpx_client is None:
+                import httpx
+
+                _httpx_client = httpx.Client(
+                    timeout=httpx.Timeout(600.0, connect=10.0),
+                    event_hooks={"request": [_httpx_before], "response": [_httpx_after]},
+                )
+                logger.debug("httpx client created")
+    return _httpx_client
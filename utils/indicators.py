@@ -1,35 +1,37 @@
+import copy
+
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils import ta_kernels
+
+
+def _like(template, values: np.ndarray):
+    """Wrap kernel output with the index (and columns) of the pandas input."""
+    if isinstance(template, pd.DataFrame):
+        return pd.DataFrame(values, index=template.index, columns=template.columns)
+    return pd.Series(values, index=template.index, name=template.name)
+
 
 def ema(series: pd.Series, length: int) -> pd.Series:
-    return series.ewm(span=length, adjust=False).mean()
+    return _like(series, ta_kernels.ema(series.to_numpy(dtype=float), length))
 
 def rsi(series: pd.Series, length: int = 14) -> pd.Series:
     """
     RSI using Wilder's smoothing method (matches Webull, TradingView, most platforms).
     This is more accurate than EWM for RSI calculation.
     """
-    delta = series.diff()
-
-    gain = delta.where(delta > 0, 0.0)
-    loss = -delta.where(delta < 0, 0.0)
-
-    # Use Wilder's smoothing (RMA)
-    avg_gain = gain.ewm(alpha=1/length, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/length, adjust=False).mean()
-
-    # Avoid division by zero
-    rs = avg_gain / avg_loss.replace(0, np.nan)
-    rsi_values = 100 - (100 / (1 + rs))
-
-    return rsi_values.fillna(50)
+    return _like(series, ta_kernels.rsi(series.to_numpy(dtype=float), length))
 
 def atr(df: pd.DataFrame, length: int = 14) -> pd.Series:
-    high_low = (df["High"] - df["Low"]).abs()
-    high_close = (df["High"] - df["Close"].shift()).abs()
-    low_close = (df["Low"] - df["Close"].shift()).abs()
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    return tr.ewm(alpha=1/length, adjust=False).mean()
+    values = ta_kernels.atr(
+        df["High"].to_numpy(dtype=float),
+        df["Low"].to_numpy(dtype=float),
+        df["Close"].to_numpy(dtype=float),
+        length,
+    )
+    return pd.Series(values, index=df.index)
 
 # ---------------- Compute Common Indicators (used by Scanner) ----------------
 def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
@@ -51,11 +53,7 @@ def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
     df["ATR14"] = atr(df, 14)
 
     # --- Bollinger Band Position (0–1 between low/high) ---
-    mean = close.rolling(20).mean()
-    std = close.rolling(20).std()
-    upper = mean + 2 * std
-    lower = mean - 2 * std
-    df["BandPos20"] = (close - lower) / (upper - lower)
+    df["BandPos20"] = ta_kernels.bollinger_position(close.to_numpy(), 20)
 
     # --- 20-day highs/lows ---
     df["HH20"] = high.rolling(20).max()
@@ -68,6 +66,89 @@ def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# ---------------- Panel Indicators (whole universe at once) ----------------
+# Same math as compute_indicators, run once over a (bars × tickers) panel
+# instead of once per ticker. Each ticker's bars are right-aligned on bar
+# position (last bar in the last row) and padded with leading NaNs, so every
+# column starts its recursion at its own first bar exactly like the
+# per-ticker path and the last-row snapshot is numerically identical.
+
+PANEL_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def align_bars(frames: dict, length: int | None = None) -> tuple[list, dict]:
+    """
+    Stack per-ticker OHLCV frames into right-aligned (bars × tickers) arrays.
+
+    Args:
+        frames: {ticker: DataFrame} as returned by tiingo_history_many
+        length: Rows to keep (most recent); defaults to the longest history
+
+    Returns:
+        (tickers, {field: float64 array of shape (length, len(tickers))})
+    """
+    tickers = [t for t, df in frames.items() if df is not None and not df.empty]
+    if length is None:
+        length = max((len(frames[t]) for t in tickers), default=0)
+
+    panel = {f: np.full((length, len(tickers)), np.nan) for f in PANEL_FIELDS}
+    for j, t in enumerate(tickers):
+        df = frames[t].tail(length)
+        n = len(df)
+        for f in PANEL_FIELDS:
+            panel[f][length - n:, j] = df[f].to_numpy(dtype=float)
+    return tickers, panel
+
+
+def compute_indicators_panel(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                             volume: np.ndarray, tickers: list | None = None) -> pd.DataFrame:
+    """
+    Vectorized compute_indicators over aligned (bars × tickers) arrays.
+
+    Returns the last-bar snapshot: one row per ticker with Close, Volume,
+    EMA20, EMA50, EMA200, RSI14, ATR14, BandPos20, HH20, LL20, AvgVol20,
+    RelVolume and Bars (number of real, non-padded bars).
+    """
+    cols = tickers if tickers is not None else range(close.shape[1])
+    h = pd.DataFrame(high, columns=cols)
+    lo = pd.DataFrame(low, columns=cols)
+    v = pd.DataFrame(volume, columns=cols)
+
+    snap = pd.DataFrame(index=pd.Index(cols, name="Ticker"))
+    snap["Close"] = close[-1]
+    snap["Volume"] = volume[-1]
+    snap["Bars"] = (~np.isnan(close)).sum(axis=0)
+
+    # --- Moving averages ---
+    snap["EMA20"] = ta_kernels.ema(close, 20)[-1]
+    snap["EMA50"] = ta_kernels.ema(close, 50)[-1]
+    snap["EMA200"] = ta_kernels.ema(close, 200)[-1]
+
+    # --- RSI, ATR & Bollinger position (kernels handle the NaN padding) ---
+    snap["RSI14"] = ta_kernels.rsi(close, 14)[-1]
+    snap["ATR14"] = ta_kernels.atr(high, low, close, 14)[-1]
+    snap["BandPos20"] = ta_kernels.bollinger_position(close, 20)[-1]
+
+    # --- 20-day highs/lows ---
+    snap["HH20"] = h.rolling(20).max().iloc[-1]
+    snap["LL20"] = lo.rolling(20).min().iloc[-1]
+
+    # --- Volume Analysis ---
+    avg_vol = v.rolling(20).mean()
+    snap["AvgVol20"] = avg_vol.iloc[-1]
+    snap["RelVolume"] = (v / avg_vol).iloc[-1]
+
+    return snap
+
+
+def indicator_snapshot(frames: dict, length: int | None = None) -> pd.DataFrame:
+    """Last-bar indicator snapshot for {ticker: DataFrame}, one row per ticker."""
+    tickers, p = align_bars(frames, length)
+    if not tickers:
+        return pd.DataFrame()
+    return compute_indicators_panel(p["High"], p["Low"], p["Close"], p["Volume"], tickers)
+
+
 # ---------------- Fibonacci Retracement Calculation ----------------
 def calculate_fibonacci_levels(df: pd.DataFrame, lookback: int = 20) -> dict:
     """
@@ -186,6 +267,41 @@ def get_fibonacci_zone_label(fib_position: float) -> str:
 
 
 # ---------------- Support/Resistance Detection ----------------
+def _count_within(ordered: np.ndarray, levels: np.ndarray, tol: float) -> np.ndarray:
+    """
+    For each level, count prices p with abs(p - level) / level < tol.
+
+    `ordered` is sorted (NaN last) and contains every level. The test is
+    monotone in p on each side of the level, so both band edges are found by
+    a binary search vectorized across levels: O(k log n) instead of O(k·n).
+    """
+    n = len(ordered)
+    center = np.searchsorted(ordered, levels, side="left")
+
+    def inside(i):
+        return np.abs(ordered[np.minimum(i, n - 1)] - levels) / levels < tol
+
+    # Lower edge: first index in [0, center] inside the band
+    lo, hi = np.zeros_like(center), center.copy()
+    while np.any(lo < hi):
+        active = lo < hi
+        mid = (lo + hi) // 2
+        ok = inside(mid)
+        hi = np.where(active & ok, mid, hi)
+        lo = np.where(active & ~ok, mid + 1, lo)
+    start = lo
+
+    # Upper edge: first index in [center, n] outside the band
+    lo, hi = center.copy(), np.full_like(center, n)
+    while np.any(lo < hi):
+        active = lo < hi
+        mid = (lo + hi) // 2
+        ok = inside(mid)
+        lo = np.where(active & ok, mid + 1, lo)
+        hi = np.where(active & ~ok, mid, hi)
+    return hi - start
+
+
 def find_support_resistance(df: pd.DataFrame, window: int = 10, num_levels: int = 3) -> dict:
     """
     Find key support and resistance levels using pivot points.
@@ -204,63 +320,48 @@ def find_support_resistance(df: pd.DataFrame, window: int = 10, num_levels: int
             "price_near_level": False
         }
 
-    highs = df["High"].rolling(window=window, center=True).max()
-    lows = df["Low"].rolling(window=window, center=True).min()
-
-    # Find pivot highs (resistance) with touch count
-    resistance_levels = []
-    for i in range(window, len(df) - window):
-        if df["High"].iloc[i] == highs.iloc[i]:
-            level = float(df["High"].iloc[i])
-            # Count how many times price touched this level (within 1%)
-            touches = sum(abs(df["High"] - level) / level < 0.01)
-            resistance_levels.append({"price": level, "touches": touches, "index": i})
-
-    # Find pivot lows (support) with touch count
-    support_levels = []
-    for i in range(window, len(df) - window):
-        if df["Low"].iloc[i] == lows.iloc[i]:
-            level = float(df["Low"].iloc[i])
-            # Count how many times price touched this level (within 1%)
-            touches = sum(abs(df["Low"] - level) / level < 0.01)
-            support_levels.append({"price": level, "touches": touches, "index": i})
-
-    # Cluster nearby levels (within 2% of each other)
-    def cluster_levels_with_strength(levels, tolerance=0.02):
-        if not levels:
+    high = df["High"].to_numpy(dtype=float)
+    low = df["Low"].to_numpy(dtype=float)
+    roll_high = df["High"].rolling(window=window, center=True).max().to_numpy()
+    roll_low = df["Low"].rolling(window=window, center=True).min().to_numpy()
+    candidates = np.arange(len(df))[window:len(df) - window]
+
+    def levels_with_touches(prices, rolled):
+        # Pivot bars equal their centered rolling extreme
+        idx = candidates[prices[candidates] == rolled[candidates]]
+        levels = prices[idx]
+        # Touches: bars within 1% of the level, counted by binary search on
+        # the sorted prices instead of rescanning the frame per level
+        return levels, _count_within(np.sort(prices), levels, 0.01)
+
+    # Cluster nearby levels (within 2% of their sorted neighbour)
+    def cluster_levels_with_strength(levels, touches, tolerance=0.02):
+        if len(levels) == 0:
             return []
 
-        levels = sorted(levels, key=lambda x: x["price"])
-        clusters = []
-        current_cluster = [levels[0]]
-
-        for level in levels[1:]:
-            if abs(level["price"] - current_cluster[-1]["price"]) / current_cluster[-1]["price"] < tolerance:
-                current_cluster.append(level)
-            else:
-                # Average price and sum touches for strength
-                avg_price = sum(l["price"] for l in current_cluster) / len(current_cluster)
-                total_touches = sum(l["touches"] for l in current_cluster)
-                clusters.append({
-                    "price": avg_price,
-                    "touches": total_touches,
-                    "strength": min(100, total_touches * 20)  # Strength score 0-100
-                })
-                current_cluster = [level]
-
-        # Add last cluster
-        avg_price = sum(l["price"] for l in current_cluster) / len(current_cluster)
-        total_touches = sum(l["touches"] for l in current_cluster)
-        clusters.append({
-            "price": avg_price,
-            "touches": total_touches,
-            "strength": min(100, total_touches * 20)
-        })
-        return clusters
+        order = np.argsort(levels, kind="stable")
+        levels, touches = levels[order], touches[order]
+        new_cluster = ~(np.abs(np.diff(levels)) / levels[:-1] < tolerance)
+        ids = np.concatenate(([0], np.cumsum(new_cluster)))
+
+        counts = np.bincount(ids)
+        avg_prices = np.bincount(ids, weights=levels) / counts
+        total_touches = np.bincount(ids, weights=touches).astype(int)
+        return [
+            {
+                "price": float(price),
+                "touches": int(t),
+                "strength": min(100, int(t) * 20)  # Strength score 0-100
+            }
+            for price, t in zip(avg_prices, total_touches)
+        ]
+
+    resistance_levels = levels_with_touches(high, roll_high)
+    support_levels = levels_with_touches(low, roll_low)
 
     # Get clustered levels with strength
-    resistance_clusters = cluster_levels_with_strength(resistance_levels)
-    support_clusters = cluster_levels_with_strength(support_levels)
+    resistance_clusters = cluster_levels_with_strength(*resistance_levels)
+    support_clusters = cluster_levels_with_strength(*support_levels)
 
     # Get current price to filter relevant levels
     current_price = float(df["Close"].iloc[-1])
@@ -413,32 +514,138 @@ def find_pivot_points(df: pd.DataFrame, left_bars: int = 3, right_bars: int = 3)
         pivot_highs: list of {"bar": int, "price": float}  (chronological)
         pivot_lows:  list of {"bar": int, "price": float}  (chronological)
     """
-    n = len(df)
-    pivot_highs = []
-    pivot_lows  = []
+    highs = df["High"].to_numpy(dtype=float)
+    lows  = df["Low"].to_numpy(dtype=float)
+    n = len(highs)
+    width = left_bars + right_bars + 1
+    if n < width:
+        return {"pivot_highs": [], "pivot_lows": []}
+
+    # Bar i is a pivot when it equals the extreme of its own window
+    # [i-left_bars, i+right_bars]; ties count, NaN never qualifies.
+    centers = slice(left_bars, n - right_bars)
+    is_high = highs[centers] >= sliding_window_view(highs, width).max(axis=1)
+    is_low  = lows[centers] <= sliding_window_view(lows, width).min(axis=1)
+
+    pivot_highs = [{"bar": int(i) + left_bars, "price": float(highs[i + left_bars])}
+                   for i in np.flatnonzero(is_high)]
+    pivot_lows  = [{"bar": int(i) + left_bars, "price": float(lows[i + left_bars])}
+                   for i in np.flatnonzero(is_low)]
+
+    return {"pivot_highs": pivot_highs, "pivot_lows": pivot_lows}
 
-    highs = df["High"].values
-    lows  = df["Low"].values
 
-    for i in range(left_bars, n - right_bars):
-        h = highs[i]
-        lo = lows[i]
+# ---------------- Pattern Recognition ----------------
+PATTERN_PIVOT_BARS = 3  # left/right bars for the pivots every detector uses
 
-        # Pivot high: must be >= all bars in the window (allows ties on one side)
-        if (all(h >= highs[i - j] for j in range(1, left_bars + 1)) and
-                all(h >= highs[i + j] for j in range(1, right_bars + 1))):
-            pivot_highs.append({"bar": i, "price": float(h)})
 
-        # Pivot low: must be <= all bars in the window
-        if (all(lo <= lows[i - j] for j in range(1, left_bars + 1)) and
-                all(lo <= lows[i + j] for j in range(1, right_bars + 1))):
-            pivot_lows.append({"bar": i, "price": float(lo)})
+def _seg_max(values: np.ndarray) -> float:
+    """NaN-skipping max of a slice (NaN when empty or all-NaN), like Series.max()."""
+    if values.size == 0 or np.isnan(values).all():
+        return float("nan")
+    return float(np.nanmax(values))
 
-    return {"pivot_highs": pivot_highs, "pivot_lows": pivot_lows}
 
+def _seg_min(values: np.ndarray) -> float:
+    if values.size == 0 or np.isnan(values).all():
+        return float("nan")
+    return float(np.nanmin(values))
 
-# ---------------- Pattern Recognition ----------------
-def detect_bull_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
+
+def _seg_mean(values: np.ndarray) -> float:
+    """NaN-skipping mean of a slice, summed the same way as Series.mean()."""
+    mask = np.isnan(values)
+    count = values.size - int(mask.sum())
+    if count == 0:
+        return float("nan")
+    if mask.any():
+        values = np.where(mask, 0.0, values)
+    return float(values.sum() / count)
+
+
+class PatternWindow:
+    """
+    The last `lookback` bars of a PatternFrame, as array views.
+    Bars and pivot indices are relative to the window, exactly as if the
+    detector had run find_pivot_points() on df.tail(lookback).
+    """
+
+    def __init__(self, frame: "PatternFrame", start: int, end: int):
+        self.high = frame.high[start:end]
+        self.low = frame.low[start:end]
+        self.close = frame.close[start:end]
+        self.volume = frame.volume[start:end]
+        self.size = end - start
+
+        # A pivot needs PATTERN_PIVOT_BARS neighbours on both sides inside the window
+        k = PATTERN_PIVOT_BARS
+        self.pivot_highs = frame.pivots_between(frame.pivot_high_bars, frame.high, start, start + k, end - k)
+        self.pivot_lows = frame.pivots_between(frame.pivot_low_bars, frame.low, start, start + k, end - k)
+        self._volume_halves = None
+
+    def volume_halves(self) -> tuple[float, float]:
+        """Mean volume of the first and second half of the window (shared by the triangles)."""
+        if self._volume_halves is None:
+            mid = self.size // 2
+            self._volume_halves = (_seg_mean(self.volume[:mid]), _seg_mean(self.volume[mid:]))
+        return self._volume_halves
+
+
+class PatternFrame:
+    """
+    Shared precomputation for the pattern detectors: OHLCV as float arrays and
+    the 3/3 pivot highs/lows found once over the whole frame.
+
+    A bar's pivot status only depends on the bars around it, so a pivot found
+    on the full frame is also a pivot of any trailing window that contains
+    its neighbours. Each detector's df.tail(lookback) becomes a slice of these
+    arrays instead of a fresh DataFrame and a fresh pivot scan.
+
+    `end` limits the frame to its first `end` bars without recomputing, so the
+    backtester can walk one frame forward bar by bar.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.high = df["High"].to_numpy(dtype=float)
+        self.low = df["Low"].to_numpy(dtype=float)
+        self.close = df["Close"].to_numpy(dtype=float)
+        self.volume = df["Volume"].to_numpy(dtype=float)
+        self.end = len(self.close)
+
+        pivots = find_pivot_points(df, left_bars=PATTERN_PIVOT_BARS, right_bars=PATTERN_PIVOT_BARS)
+        self.pivot_high_bars = np.array([p["bar"] for p in pivots["pivot_highs"]], dtype=np.int64)
+        self.pivot_low_bars = np.array([p["bar"] for p in pivots["pivot_lows"]], dtype=np.int64)
+        self._windows = {}
+
+    def __len__(self) -> int:
+        return self.end
+
+    def at(self, end: int) -> "PatternFrame":
+        """This frame truncated to its first `end` bars (shares all arrays)."""
+        view = copy.copy(self)
+        view.end = end
+        view._windows = {}
+        return view
+
+    @staticmethod
+    def pivots_between(bars: np.ndarray, prices: np.ndarray, offset: int, lo: int, hi: int) -> list:
+        """Pivots with lo <= bar < hi, as {"bar", "price"} dicts relative to offset."""
+        first, last = np.searchsorted(bars, [lo, hi])
+        return [{"bar": int(b) - offset, "price": float(prices[b])} for b in bars[first:last]]
+
+    def window(self, lookback: int) -> PatternWindow:
+        """The trailing `lookback` bars (cached: several detectors share a lookback)."""
+        win = self._windows.get(lookback)
+        if win is None:
+            win = self._windows[lookback] = PatternWindow(self, self.end - lookback, self.end)
+        return win
+
+
+def _pattern_frame(df) -> PatternFrame:
+    return df if isinstance(df, PatternFrame) else PatternFrame(df)
+
+
+def detect_bull_flag(df: pd.DataFrame | PatternFrame, lookback: int = 40) -> dict:
     """
     Bull Flag: a pivot high (pole top) followed by a tight, slightly-downward
     consolidation channel before price breaks higher.
@@ -450,12 +657,12 @@ def detect_bull_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
          (< 8% of the pivot-high price) with no new pivot high.
       4. Volume should dry up during the flag.
     """
-    if len(df) < lookback:
+    frame = _pattern_frame(df)
+    if len(frame) < lookback:
         return {"detected": False}
 
-    recent = df.tail(lookback)
-    pivots = find_pivot_points(recent, left_bars=3, right_bars=3)
-    phs = pivots["pivot_highs"]
+    recent = frame.window(lookback)
+    phs = recent.pivot_highs
 
     if not phs:
         return {"detected": False}
@@ -466,17 +673,16 @@ def detect_bull_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
     pole_price = pole_top["price"]
 
     # Need at least 3 bars of pole and 5 bars of flag
-    if pole_bar < 3 or (len(recent) - 1 - pole_bar) < 5:
+    if pole_bar < 3 or (recent.size - 1 - pole_bar) < 5:
         return {"detected": False}
 
-    pole_start_price = float(recent["Close"].iloc[max(0, pole_bar - 5)])
+    pole_start_price = float(recent.close[max(0, pole_bar - 5)])
     initial_gain = (pole_price - pole_start_price) / pole_start_price if pole_start_price > 0 else 0
     strong_pole  = initial_gain >= 0.05
 
     # Flag = bars after the pivot high up to now
-    flag_bars = recent.iloc[pole_bar:]
-    flag_high  = float(flag_bars["High"].max())
-    flag_low   = float(flag_bars["Low"].min())
+    flag_high  = _seg_max(recent.high[pole_bar:])
+    flag_low   = _seg_min(recent.low[pole_bar:])
     flag_range = (flag_high - flag_low) / pole_price if pole_price > 0 else 1
 
     tight_flag = flag_range < 0.08
@@ -485,9 +691,8 @@ def detect_bull_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
     no_new_high = flag_high <= pole_price * 1.01
 
     # Volume dry-up during flag
-    pole_bars_slice = recent.iloc[max(0, pole_bar - 5):pole_bar + 1]
-    vol_pole = pole_bars_slice["Volume"].mean() if len(pole_bars_slice) > 0 else 1
-    vol_flag = flag_bars["Volume"].mean() if len(flag_bars) > 0 else vol_pole
+    vol_pole = _seg_mean(recent.volume[max(0, pole_bar - 5):pole_bar + 1])
+    vol_flag = _seg_mean(recent.volume[pole_bar:])
     volume_decrease = vol_flag < vol_pole * 0.85
 
     detected = strong_pole and tight_flag and no_new_high
@@ -506,7 +711,7 @@ def detect_bull_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
     }
 
 
-def detect_cup_and_handle(df: pd.DataFrame, lookback: int = 60) -> dict:
+def detect_cup_and_handle(df: pd.DataFrame | PatternFrame, lookback: int = 60) -> dict:
     """
     Cup and Handle: uses pivot points to find a real left-rim high, cup-bottom low,
     and right-rim recovery before a small handle pullback.
@@ -516,13 +721,13 @@ def detect_cup_and_handle(df: pd.DataFrame, lookback: int = 60) -> dict:
       3. Verify cup depth is 12–40%.
       4. The last 20% of bars form a tight handle (< 10% range).
     """
-    if len(df) < lookback:
+    frame = _pattern_frame(df)
+    if len(frame) < lookback:
         return {"detected": False}
 
-    recent = df.tail(lookback)
-    pivots = find_pivot_points(recent, left_bars=3, right_bars=3)
-    phs = pivots["pivot_highs"]
-    pls = pivots["pivot_lows"]
+    recent = frame.window(lookback)
+    phs = recent.pivot_highs
+    pls = recent.pivot_lows
 
     if len(phs) < 1 or len(pls) < 1:
         return {"detected": False}
@@ -544,18 +749,16 @@ def detect_cup_and_handle(df: pd.DataFrame, lookback: int = 60) -> dict:
     valid_depth = 0.12 <= cup_depth <= 0.40
 
     # Right side recovery: max high after cup bottom
-    right_slice = recent.iloc[bottom_bar:]
-    if right_slice.empty:
+    if bottom_bar >= recent.size:
         return {"detected": False}
-    right_high = float(right_slice["High"].max())
+    right_high = _seg_max(recent.high[bottom_bar:])
     recovery   = right_high >= left_price * 0.92
 
     # Handle: last 20% of bars should be tight (< 10% range)
-    handle_start = max(bottom_bar, len(recent) - max(5, lookback // 5))
-    handle_bars  = recent.iloc[handle_start:]
-    if handle_bars.empty:
+    handle_start = max(bottom_bar, recent.size - max(5, lookback // 5))
+    if handle_start >= recent.size:
         return {"detected": False}
-    handle_range = (float(handle_bars["High"].max()) - float(handle_bars["Low"].min())) / left_price
+    handle_range = (_seg_max(recent.high[handle_start:]) - _seg_min(recent.low[handle_start:])) / left_price
     small_handle = handle_range < 0.10
 
     detected = valid_depth and recovery and small_handle
@@ -573,7 +776,7 @@ def detect_cup_and_handle(df: pd.DataFrame, lookback: int = 60) -> dict:
     }
 
 
-def detect_double_bottom(df: pd.DataFrame, lookback: int = 50) -> dict:
+def detect_double_bottom(df: pd.DataFrame | PatternFrame, lookback: int = 50) -> dict:
     """
     Double Bottom: two real pivot lows at similar price levels separated by a
     meaningful bounce, with current price approaching or above the peak between them.
@@ -583,12 +786,12 @@ def detect_double_bottom(df: pd.DataFrame, lookback: int = 50) -> dict:
       3. Verify a meaningful peak (>= 5%) exists between the two lows.
       4. Breakout = current price > that peak.
     """
-    if len(df) < lookback:
+    frame = _pattern_frame(df)
+    if len(frame) < lookback:
         return {"detected": False}
 
-    recent = df.tail(lookback)
-    pivots = find_pivot_points(recent, left_bars=3, right_bars=3)
-    pls = pivots["pivot_lows"]
+    recent = frame.window(lookback)
+    pls = recent.pivot_lows
 
     if len(pls) < 2:
         return {"detected": False}
@@ -604,10 +807,7 @@ def detect_double_bottom(df: pd.DataFrame, lookback: int = 50) -> dict:
                 continue  # lows too different
 
             # Peak between them
-            between = recent.iloc[p1["bar"]:p2["bar"] + 1]
-            if between.empty:
-                continue
-            peak = float(between["High"].max())
+            peak = _seg_max(recent.high[p1["bar"]:p2["bar"] + 1])
             peak_height = (peak - min(p1["price"], p2["price"])) / min(p1["price"], p2["price"])
             if peak_height < 0.05:
                 continue  # no meaningful bounce
@@ -619,7 +819,7 @@ def detect_double_bottom(df: pd.DataFrame, lookback: int = 50) -> dict:
         return {"detected": False}
 
     similarity, p1, p2, peak = best
-    current_price = float(recent["Close"].iloc[-1])
+    current_price = float(recent.close[-1])
     breakout = current_price > peak * 1.005
 
     confidence = 65
@@ -634,7 +834,7 @@ def detect_double_bottom(df: pd.DataFrame, lookback: int = 50) -> dict:
     }
 
 
-def detect_ascending_triangle(df: pd.DataFrame, lookback: int = 50) -> dict:
+def detect_ascending_triangle(df: pd.DataFrame | PatternFrame, lookback: int = 50) -> dict:
     """
     Ascending Triangle: flat pivot highs (resistance) with progressively higher
     pivot lows (rising support).
@@ -644,13 +844,13 @@ def detect_ascending_triangle(df: pd.DataFrame, lookback: int = 50) -> dict:
       3. Confirm pivot lows are trending upward.
       4. Bonus: volume contraction.
     """
-    if len(df) < lookback:
+    frame = _pattern_frame(df)
+    if len(frame) < lookback:
         return {"detected": False}
 
-    recent = df.tail(lookback)
-    pivots = find_pivot_points(recent, left_bars=3, right_bars=3)
-    phs = pivots["pivot_highs"]
-    pls = pivots["pivot_lows"]
+    recent = frame.window(lookback)
+    phs = recent.pivot_highs
+    pls = recent.pivot_lows
 
     if len(phs) < 2 or len(pls) < 2:
         return {"detected": False}
@@ -665,9 +865,7 @@ def detect_ascending_triangle(df: pd.DataFrame, lookback: int = 50) -> dict:
     rising_lows = len(pl_prices) >= 2 and pl_prices[-1] > pl_prices[0] * 1.01
 
     # Volume contraction
-    mid = len(recent) // 2
-    vol_first  = recent.iloc[:mid]["Volume"].mean()
-    vol_second = recent.iloc[mid:]["Volume"].mean()
+    vol_first, vol_second = recent.volume_halves()
     volume_contraction = vol_second < vol_first
 
     detected = multiple_touches and rising_lows
@@ -688,7 +886,7 @@ def detect_ascending_triangle(df: pd.DataFrame, lookback: int = 50) -> dict:
     }
 
 
-def detect_bearish_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
+def detect_bearish_flag(df: pd.DataFrame | PatternFrame, lookback: int = 40) -> dict:
     """
     Bear Flag: a pivot low (pole bottom) followed by a tight, slightly-upward
     drift before price breaks lower again.
@@ -698,12 +896,12 @@ def detect_bearish_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
       3. After the pivot low, check tight consolidation (< 8%) with slight upward drift.
       4. Volume dries up during flag.
     """
-    if len(df) < lookback:
+    frame = _pattern_frame(df)
+    if len(frame) < lookback:
         return {"detected": False}
 
-    recent = df.tail(lookback)
-    pivots = find_pivot_points(recent, left_bars=3, right_bars=3)
-    pls = pivots["pivot_lows"]
+    recent = frame.window(lookback)
+    pls = recent.pivot_lows
 
     if not pls:
         return {"detected": False}
@@ -712,27 +910,26 @@ def detect_bearish_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
     pole_bar    = pole_bottom["bar"]
     pole_price  = pole_bottom["price"]
 
-    if pole_bar < 3 or (len(recent) - 1 - pole_bar) < 5:
+    if pole_bar < 3 or (recent.size - 1 - pole_bar) < 5:
         return {"detected": False}
 
-    pole_start_price = float(recent["Close"].iloc[max(0, pole_bar - 5)])
+    pole_start_price = float(recent.close[max(0, pole_bar - 5)])
     initial_drop = (pole_start_price - pole_price) / pole_start_price if pole_start_price > 0 else 0
     strong_pole  = initial_drop >= 0.05
 
-    flag_bars = recent.iloc[pole_bar:]
-    flag_high  = float(flag_bars["High"].max())
-    flag_low   = float(flag_bars["Low"].min())
+    flag_high  = _seg_max(recent.high[pole_bar:])
+    flag_low   = _seg_min(recent.low[pole_bar:])
     flag_range = (flag_high - flag_low) / pole_price if pole_price > 0 else 1
     tight_flag = flag_range < 0.08
 
     # Flag drifts slightly upward (bearish flag retraces up)
-    upward_drift = float(flag_bars["Close"].iloc[-1]) > float(flag_bars["Close"].iloc[0])
+    upward_drift = float(recent.close[-1]) > float(recent.close[pole_bar])
 
     # No new low below pole
     no_new_low = flag_low >= pole_price * 0.99
 
-    vol_pole = recent.iloc[max(0, pole_bar - 5):pole_bar + 1]["Volume"].mean()
-    vol_flag = flag_bars["Volume"].mean() if len(flag_bars) > 0 else vol_pole
+    vol_pole = _seg_mean(recent.volume[max(0, pole_bar - 5):pole_bar + 1])
+    vol_flag = _seg_mean(recent.volume[pole_bar:])
     volume_decrease = vol_flag < vol_pole * 0.85
 
     detected = strong_pole and tight_flag and upward_drift and no_new_low
@@ -751,7 +948,7 @@ def detect_bearish_flag(df: pd.DataFrame, lookback: int = 40) -> dict:
     }
 
 
-def detect_double_top(df: pd.DataFrame, lookback: int = 50) -> dict:
+def detect_double_top(df: pd.DataFrame | PatternFrame, lookback: int = 50) -> dict:
     """
     Double Top: two real pivot highs at similar price levels separated by a
     meaningful trough, with current price approaching or below that trough.
@@ -761,12 +958,12 @@ def detect_double_top(df: pd.DataFrame, lookback: int = 50) -> dict:
       3. Verify a meaningful trough (>= 5% drop) exists between them.
       4. Breakdown = current price < that trough.
     """
-    if len(df) < lookback:
+    frame = _pattern_frame(df)
+    if len(frame) < lookback:
         return {"detected": False}
 
-    recent = df.tail(lookback)
-    pivots = find_pivot_points(recent, left_bars=3, right_bars=3)
-    phs = pivots["pivot_highs"]
+    recent = frame.window(lookback)
+    phs = recent.pivot_highs
 
     if len(phs) < 2:
         return {"detected": False}
@@ -781,10 +978,7 @@ def detect_double_top(df: pd.DataFrame, lookback: int = 50) -> dict:
             if similarity >= 0.04:
                 continue
 
-            between = recent.iloc[p1["bar"]:p2["bar"] + 1]
-            if between.empty:
-                continue
-            trough = float(between["Low"].min())
+            trough = _seg_min(recent.low[p1["bar"]:p2["bar"] + 1])
             trough_depth = (max(p1["price"], p2["price"]) - trough) / max(p1["price"], p2["price"])
             if trough_depth < 0.05:
                 continue
@@ -796,7 +990,7 @@ def detect_double_top(df: pd.DataFrame, lookback: int = 50) -> dict:
         return {"detected": False}
 
     similarity, p1, p2, trough = best
-    current_price = float(recent["Close"].iloc[-1])
+    current_price = float(recent.close[-1])
     breakdown = current_price < trough * 0.995
 
     confidence = 65
@@ -811,7 +1005,7 @@ def detect_double_top(df: pd.DataFrame, lookback: int = 50) -> dict:
     }
 
 
-def detect_head_and_shoulders(df: pd.DataFrame, lookback: int = 60) -> dict:
+def detect_head_and_shoulders(df: pd.DataFrame | PatternFrame, lookback: int = 60) -> dict:
     """
     Head & Shoulders: three pivot highs where the middle (head) is highest,
     outer two (shoulders) are at similar levels, and price is near/below the neckline.
@@ -822,12 +1016,12 @@ def detect_head_and_shoulders(df: pd.DataFrame, lookback: int = 60) -> dict:
       4. Neckline = average of the two troughs between the peaks.
       5. Breakdown = price < neckline.
     """
-    if len(df) < lookback:
+    frame = _pattern_frame(df)
+    if len(frame) < lookback:
         return {"detected": False}
 
-    recent = df.tail(lookback)
-    pivots = find_pivot_points(recent, left_bars=3, right_bars=3)
-    phs = pivots["pivot_highs"]
+    recent = frame.window(lookback)
+    phs = recent.pivot_highs
 
     if len(phs) < 3:
         return {"detected": False}
@@ -844,8 +1038,8 @@ def detect_head_and_shoulders(df: pd.DataFrame, lookback: int = 60) -> dict:
             continue
 
         # Neckline from troughs between peaks
-        left_trough  = float(recent.iloc[ls["bar"]:head["bar"] + 1]["Low"].min())
-        right_trough = float(recent.iloc[head["bar"]:rs["bar"] + 1]["Low"].min())
+        left_trough  = _seg_min(recent.low[ls["bar"]:head["bar"] + 1])
+        right_trough = _seg_min(recent.low[head["bar"]:rs["bar"] + 1])
         neckline = (left_trough + right_trough) / 2
 
         if best is None or shoulder_sim < best[0]:
@@ -855,7 +1049,7 @@ def detect_head_and_shoulders(df: pd.DataFrame, lookback: int = 60) -> dict:
         return {"detected": False}
 
     shoulder_sim, ls, head, rs, neckline = best
-    current_price = float(recent["Close"].iloc[-1])
+    current_price = float(recent.close[-1])
     near_neckline = current_price <= neckline * 1.04
     breakdown     = current_price < neckline * 0.99
 
@@ -875,7 +1069,7 @@ def detect_head_and_shoulders(df: pd.DataFrame, lookback: int = 60) -> dict:
     }
 
 
-def detect_descending_triangle(df: pd.DataFrame, lookback: int = 50) -> dict:
+def detect_descending_triangle(df: pd.DataFrame | PatternFrame, lookback: int = 50) -> dict:
     """
     Descending Triangle: flat pivot lows (support zone) with progressively lower
     pivot highs (declining resistance).
@@ -885,13 +1079,13 @@ def detect_descending_triangle(df: pd.DataFrame, lookback: int = 50) -> dict:
       3. Confirm pivot highs are trending downward.
       4. Bonus: volume contraction.
     """
-    if len(df) < lookback:
+    frame = _pattern_frame(df)
+    if len(frame) < lookback:
         return {"detected": False}
 
-    recent = df.tail(lookback)
-    pivots = find_pivot_points(recent, left_bars=3, right_bars=3)
-    phs = pivots["pivot_highs"]
-    pls = pivots["pivot_lows"]
+    recent = frame.window(lookback)
+    phs = recent.pivot_highs
+    pls = recent.pivot_lows
 
     if len(pls) < 2 or len(phs) < 2:
         return {"detected": False}
@@ -905,9 +1099,7 @@ def detect_descending_triangle(df: pd.DataFrame, lookback: int = 50) -> dict:
     ph_prices = [p["price"] for p in phs]
     declining_highs = len(ph_prices) >= 2 and ph_prices[-1] < ph_prices[0] * 0.99
 
-    mid = len(recent) // 2
-    vol_first  = recent.iloc[:mid]["Volume"].mean()
-    vol_second = recent.iloc[mid:]["Volume"].mean()
+    vol_first, vol_second = recent.volume_halves()
     volume_contraction = vol_second < vol_first
 
     detected = multiple_touches and declining_highs
@@ -927,14 +1119,18 @@ def detect_descending_triangle(df: pd.DataFrame, lookback: int = 50) -> dict:
     }
 
 
-def detect_patterns(df: pd.DataFrame) -> list:
+def detect_patterns(df: pd.DataFrame | PatternFrame) -> list:
     """
     Detect all chart patterns (bullish and bearish) and return sorted by confidence.
+
+    Pivots and OHLCV arrays are built once (PatternFrame) and shared by all
+    eight detectors; pass a PatternFrame to reuse it across calls.
     """
+    frame = _pattern_frame(df)
     patterns = []
 
     # ── Bullish patterns ────────────────────────────────────────────────────
-    bull_flag = detect_bull_flag(df, lookback=20)
+    bull_flag = detect_bull_flag(frame, lookback=20)
     if bull_flag["detected"]:
         patterns.append({
             "type": "Bull Flag",
@@ -944,7 +1140,7 @@ def detect_patterns(df: pd.DataFrame) -> list:
             "action": "Buy breakout above consolidation high with volume",
         })
 
-    cup_handle = detect_cup_and_handle(df, lookback=40)
+    cup_handle = detect_cup_and_handle(frame, lookback=40)
     if cup_handle["detected"]:
         patterns.append({
             "type": "Cup and Handle",
@@ -954,7 +1150,7 @@ def detect_patterns(df: pd.DataFrame) -> list:
             "action": "Buy breakout above handle high",
         })
 
-    double_bottom = detect_double_bottom(df, lookback=30)
+    double_bottom = detect_double_bottom(frame, lookback=30)
     if double_bottom["detected"]:
         patterns.append({
             "type": "Double Bottom",
@@ -964,7 +1160,7 @@ def detect_patterns(df: pd.DataFrame) -> list:
             "action": "Buy breakout above middle peak" if not double_bottom["breakout"] else "Already breaking out!",
         })
 
-    asc_triangle = detect_ascending_triangle(df, lookback=30)
+    asc_triangle = detect_ascending_triangle(frame, lookback=30)
     if asc_triangle["detected"]:
         patterns.append({
             "type": "Ascending Triangle",
@@ -975,7 +1171,7 @@ def detect_patterns(df: pd.DataFrame) -> list:
         })
 
     # ── Bearish patterns ────────────────────────────────────────────────────
-    bear_flag = detect_bearish_flag(df, lookback=20)
+    bear_flag = detect_bearish_flag(frame, lookback=20)
     if bear_flag["detected"]:
         patterns.append({
             "type": "Bear Flag",
@@ -985,7 +1181,7 @@ def detect_patterns(df: pd.DataFrame) -> list:
             "action": "Avoid long — breakdown below consolidation low targets further downside",
         })
 
-    double_top = detect_double_top(df, lookback=30)
+    double_top = detect_double_top(frame, lookback=30)
     if double_top["detected"]:
         patterns.append({
             "type": "Double Top",
@@ -995,7 +1191,7 @@ def detect_patterns(df: pd.DataFrame) -> list:
             "action": "Avoid long — breakdown below trough confirms reversal" if not double_top["breakdown"] else "Already breaking down!",
         })
 
-    hs = detect_head_and_shoulders(df, lookback=40)
+    hs = detect_head_and_shoulders(frame, lookback=40)
     if hs["detected"]:
         patterns.append({
             "type": "Head & Shoulders",
@@ -1005,7 +1201,7 @@ def detect_patterns(df: pd.DataFrame) -> list:
             "action": "Avoid long — break below neckline signals trend reversal" if not hs["breakdown"] else "Neckline broken — high risk!",
         })
 
-    desc_triangle = detect_descending_triangle(df, lookback=30)
+    desc_triangle = detect_descending_triangle(frame, lookback=30)
     if desc_triangle["detected"]:
         patterns.append({
             "type": "Descending Triangle",
@@ -1020,6 +1216,48 @@ def detect_patterns(df: pd.DataFrame) -> list:
     return patterns
 
 
+
+class PatternTracker:
+    """
+    detect_patterns() walked forward through one frame, bar by bar, for the
+    backtester.
+
+    Pivot state is built once for the whole history (PatternFrame). A pivot
+    at bar g is only visible from bar g + PATTERN_PIVOT_BARS on, when it
+    would have been confirmed live, so there is no lookahead: patterns_at(i)
+    equals detect_patterns() on any slice ending at bar i that holds at least
+    the longest detector lookback (40 bars), e.g. df.iloc[i - 59:i + 1].
+
+    Only the pivot state is incremental. The eight detectors still run in
+    full on every bar (over the pivots in their lookback window), so the
+    saving is the per-slice pivot search, not the pattern checks; results
+    are cached for the last bar asked for only.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.frame = PatternFrame(df)
+        self._bar = None
+        self._patterns = []
+
+    def patterns_at(self, i: int) -> list:
+        """All patterns on the chart as of the close of bar i (sorted by confidence)."""
+        if i != self._bar:
+            self._patterns = detect_patterns(self.frame.at(i + 1))
+            self._bar = i
+        return self._patterns
+
+    def top_at(self, i: int) -> tuple[str, int]:
+        """(pattern type, confidence) of the strongest pattern at bar i, or ("None", 0)."""
+        patterns = self.patterns_at(i)
+        if not patterns:
+            return "None", 0
+        return patterns[0]["type"], patterns[0]["confidence"]
+
+    def labels(self, start: int = 0):
+        """Yield (bar, pattern type, confidence) for every bar from `start` on."""
+        for i in range(start, len(self.frame)):
+            yield (i, *self.top_at(i))
+
 # ---------------- Gap Detection ----------------
 def detect_gaps(df: pd.DataFrame, min_gap_pct: float = 2.0, lookback: int = 60) -> dict:
     """
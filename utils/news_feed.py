@@ -6,12 +6,13 @@ NOTE: News API requires Tiingo News add-on ($10/mo) not included in Power Plan.
       Functions will fail gracefully with helpful messages if not available.
 """
 
-import requests
 import pandas as pd
 import streamlit as st
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
 
+from utils import http_client
+
 
 @st.cache_data(ttl=300, show_spinner=False)  # Cache for 5 minutes
 def get_news_for_ticker(ticker: str, token: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -27,7 +28,7 @@ def get_news_for_ticker(ticker: str, token: str, limit: int = 10) -> List[Dict[s
             "sortBy": "publishedDate"
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_client.get(url, headers=headers, params=params, timeout=10)
 
         # Handle 403 Forbidden (News API not available in Power Plan)
         if response.status_code == 403:
@@ -60,7 +61,7 @@ def get_news_for_watchlist(tickers: List[str], token: str, limit: int = 50) -> L
             "sortBy": "publishedDate"
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_client.get(url, headers=headers, params=params, timeout=10)
 
         # Handle 403 Forbidden (News API not available in Power Plan)
         if response.status_code == 403:
@@ -0,0 +1,156 @@
+"""
+Portfolio-level replay of backtest trades under account constraints.
+
+backtest_strategy scores every ticker independently, as if capital were
+unlimited. This replays the same signals through one account: trades from
+all tickers merge into a single date-ordered event heap, each entry is sized
+with calc_position_size() at the configured risk %, and entries are skipped
+while max_positions are open or cash runs out. Open positions are marked to
+market daily to give equity, exposure and drawdown series comparable with
+the portfolio settings page.
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from utils.portfolio_settings import calc_position_size
+
+# Event kinds; exits sort first so a slot freed today can be reused today
+EXIT, ENTRY = 0, 1
+TRADING_DAYS = 252
+
+
+def close_panel(history: dict, tickers: list, start=None) -> pd.DataFrame:
+    """Date × ticker closes on the union calendar, forward-filled across gaps."""
+    series = {
+        t: history[t].set_index(pd.to_datetime(history[t]["Date"]))["Close"].astype(float)
+        for t in tickers if history.get(t) is not None
+    }
+    if not series:
+        return pd.DataFrame()
+    panel = pd.DataFrame(series).sort_index().ffill()
+    if start is not None:
+        panel = panel[panel.index >= pd.Timestamp(start)]
+    return panel
+
+
+def simulate_portfolio(trades: pd.DataFrame, closes: pd.DataFrame, account_value: float,
+                       risk_pct: float, max_positions: int) -> dict:
+    """
+    Replay `trades` (ticker, entry/exit date and price, stop_price and
+    optionally pattern_confidence) through one account.
+
+    Same-day entries compete for free slots by pattern confidence, then in
+    input order. Each is sized on current equity (cash + open positions at
+    today's close) and capped by available cash.
+
+    Returns daily `equity`, `exposure` (% of equity invested), `drawdown` (%)
+    and `positions` (open count) series, the `executed` trades with shares
+    and dollar P&L, and a `stats` dict.
+    """
+    calendar = closes.index
+    if trades.empty or calendar.empty:
+        return {}
+
+    # ── Precomputed signal arrays ───────────────────────────────────────
+    ticker_col = {t: k for k, t in enumerate(closes.columns)}
+    keep = trades["ticker"].isin(ticker_col).to_numpy()
+    trades = trades[keep].reset_index(drop=True)
+    entry_day = calendar.searchsorted(pd.to_datetime(trades["entry_date"]).to_numpy())
+    exit_day = calendar.searchsorted(pd.to_datetime(trades["exit_date"]).to_numpy())
+    col = trades["ticker"].map(ticker_col).to_numpy()
+    entry_px = trades["entry_price"].to_numpy(dtype=float)
+    exit_px = trades["exit_price"].to_numpy(dtype=float)
+    stop_px = trades["stop_price"].to_numpy(dtype=float)
+    priority = (trades["pattern_confidence"].fillna(0).to_numpy(dtype=float)
+                if "pattern_confidence" in trades else np.zeros(len(trades)))
+    prices = closes.to_numpy(dtype=float)
+
+    valid = (entry_day < len(calendar)) & (exit_day < len(calendar)) & np.isfinite(exit_px)
+    heap = [(int(entry_day[k]), ENTRY, -priority[k], k) for k in np.flatnonzero(valid)]
+    heapq.heapify(heap)
+
+    # ── Event loop ──────────────────────────────────────────────────────
+    cash = float(account_value)
+    open_shares = {}  # trade index -> shares
+    shares = np.zeros(len(trades), dtype=np.int64)
+    skipped_full = skipped_size = 0
+
+    while heap:
+        day, kind, _, k = heapq.heappop(heap)
+        if kind == EXIT:
+            cash += open_shares.pop(k) * exit_px[k]
+            continue
+
+        if len(open_shares) >= max_positions:
+            skipped_full += 1
+            continue
+        equity = cash + sum(n * prices[day, col[j]] for j, n in open_shares.items())
+        size = calc_position_size(equity, risk_pct, entry_px[k], stop_px[k])
+        n = min(size.get("shares", 0), int(cash // entry_px[k]) if entry_px[k] > 0 else 0)
+        if n <= 0:
+            skipped_size += 1
+            continue
+
+        cash -= n * entry_px[k]
+        open_shares[k] = n
+        shares[k] = n
+        heapq.heappush(heap, (int(exit_day[k]), EXIT, 0.0, k))
+
+    # ── Daily series (holdings and cash rebuilt from the fills) ─────────
+    filled = np.flatnonzero(shares)
+    days, n_cols = len(calendar), len(closes.columns)
+    holdings = np.zeros((days + 1, n_cols))
+    np.add.at(holdings, (entry_day[filled], col[filled]), shares[filled])
+    np.add.at(holdings, (exit_day[filled], col[filled]), -shares[filled])
+    holdings = holdings[:days].cumsum(axis=0)
+
+    cash_flow = np.zeros(days + 1)
+    np.add.at(cash_flow, entry_day[filled], -shares[filled] * entry_px[filled])
+    np.add.at(cash_flow, exit_day[filled], shares[filled] * exit_px[filled])
+    cash_series = account_value + cash_flow[:days].cumsum()
+
+    invested = np.nansum(holdings * prices, axis=1)
+    equity = cash_series + invested
+    peak = np.maximum.accumulate(equity)
+    open_count = np.zeros(days + 1, dtype=np.int64)
+    np.add.at(open_count, entry_day[filled], 1)
+    np.add.at(open_count, exit_day[filled], -1)
+
+    equity_s = pd.Series(equity, index=calendar, name="equity")
+    exposure_s = pd.Series(invested / equity * 100, index=calendar, name="exposure")
+    drawdown_s = pd.Series((equity / peak - 1) * 100, index=calendar, name="drawdown")
+    positions_s = pd.Series(open_count[:days].cumsum(), index=calendar, name="positions")
+
+    executed = trades.iloc[filled].copy()
+    executed["shares"] = shares[filled]
+    executed["dollar_pnl"] = shares[filled] * (exit_px[filled] - entry_px[filled])
+
+    daily_ret = equity_s.pct_change().dropna()
+    years = max((calendar[-1] - calendar[0]).days / 365.25, 1 / 365.25)
+    total_return = equity[-1] / account_value - 1
+    stats = {
+        "start_value": float(account_value),
+        "end_value": float(equity[-1]),
+        "total_return": total_return * 100,
+        "cagr": ((equity[-1] / account_value) ** (1 / years) - 1) * 100 if equity[-1] > 0 else -100.0,
+        "max_drawdown": float(drawdown_s.min()),
+        "avg_exposure": float(exposure_s.mean()),
+        "sharpe": float(daily_ret.mean() / daily_ret.std() * np.sqrt(TRADING_DAYS))
+                  if daily_ret.std() > 0 else 0.0,
+        "trades_taken": int(len(filled)),
+        "skipped_max_positions": skipped_full,
+        "skipped_size": skipped_size,
+        "win_rate": float((executed["dollar_pnl"] > 0).mean() * 100) if len(filled) else 0.0,
+    }
+
+    return {
+        "equity": equity_s,
+        "exposure": exposure_s,
+        "drawdown": drawdown_s,
+        "positions": positions_s,
+        "executed": executed,
+        "stats": stats,
+    }
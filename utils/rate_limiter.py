@@ -1,168 +1,215 @@
 """
-Rate Limiter for Tiingo API
-Prevents hitting API rate limits (50 requests per minute for Power Plan)
+Adaptive rate limiting for outbound API calls.
+
+Every provider (Tiingo, Yahoo, GitHub Gist, Anthropic) gets its own token
+bucket. Buckets are enforced inside utils.http_client and utils.fetch_engine,
+so callers never sleep on their own:
+  - a request takes one token; when the bucket is empty the caller waits
+    exactly as long as the refill needs (no fixed pauses)
+  - a 429 halves the provider's rate and pushes its schedule back by the
+    server's Retry-After (or one interval when none is sent)
+  - every successful response nudges the rate back up toward the budget
+
+Thread-safe (one lock per bucket, never held while sleeping) and usable from
+asyncio via acquire_async(). Streamlit is only imported for the sidebar
+widget, so check_alerts.py can use this from GitHub Actions.
+
+Usage:
+    from utils.rate_limiter import get_bucket
+    bucket = get_bucket("yahoo")
+    bucket.acquire()
+    ...
+    bucket.observe(status_code, headers)
 """
 
+import asyncio
+import threading
 import time
-from collections import deque
-from datetime import datetime, timedelta
-from typing import Optional
-import streamlit as st
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-
-class RateLimiter:
+# Requests per second and burst size per provider. These are starting
+# points: the buckets slow down on 429s and recover on success.
+PROVIDER_BUDGETS = {
+    "tiingo":    {"rate": 20.0, "burst": 40},
+    "yahoo":     {"rate": 5.0,  "burst": 5},
+    "github":    {"rate": 1.0,  "burst": 5},
+    "anthropic": {"rate": 0.8,  "burst": 2},
+}
+
+# Host suffix → provider; hosts not listed here are not rate limited
+PROVIDER_HOSTS = {
+    "tiingo.com": "tiingo",
+    "yahoo.com": "yahoo",
+    "github.com": "github",
+    "anthropic.com": "anthropic",
+}
+
+THROTTLE_DECREASE = 0.5   # rate multiplier applied on each 429
+RECOVERY_STEP = 0.02      # fraction of the budget regained per success
+MIN_RATE_FRACTION = 0.05  # never slow below 5% of the budget
+THROTTLE_COOLDOWN = 1.0   # 429s within this many seconds count as one event
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
     """
-    Sliding window rate limiter for API calls.
-    Tracks requests in a time window and blocks when limit is reached.
+    Token bucket with AIMD rate adaptation.
+    Tokens may go negative: each caller reserves its slot up front and sleeps
+    outside the lock until that slot comes due.
     """
-    
-    def __init__(self, max_requests: int = 50, window_seconds: int = 60):
-        """
-        Initialize rate limiter.
-        
-        Args:
-            max_requests: Maximum number of requests allowed in the window
-            window_seconds: Time window in seconds (default: 60 seconds)
-        """
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self.requests = deque()  # Store timestamps of requests
-        
-        logger.info(f"Rate limiter initialized: {max_requests} requests per {window_seconds}s")
-    
-    def _clean_old_requests(self):
-        """Remove requests older than the time window."""
-        cutoff_time = time.time() - self.window_seconds
-        
-        # Remove old timestamps from the left of deque
-        while self.requests and self.requests[0] < cutoff_time:
-            self.requests.popleft()
-    
-    def get_remaining_requests(self) -> int:
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.max_rate = float(rate)
+        self.min_rate = self.max_rate * MIN_RATE_FRACTION
+        self.rate = self.max_rate
+        self.burst = burst
+        self.throttled = 0  # 429s seen since startup
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._last_throttle = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take one token; return how many seconds to wait before sending."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block the calling thread until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Await until a request may be sent without blocking the event loop."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def throttle(self, retry_after: float | None = None) -> None:
         """
-        Get number of remaining requests available in current window.
-        
-        Returns:
-            Number of requests remaining
+        Back off after a 429: halve the rate and push the schedule back.
+        Concurrent requests tend to hit 429 together, so only the first one in
+        a THROTTLE_COOLDOWN window cuts the rate.
         """
-        self._clean_old_requests()
-        remaining = self.max_requests - len(self.requests)
-        return max(0, remaining)
-    
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now - self._last_throttle >= THROTTLE_COOLDOWN:
+                self.rate = max(self.min_rate, self.rate * THROTTLE_DECREASE)
+                self._last_throttle = now
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._tokens = min(self._tokens, -pause * self.rate)
+            self.throttled += 1
+        logger.warning(
+            f"{self.name} throttled (429): rate now {self.rate:.2f} req/s, pausing {pause:.1f}s"
+        )
+
+    def recover(self) -> None:
+        """Additive increase after a successful response."""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+    def observe(self, status_code: int, headers=None) -> bool:
+        """Feed a response back into the bucket. Returns True if it was a 429."""
+        if status_code == 429:
+            self.throttle(parse_retry_after((headers or {}).get("Retry-After")))
+            return True
+        self.recover()
+        return False
+
     def get_wait_time(self) -> float:
-        """
-        Get time to wait (in seconds) before next request is allowed.
-        
-        Returns:
-            Seconds to wait (0 if request can be made immediately)
-        """
-        self._clean_old_requests()
-        
-        if len(self.requests) < self.max_requests:
-            return 0.0
-        
-        # Need to wait until oldest request expires
-        oldest_request = self.requests[0]
-        wait_time = (oldest_request + self.window_seconds) - time.time()
-        return max(0.0, wait_time)
-    
-    def wait_if_needed(self, show_progress: bool = False) -> None:
-        """
-        Block execution if rate limit is reached.
+        """Seconds until the next request could be sent (without reserving)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
 
-        Args:
-            show_progress: Whether to show a progress bar while waiting
-        """
-        wait_time = self.get_wait_time()
-
-        # Only wait if we're REALLY over the limit (not just close)
-        if wait_time > 0.5:  # Only wait if need to wait more than 500ms
-            logger.warning(f"Rate limit reached. Waiting {wait_time:.1f}s...")
-
-            if show_progress:
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-
-                start_time = time.time()
-                while time.time() - start_time < wait_time:
-                    elapsed = time.time() - start_time
-                    progress = elapsed / wait_time
-                    remaining = wait_time - elapsed
-
-                    progress_bar.progress(min(progress, 1.0))
-                    status_text.text(f"⏳ Rate limit reached. Waiting {remaining:.1f}s...")
-                    time.sleep(0.1)
-
-                progress_bar.empty()
-                status_text.empty()
-            else:
-                time.sleep(wait_time)
-        # If wait time is small (<500ms), just skip it for speed
-    
-    def record_request(self) -> None:
-        """Record that a request was made."""
-        self.requests.append(time.time())
-        logger.debug(f"Request recorded. {self.get_remaining_requests()} remaining.")
-    
-    def reset(self) -> None:
-        """Clear all recorded requests."""
-        self.requests.clear()
-        logger.info("Rate limiter reset")
-    
     def get_stats(self) -> dict:
-        """
-        Get current rate limiter statistics.
-        
-        Returns:
-            Dictionary with stats
-        """
-        self._clean_old_requests()
-        
         return {
-            "requests_made": len(self.requests),
-            "requests_remaining": self.get_remaining_requests(),
-            "max_requests": self.max_requests,
-            "window_seconds": self.window_seconds,
+            "provider": self.name,
+            "rate": self.rate,
+            "max_rate": self.max_rate,
+            "burst": self.burst,
+            "throttled": self.throttled,
             "wait_time": self.get_wait_time(),
-            "utilization_pct": (len(self.requests) / self.max_requests) * 100
         }
 
 
-# Global rate limiter instance for Tiingo API
-# Power Plan: 50 requests per minute
-tiingo_limiter = RateLimiter(max_requests=50, window_seconds=60)
+_buckets = {name: TokenBucket(name, **budget) for name, budget in PROVIDER_BUDGETS.items()}
+
+
+def get_bucket(provider: str) -> TokenBucket:
+    """Return the process-wide bucket for a provider in PROVIDER_BUDGETS."""
+    return _buckets[provider]
+
 
+def bucket_for_url(url: str) -> TokenBucket | None:
+    """Bucket governing a URL's host, or None for unlimited hosts."""
+    host = (urlsplit(url).hostname or "").lower()
+    for suffix, provider in PROVIDER_HOSTS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return _buckets[provider]
+    return None
 
-def get_tiingo_limiter() -> RateLimiter:
+
+# Kept for existing imports
+tiingo_limiter = get_bucket("tiingo")
+
+
+def get_tiingo_limiter() -> TokenBucket:
     """Get the global Tiingo rate limiter instance."""
     return tiingo_limiter
 
 
 def show_rate_limit_status():
     """Display rate limit status in Streamlit sidebar."""
+    import streamlit as st
+
     stats = tiingo_limiter.get_stats()
-    
-    remaining = stats["requests_remaining"]
-    total = stats["max_requests"]
-    utilization = stats["utilization_pct"]
-    
-    # Color code based on utilization
-    if utilization < 50:
-        color = "🟢"
-        status = "Good"
-    elif utilization < 80:
+
+    if stats["wait_time"] > 1:
+        color = "🔴"
+        status = "Throttled"
+    elif stats["rate"] < stats["max_rate"]:
         color = "🟡"
-        status = "Moderate"
+        status = "Backing off"
     else:
-        color = "🔴"
-        status = "High"
-    
+        color = "🟢"
+        status = "Good"
+
     st.sidebar.markdown(f"**API Rate Limit:** {color} {status}")
-    st.sidebar.caption(f"{remaining}/{total} requests remaining")
-    
-    if stats["wait_time"] > 0:
-        st.sidebar.warning(f"⏳ Cooldown: {stats['wait_time']:.0f}s")
+    st.sidebar.caption(f"Tiingo {stats['rate']:.1f}/{stats['max_rate']:.0f} req/s")
 
+    if stats["wait_time"] > 1:
+        st.sidebar.warning(f"⏳ Cooldown: {stats['wait_time']:.0f}s")
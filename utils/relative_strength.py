@@ -7,7 +7,7 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 from typing import List, Dict, Any
-from utils.tiingo_api import tiingo_history
+from utils.tiingo_api import tiingo_history, tiingo_history_many
 
 
 @st.cache_data(ttl=3600, show_spinner=False)
@@ -87,8 +87,10 @@ def rank_watchlist_by_strength(watchlist: List[str], token: str, period: int = 6
     """
     Rank all watchlist stocks by relative strength.
     """
-    # Get SPY data
-    spy_df = tiingo_history("SPY", token, period + 10)
+    # Load SPY and the whole watchlist concurrently; the per-ticker lookups
+    # below are then served from the bar store without a network call.
+    history = tiingo_history_many(["SPY", *watchlist], token, period + 10)
+    spy_df = history.get("SPY")
     
     if spy_df is None:
         return []
@@ -0,0 +1,153 @@
+"""
+Robustness checks for backtest results: bootstrap Monte Carlo over trade
+R-multiples and walk-forward selection over a parameter grid.
+
+Everything here is plain NumPy on arrays of trades, so 10,000 resamples of a
+few thousand trades run interactively from the backtest page. Fetching and
+simulating the trades themselves lives in utils.backtesting.
+"""
+
+import numpy as np
+
+MC_SIMULATIONS = 10_000
+MC_CHUNK = 1_000          # simulations resampled per block (bounds memory)
+MC_CURVE_POINTS = 200     # trade steps kept for the equity-curve percentiles
+MC_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+# ---------------- Monte Carlo ----------------
+def bootstrap_equity(r_multiples, risk_pct: float = 1.0, n_sims: int = MC_SIMULATIONS,
+                     percentiles: tuple = MC_PERCENTILES, seed: int | None = None) -> dict:
+    """
+    Resample the trade sequence with replacement and compound each path at
+    `risk_pct`% of equity risked per trade (1R = risk_pct% of the account).
+
+    Returns:
+        steps           — trade numbers the curve percentiles are sampled at
+        curves          — {pct: equity return % at each step}
+        final_return    — per-simulation total return %
+        max_drawdown    — per-simulation max peak-to-trough drawdown %
+        prob_loss       — share of simulations ending below the start
+    Empty dict when there are no finite R-multiples.
+    """
+    r = np.asarray(r_multiples, dtype=float)
+    r = r[np.isfinite(r)]
+    n = len(r)
+    if n == 0 or n_sims < 1:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    # Work in log equity (float32): compounding becomes a cumulative sum and
+    # drawdown a difference from the running peak. A loss of the whole
+    # account is clipped to near-zero equity.
+    growth = np.maximum(1.0 + r * (risk_pct / 100.0), 1e-12)
+    log_growth = np.log(growth).astype(np.float32)
+    steps = np.unique(np.linspace(0, n, min(n, MC_CURVE_POINTS) + 1).astype(np.int64))
+
+    final = np.empty(n_sims)
+    max_dd = np.empty(n_sims)
+    sampled = np.empty((n_sims, len(steps)), dtype=np.float32)
+    log_equity = np.zeros((MC_CHUNK, n + 1), dtype=np.float32)
+    below_peak = np.empty_like(log_equity)
+    for start in range(0, n_sims, MC_CHUNK):
+        size = min(MC_CHUNK, n_sims - start)
+        eq, dd = log_equity[:size], below_peak[:size]
+        draws = rng.integers(0, n, size=(size, n), dtype=np.int32)
+        np.cumsum(log_growth[draws], axis=1, out=eq[:, 1:])
+        np.maximum.accumulate(eq, axis=1, out=dd)
+        np.subtract(dd, eq, out=dd)
+        final[start:start + size] = eq[:, -1]
+        max_dd[start:start + size] = dd.max(axis=1)
+        sampled[start:start + size] = eq[:, steps]
+
+    curve_pcts = np.percentile(sampled, percentiles, axis=0).astype(float)
+    return {
+        "steps": steps,
+        "curves": {p: np.expm1(curve_pcts[k]) * 100 for k, p in enumerate(percentiles)},
+        "final_return": np.expm1(final) * 100,
+        "max_drawdown": -np.expm1(-max_dd) * 100,
+        "prob_loss": float((final < 0).mean()),
+    }
+
+
+# ---------------- Walk-Forward ----------------
+def _train_sums(day: np.ndarray, exit_day: np.ndarray, values: np.ndarray,
+                lo: np.ndarray, hi: np.ndarray) -> tuple:
+    """
+    Trade count and value sum for each (lo, hi) window, counting only trades
+    entered at lo <= day < hi that also exited before hi. `day` must be sorted.
+    """
+    a = np.searchsorted(day, lo)
+    b = np.searchsorted(day, hi)
+    counts = np.zeros(len(lo), dtype=np.int64)
+    sums = np.zeros(len(lo))
+    for f in range(len(lo)):
+        closed = exit_day[a[f]:b[f]] < hi[f]
+        counts[f] = closed.sum()
+        sums[f] = values[a[f]:b[f]][closed].sum()
+    return counts, sums
+
+
+def walk_forward_folds(trades: list, train_days: int, test_days: int, min_trades: int = 10) -> list:
+    """
+    Rolling train/test evaluation of a parameter grid.
+
+    `trades` holds one dict of equal-length arrays per parameter combination
+    (entry "day" and "exit_day" as integer day numbers, "pnl", "r_multiple").
+    For each fold the combination with the best train-window expectancy (at
+    least `min_trades` trades) is picked, then scored on the following test
+    window it never saw. A trade only counts toward training once it has
+    exited: one entered near the end of the train window that exits inside
+    the test window is left out, so no test-period P&L leaks into the pick.
+    Folds advance by `test_days`.
+
+    Returns one dict per fold: train/test bounds, chosen combination index,
+    in-sample and out-of-sample trade count, expectancy and avg R, and
+    "oos": the combination's arrays sliced to the test window.
+    """
+    ordered = []
+    for t in trades:
+        keep = np.isfinite(t["pnl"]) & np.isfinite(t["r_multiple"])
+        order = np.argsort(t["day"][keep], kind="stable")
+        ordered.append({k: np.asarray(v)[keep][order] for k, v in t.items()})
+
+    all_days = np.concatenate([t["day"] for t in ordered]) if ordered else np.empty(0)
+    if len(all_days) == 0:
+        return []
+    first, last = int(all_days.min()), int(all_days.max())
+    train_lo = np.arange(first, last - train_days + 1, test_days)
+    if len(train_lo) == 0:
+        return []
+    test_lo = train_lo + train_days
+    test_hi = test_lo + test_days
+
+    # Train-window stats for every (combo, fold) at once
+    counts, sums = zip(*(_train_sums(t["day"], t["exit_day"], t["pnl"], train_lo, test_lo)
+                         for t in ordered))
+    counts = np.array(counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expectancy = np.where(counts >= min_trades, np.array(sums) / counts, -np.inf)
+
+    folds = []
+    for f in range(len(train_lo)):
+        c = int(np.argmax(expectancy[:, f]))
+        if not np.isfinite(expectancy[c, f]):
+            continue
+        t = ordered[c]
+        a, b = np.searchsorted(t["day"], [train_lo[f], test_lo[f]])
+        closed = t["exit_day"][a:b] < test_lo[f]
+        test_a, test_b = np.searchsorted(t["day"], [test_lo[f], test_hi[f]])
+        folds.append({
+            "train_start": int(train_lo[f]),
+            "test_start": int(test_lo[f]),
+            "test_end": int(test_hi[f]),
+            "combo": c,
+            "is_trades": int(closed.sum()),
+            "is_expectancy": float(t["pnl"][a:b][closed].mean()),
+            "is_avg_r": float(t["r_multiple"][a:b][closed].mean()),
+            "oos_trades": int(test_b - test_a),
+            "oos_expectancy": float(t["pnl"][test_a:test_b].mean()) if test_b > test_a else float("nan"),
+            "oos_avg_r": float(t["r_multiple"][test_a:test_b].mean()) if test_b > test_a else float("nan"),
+            "oos": {k: v[test_a:test_b] for k, v in t.items()},
+        })
+    return folds
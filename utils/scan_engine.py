@@ -0,0 +1,889 @@
+"""
+Two-stage universe scan.
+
+Stage 1 screens every ticker at once on a last-bar indicator snapshot: the
+same price/volume gates, sensitivity thresholds, market-bias buffers and
+near-miss rules the scanner's card builder applies, plus a preliminary
+SmartScore from the snapshot-only terms (RSI/BandPos strength, trend,
+relative volume).
+
+Stage 2 — the full card with support/resistance, Fibonacci, targets, pivots
+and patterns — is only worth building for survivors that can still reach
+the displayed top `max_cards`. The card stage can add at most a fixed
+amount to the preliminary score (base, meaningful level and Fibonacci
+bonuses), so each survivor gets a ScoreCeiling and the scanner stops
+building once no remaining ceiling can beat the current cut-off.
+
+Everything here is Streamlit-free: per-scan inputs (filters, sensitivity
+thresholds, Smart Mode market bias, watchlist, known sectors) travel in a
+read-only ScanContext built once per scan, so build_card() can also run
+in worker processes. ScanEngine wraps the bulk history load and both stages
+into one call that the scanner page, scripts/scan.py and cron jobs share.
+
+A ScanCache keeps each ticker's snapshot row and built cards between scans,
+keyed by its bars, so rescans with other filters only re-screen and reuse
+cards; just the tickers with a new or revised bar are recomputed.
+"""
+
+import heapq
+import json
+import os
+import random
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import (
+    align_bars, compute_indicators, compute_indicators_panel,
+    analyze_volume, find_support_resistance, calculate_fibonacci_levels,
+    get_fibonacci_zone_label, detect_patterns, find_pivot_points,
+)
+from utils.logger import get_logger
+from utils.target_calculator import calculate_scanner_target
+from utils.tiingo_bars import tiingo_all_us_tickers, tiingo_history_many
+from utils.universe_builder import CACHE_PATH
+
+logger = get_logger(__name__)
+
+SCAN_LOOKBACK_DAYS = 120      # how many days of Tiingo history to load
+BATCH_TICKER_COUNT = 50       # cards built between progress updates
+SCAN_CONCURRENCY = 64         # history requests in flight during the bulk load
+
+# Sensitivity level -> setup thresholds (1 = very strict ... 5 = relaxed)
+# Pullback RSI range: 35-50 (healthy pullback zone)
+SENSITIVITY_MAP = {
+    1: {"breakout_rsi": 65, "breakout_band": 0.70, "pullback_rsi_min": 35, "pullback_rsi_max": 45, "pullback_band": 0.30},
+    2: {"breakout_rsi": 60, "breakout_band": 0.65, "pullback_rsi_min": 35, "pullback_rsi_max": 48, "pullback_band": 0.35},
+    3: {"breakout_rsi": 55, "breakout_band": 0.55, "pullback_rsi_min": 35, "pullback_rsi_max": 50, "pullback_band": 0.45},
+    4: {"breakout_rsi": 52, "breakout_band": 0.50, "pullback_rsi_min": 35, "pullback_rsi_max": 50, "pullback_band": 0.50},
+    5: {"breakout_rsi": 50, "breakout_band": 0.45, "pullback_rsi_min": 35, "pullback_rsi_max": 50, "pullback_band": 0.55},
+}
+
+MIN_BARS = 60            # bars the card builder needs before it scores a ticker
+NEAR_PCT = 15.0          # near miss: within 15% of the 20-day high
+NEAR_ATR_MULT = 4.0      # near miss: within 4×ATR of the 20-day low
+
+# Most the card stage can add to the preliminary SmartScore
+BASE_BONUS = 12          # breakout from a tight base
+LEVEL_BONUS = 10         # pullback / near miss at EMA20, EMA50 or a pivot low
+FIB_BONUS = 15           # deep Fibonacci discount
+
+SCREEN_COLUMNS = ["Setup", "NearMiss", "NearType", "PrelimScore", "ScoreCeiling"]
+BREAKOUT_MODES = ("Breakout", "Both")
+PULLBACK_MODES = ("Pullback", "Both")
+
+
+# ---------------- Scan Context ----------------
+@dataclass(frozen=True)
+class ScanContext:
+    """Read-only inputs shared by every ticker in one scan."""
+    mode: str
+    price_min: float
+    price_max: float
+    min_volume: float
+    thresholds: dict                      # one row of the scanner's sensitivity map
+    market_bias: str | None = None        # Smart Mode: "Uptrend" / "Downtrend"
+    vol_regime: str | None = None         # Smart Mode: "High Volatility" / "Low Volatility"
+    watchlist: frozenset = frozenset()
+    sectors: dict = field(default_factory=dict)   # ticker -> sector, where known
+
+
+def bias_buffers(market_bias: str | None) -> tuple[float, float]:
+    """(RSI, BandPos) threshold offsets for the Smart Mode market bias."""
+    if market_bias == "Uptrend":
+        return -3, -0.05    # strong market: more lenient
+    if market_bias == "Downtrend":
+        return +3, +0.05    # weak market: more selective
+    return 0, 0
+
+
+# ---------------- Setup Helpers ----------------
+def trade_plan_levels(last_close: float, atr_val: float, mode: str,
+                      stop_atr_mult: float, rr_mult: float) -> tuple[float, float]:
+    """
+    Returns (stop, target). For Pullback, assume bounce; for Breakout, assume expansion.
+    """
+    atr_val = float(atr_val) if pd.notna(atr_val) else 0.0
+    stop = last_close - stop_atr_mult * atr_val
+    if mode == "Pullback":
+        target = last_close + rr_mult * (last_close - stop)        # bounce back
+    else:
+        target = last_close + rr_mult * (stop_atr_mult * atr_val)  # push higher
+    return (round(max(stop, 0.01), 4), round(max(target, 0.01), 4))
+
+
+def classify_setup(last: pd.Series) -> str:
+    """Loose Pullback / Breakout / Neutral label from EMA trend and RSI."""
+    try:
+        ema20 = float(last["EMA20"])
+        ema50 = float(last["EMA50"])
+        rsi = float(last["RSI14"])
+    except Exception:
+        return "Neutral"
+
+    ema_up = ema20 > ema50
+    if ema_up and rsi >= 50:
+        return "Breakout"
+    if ema_up and rsi < 50:
+        return "Pullback"
+    if not ema_up and rsi < 60:
+        return "Pullback"
+    return "Neutral"
+
+
+def passes_filters(last: pd.Series, price_min: float, price_max: float, min_volume: float,
+                   mode: str = "Both") -> bool:
+    """Price/volume gates plus a coarse trend check per mode, Webull-style."""
+    try:
+        px = float(last["Close"])
+        vol = float(last["Volume"])
+        rsi = float(last.get("RSI14", 50))
+        ema20 = float(last.get("EMA20", np.nan))
+        ema50 = float(last.get("EMA50", np.nan))
+        band = float(last.get("BandPos20", 0.5))
+
+        if pd.isna(px) or pd.isna(vol):
+            return False
+        if px < price_min or px > price_max or vol < min_volume:
+            return False
+
+        if mode == "Breakout":
+            # Strong uptrend + momentum
+            return ema20 > ema50 and rsi > 55 and band > 0.55
+        if mode == "Pullback":
+            # Uptrend but short-term dip near support
+            return ema20 > ema50 and rsi < 60 and band <= 0.45 and px <= ema20
+        return ema20 > ema50   # Both — anything trending up
+
+    except Exception as e:
+        logger.warning(f"passes_filters error: {e}")
+        return False
+
+
+# ---------------- Stage 1: Screen ----------------
+def universe_snapshot(frames: dict) -> pd.DataFrame:
+    """
+    Last-bar indicators for {ticker: DataFrame}, one row per ticker, plus
+    Rows (history length) and VolMean20 (NaN-skipping mean of the last 20
+    volumes, as the card's relative-volume check uses).
+    """
+    tickers, p = align_bars(frames)
+    if not tickers:
+        return pd.DataFrame()
+    snap = compute_indicators_panel(p["High"], p["Low"], p["Close"], p["Volume"], tickers)
+    snap["Rows"] = [len(frames[t]) for t in tickers]
+
+    recent = p["Volume"][-20:]
+    counts = (~np.isnan(recent)).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        snap["VolMean20"] = np.where(counts > 0, np.nansum(recent, axis=0) / counts, np.nan)
+    return snap
+
+
+def screen_snapshot(snap: pd.DataFrame, ctx: ScanContext) -> pd.DataFrame:
+    """
+    Stage 1: tickers that would get a card (confirmed setup or near miss).
+
+    Returns the surviving snapshot rows, in input order, with Setup
+    ("Breakout" / "Pullback" / None), NearMiss, NearType, PrelimScore and
+    ScoreCeiling (the highest SmartScore the full card could reach).
+    """
+    if snap.empty:
+        return snap.reindex(columns=[*snap.columns, *SCREEN_COLUMNS])
+
+    px = snap["Close"].to_numpy(dtype=float)
+    vol = snap["Volume"].to_numpy(dtype=float)
+    ema20 = snap["EMA20"].to_numpy(dtype=float)
+    ema50 = snap["EMA50"].to_numpy(dtype=float)
+    rsi = snap["RSI14"].to_numpy(dtype=float)
+    band = snap["BandPos20"].to_numpy(dtype=float)
+    atr = snap["ATR14"].to_numpy(dtype=float)
+    atr = np.where(np.isnan(atr) | (atr <= 0), px * 0.01, atr)
+    support = snap["LL20"].to_numpy(dtype=float)
+    resistance = snap["HH20"].to_numpy(dtype=float)
+
+    mode, thresholds = ctx.mode, ctx.thresholds
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tradable = ((snap["Rows"].to_numpy() >= MIN_BARS) & ~np.isnan(px) & ~np.isnan(vol)
+                    & (px >= ctx.price_min) & (px <= ctx.price_max) & (vol >= ctx.min_volume))
+        uptrend = tradable & (ema20 > ema50)
+
+        # --- Confirmed setups (sensitivity + market bias) ---
+        rsi_buffer, band_buffer = bias_buffers(ctx.market_bias)
+        breakout = uptrend & (mode in BREAKOUT_MODES) \
+            & (rsi > thresholds["breakout_rsi"] + rsi_buffer) \
+            & (band > thresholds["breakout_band"] + band_buffer)
+        pullback = uptrend & ~breakout & (mode in PULLBACK_MODES) \
+            & (rsi >= thresholds["pullback_rsi_min"] + rsi_buffer) \
+            & (rsi <= thresholds["pullback_rsi_max"] + rsi_buffer) \
+            & (band <= thresholds["pullback_band"] + band_buffer) & (px <= ema20)
+        setup = breakout | pullback
+
+        # --- Near misses (broader tolerance window) ---
+        candidate = uptrend & ~setup
+        near_high = (resistance > 0) & ((resistance - px) / resistance <= NEAR_PCT / 100)
+        near_low = (px - support) <= NEAR_ATR_MULT * atr
+        near_breakout = (mode in BREAKOUT_MODES) & (rsi >= 40) & (rsi <= 67) & (band >= 0.35) & (band <= 0.70)
+        near_pullback = (mode in PULLBACK_MODES) & (rsi >= 40) & (rsi <= 70) & (band >= 0.20) & (band <= 0.60)
+        near_type = np.select(
+            [near_high, near_low, near_breakout, near_pullback],
+            [f"≤{NEAR_PCT:.0f}% below 20-day high", f"≤{NEAR_ATR_MULT:.1f}×ATR above 20-day low",
+             "RSI/Band breakout proximity", "RSI/Band pullback proximity"],
+            default="",
+        )
+        near_miss = candidate & (near_type != "")
+
+        # --- Preliminary SmartScore (the terms a snapshot can score) ---
+        score = np.full(len(px), 50.0)
+        score += np.where(breakout, np.minimum((rsi - 50) * 1.2, 25) + np.minimum((band - 0.5) * 50, 15), 0)
+        score += np.where(pullback, np.minimum((60 - rsi) * 1.2, 25) + np.minimum((0.5 - band) * 50, 15), 0)
+        score += np.where(ema20 > ema50, 10, -10)
+        vol_mean = snap["VolMean20"].to_numpy(dtype=float)
+        rel_vol = np.where(vol_mean > 0, vol / vol_mean, 1.0)
+        score += np.select([rel_vol >= 1.5, rel_vol >= 1.0, rel_vol < 0.8], [15, 5, -10], default=0)
+
+    keep = setup | near_miss
+    prelim = np.clip(score, 0, 100).astype(int)
+    ceiling = prelim + FIB_BONUS + np.where(breakout, BASE_BONUS, 0) \
+        + np.where(pullback | near_miss, LEVEL_BONUS, 0)
+
+    out = snap.loc[keep].copy()
+    out["Setup"] = np.where(breakout, "Breakout", np.where(pullback, "Pullback", None))[keep]
+    out["NearMiss"] = near_miss[keep]
+    out["NearType"] = np.where(near_miss, near_type, None)[keep]
+    out["PrelimScore"] = prelim[keep]
+    out["ScoreCeiling"] = np.minimum(ceiling, 100)[keep]
+    return out
+
+
+# ---------------- Card Builder ----------------
+def build_card(ticker: str, df: pd.DataFrame | None, ctx: ScanContext) -> dict | None:
+    """
+    Evaluate one ticker's daily bars and return a metrics card with trend
+    context + near-miss detection, or None when it doesn't qualify.
+    """
+    try:
+        # --- Compute indicators ---
+        if df is None or df.empty or len(df) < MIN_BARS:
+            return None
+
+        df = compute_indicators(df)
+        last = df.iloc[-1]
+
+        px = float(last["Close"])
+        vol = float(last["Volume"])
+
+        if pd.isna(px) or pd.isna(vol) or px < ctx.price_min or px > ctx.price_max or vol < ctx.min_volume:
+            return None
+
+        ema20 = float(last["EMA20"])
+        ema50 = float(last["EMA50"])
+        rsi = float(last["RSI14"])
+        band = float(last["BandPos20"])
+        atr = float(last.get("ATR14", np.nan))
+        atr = px * 0.01 if pd.isna(atr) or atr <= 0 else atr
+        support = float(last.get("LL20", np.nan))
+        resistance = float(last.get("HH20", np.nan))
+
+        # --- Dynamic filter tuning based on market bias ---
+        # Uptrend: more lenient (e.g. Breakout needs RSI > 52 instead of 55);
+        # Downtrend: more selective to avoid traps
+        rsi_buffer, band_buffer = bias_buffers(ctx.market_bias)
+
+        # --- Setup & Near Miss detection (using sensitivity thresholds) ---
+        setup, near_miss, near_type = None, False, None
+
+        if ema20 > ema50:
+            # Confirmed setups (apply sensitivity + market bias adjustments)
+            breakout_rsi_threshold = ctx.thresholds["breakout_rsi"] + rsi_buffer
+            breakout_band_threshold = ctx.thresholds["breakout_band"] + band_buffer
+            pullback_rsi_min = ctx.thresholds["pullback_rsi_min"] + rsi_buffer
+            pullback_rsi_max = ctx.thresholds["pullback_rsi_max"] + rsi_buffer
+            pullback_band_threshold = ctx.thresholds["pullback_band"] + band_buffer
+
+            if ctx.mode in BREAKOUT_MODES and rsi > breakout_rsi_threshold and band > breakout_band_threshold:
+                setup = "Breakout"
+            elif ctx.mode in PULLBACK_MODES and pullback_rsi_min <= rsi <= pullback_rsi_max and band <= pullback_band_threshold and px <= ema20:
+                setup = "Pullback"
+
+
+            # Near misses (broader tolerance window)
+            if not setup:
+                if ctx.mode in BREAKOUT_MODES and 40 <= rsi <= 67 and 0.35 <= band <= 0.70:
+                    near_miss, near_type = True, "RSI/Band breakout proximity"
+                elif ctx.mode in PULLBACK_MODES and 40 <= rsi <= 70 and 0.20 <= band <= 0.60:
+                    near_miss, near_type = True, "RSI/Band pullback proximity"
+
+                # Check proximity to recent high/low
+                if pd.notna(resistance) and resistance > 0 and (resistance - px) / resistance <= NEAR_PCT / 100:
+                    near_miss, near_type = True, f"≤{NEAR_PCT:.0f}% below 20-day high"
+                elif pd.notna(support) and (px - support) <= NEAR_ATR_MULT * atr:
+                    near_miss, near_type = True, f"≤{NEAR_ATR_MULT:.1f}×ATR above 20-day low"
+
+        # --- Skip if no signal ---
+        if not setup and not near_miss:
+            return None
+
+        # --- Determine trend context ---
+        if ema20 > ema50 * 1.02:
+            trend_context = "Uptrend"
+        elif ema20 < ema50 * 0.98:
+            trend_context = "Downtrend"
+        else:
+            trend_context = "Sideways"
+
+        # --- Combine setup + trend for readable context ---
+        if setup:
+            setup_context = f"{setup} in {trend_context}"
+        elif near_miss:
+            setup_context = f"Potential {near_type or 'setup'} in {trend_context}"
+        else:
+            setup_context = trend_context
+
+        # --- Target / Stop (Fibonacci-based from RECENT 20-bar swing) ---
+        # Use same stop logic as Analyzer for consistency
+        swing_low = float(df['Low'].tail(10).min())
+        atr_stop = ema20 - 1.3 * atr
+        proposed_stop = min(swing_low, atr_stop)
+
+        # Ensure stop is below entry
+        if proposed_stop >= px:
+            proposed_stop = px - 1.2 * atr
+
+        stop = max(0.01, proposed_stop)
+
+        # Use Fibonacci extension target calculator with SHORT recent swing
+        target, rr_ratio, weak_rr = calculate_scanner_target(
+            df=df,
+            current_price=px,
+            stop_loss=stop,
+            setup_type=setup or "Breakout",
+            lookback_bars=20  # SHORT recent swing (15-20 bars)
+        )
+
+                # --- Smart Score calculation ---
+        smart_score = 50  # neutral baseline
+
+        # Setup strength: RSI/Band alignment
+        if setup == "Breakout":
+            smart_score += min((rsi - 50) * 1.2, 25)   # reward strong RSI
+            smart_score += min((band - 0.5) * 50, 15)  # reward high band
+        elif setup == "Pullback":
+            smart_score += min((60 - rsi) * 1.2, 25)   # reward deeper dips
+            smart_score += min((0.5 - band) * 50, 15)  # reward lower band
+
+        # Trend context (Uptrend gets a bonus)
+        if ema20 > ema50:
+            smart_score += 10
+        else:
+            smart_score -= 10
+
+        # Volume signal (add to smart score)
+        # Volume analysis is done later, but we can use relative volume here
+        vol_20_avg = df['Volume'].tail(20).mean()
+        rel_vol = vol / vol_20_avg if vol_20_avg > 0 else 1.0
+
+        if rel_vol >= 1.5:
+            smart_score += 15  # High volume - strong conviction
+        elif rel_vol >= 1.0:
+            smart_score += 5   # Above average volume - good
+        elif rel_vol < 0.8:
+            smart_score -= 10  # Low volume - weak conviction
+
+        smart_score = int(np.clip(smart_score, 0, 100))
+
+        # --- Structural Context: Base detection + Meaningful Level ---
+        # Base detection: was there tight consolidation in the 15–3 bars before now?
+        has_base = False
+        base_tightness = None
+        if len(df) >= 15:
+            try:
+                pre_move = df.iloc[-15:-3]  # the "pre-breakout" period
+                base_high = float(pre_move["High"].max())
+                base_low  = float(pre_move["Low"].min())
+                base_mid  = float(pre_move["Close"].mean())
+                if base_mid > 0:
+                    base_range = (base_high - base_low) / base_mid
+                    if base_range < 0.07:          # ≤ 7% range → tight base
+                        has_base = True
+                        base_tightness = round(base_range * 100, 1)
+                        if setup == "Breakout":
+                            smart_score += 12      # breakout FROM a real base
+            except Exception:
+                pass
+
+        # Meaningful level check: for Pullback, is price at EMA20/50 or pivot low?
+        at_meaningful_level = False
+        level_description   = None
+        if setup == "Pullback" or near_miss:
+            try:
+                ema20_dist = abs(px - ema20) / px if px > 0 else 1
+                ema50_dist = abs(px - ema50) / px if px > 0 else 1
+
+                # Check nearest pivot low (structural support)
+                piv = find_pivot_points(df.tail(30), left_bars=3, right_bars=3)
+                piv_lows = piv["pivot_lows"]
+                near_pivot_low  = False
+                nearest_pl_price = None
+                if piv_lows:
+                    nearest_pl = min(piv_lows, key=lambda p: abs(p["price"] - px))
+                    pivot_dist = abs(nearest_pl["price"] - px) / px
+                    near_pivot_low   = pivot_dist <= 0.025   # within 2.5%
+                    nearest_pl_price = nearest_pl["price"]
+
+                if ema20_dist <= 0.02:
+                    at_meaningful_level = True
+                    level_description   = f"near EMA20 (${ema20:.2f})"
+                    smart_score += 10
+                elif ema50_dist <= 0.02:
+                    at_meaningful_level = True
+                    level_description   = f"near EMA50 (${ema50:.2f})"
+                    smart_score += 8
+                elif near_pivot_low and nearest_pl_price:
+                    at_meaningful_level = True
+                    level_description   = f"near pivot low (${nearest_pl_price:.2f})"
+                    smart_score += 8
+            except Exception:
+                pass
+
+        # Incorporate structural flags into the SetupContext label
+        if setup == "Breakout" and has_base:
+            setup_context = setup_context + " (from base)"
+        if setup == "Pullback" and at_meaningful_level and level_description:
+            setup_context = setup_context + f" at {level_description}"
+
+        smart_score = int(np.clip(smart_score, 0, 100))
+
+        # --- Volume Analysis ---
+        vol_analysis = analyze_volume(df, lookback=20)
+
+        # --- Support/Resistance Detection ---
+        sr_levels = find_support_resistance(df, window=10, num_levels=2)
+
+        # Adjust stop to nearest support if available
+        actual_stop = stop
+        if sr_levels["support"]:
+            nearest_support = sr_levels["support"][-1]  # closest support below price
+            # Use support if it's within reasonable range (not too far)
+            if px - nearest_support < atr * 3:
+                actual_stop = nearest_support * 0.995  # just below support
+
+        # Adjust target to nearest resistance — only if it still gives 2:1 R:R
+        actual_target = target
+        actual_risk = abs(px - actual_stop)
+        if sr_levels["resistance"] and actual_risk > 0:
+            nearest_resistance = sr_levels["resistance"][0]
+            resistance_target  = nearest_resistance * 0.99  # just below resistance
+            resistance_reward  = abs(resistance_target - px)
+            resistance_rr      = resistance_reward / actual_risk
+            # Only use resistance target if it's closer AND still gives at least 2:1
+            if nearest_resistance < target and resistance_rr >= 2.0:
+                actual_target = resistance_target
+
+        # ✅ Recalculate R:R from the ACTUAL displayed stop and target
+        actual_reward = abs(actual_target - px)
+        if actual_risk > 0:
+            rr_ratio = round(actual_reward / actual_risk, 2)
+            weak_rr  = rr_ratio < 2.0
+        else:
+            rr_ratio = 0.0
+            weak_rr  = True
+
+        # --- Fibonacci Retracement Analysis ---
+        fib_data = calculate_fibonacci_levels(df, lookback=20)
+
+        # Apply Fibonacci weighting to Smart Score
+        if fib_data:
+            fib_position = fib_data["current_fib_position"]
+            fib_zone = fib_data["zone"]
+
+            # Boost score for discount zone entries (better risk/reward)
+            if fib_zone == "discount":
+                if fib_position <= 38.2:
+                    smart_score += 15  # Deep discount - excellent entry
+                elif fib_position <= 50:
+                    smart_score += 10  # Discount zone - good entry
+
+            # Lower score for premium zone entries (worse risk/reward)
+            elif fib_zone == "premium":
+                if fib_position >= 78.6:
+                    smart_score -= 15  # Extended premium - risky entry
+                elif fib_position >= 61.8:
+                    smart_score -= 10  # Premium zone - less favorable
+
+            # Clamp again after Fibonacci adjustment
+            smart_score = max(0, min(100, round(smart_score, 1)))
+
+        # --- Earnings and sector ---
+        # Earnings are fetched on demand when displaying results (rate limits);
+        # the sector comes from whatever the session has already looked up
+        earnings_date = None
+        days_to_earnings = None
+        earnings_warning = None
+        sector = ctx.sectors.get(ticker, "Unknown")
+
+        # --- Pattern Recognition ---
+        top_pattern = None
+        try:
+            patterns = detect_patterns(df)
+            if patterns:
+                top_pattern = patterns[0]  # highest confidence pattern
+        except Exception:
+            pass
+
+        # --- Build result card ---
+        # Note: Fundamental scores are fetched on-demand after scan to keep scans fast
+        card = {
+            "Symbol": ticker,
+            "Price": round(px, 2),
+            "Volume": int(vol),
+            "RSI14": round(rsi, 1),
+            "EMA20>EMA50": ema20 > ema50,
+            "BandPos20": round(band, 2),
+            "ATR14": round(atr, 2),
+            "Setup": setup or "NearMiss",
+            "Stop": round(actual_stop, 2),
+            "Target": round(actual_target, 2),
+            "RR_Ratio": round(rr_ratio, 2),
+            "WeakRR": weak_rr,  # Flag if R:R was below 2:1
+            "SmartScore": smart_score,
+            "NearMiss": near_miss,
+            "NearType": near_type,
+            "SetupContext": setup_context,
+            "RelVolume": vol_analysis.get("relative_volume", 1.0),
+            "VolSignal": vol_analysis.get("volume_signal", "Neutral"),
+            "Support": sr_levels["support"],
+            "Resistance": sr_levels["resistance"],
+            # Fibonacci data
+            "FibPosition": round(fib_data["current_fib_position"], 1) if fib_data else None,
+            "FibZone": fib_data["zone"] if fib_data else None,
+            "FibZoneLabel": get_fibonacci_zone_label(fib_data["current_fib_position"]) if fib_data else None,
+            "OptimalEntry": round(fib_data["optimal_entry"], 2) if fib_data else None,
+            "FibLevels": fib_data["fib_levels"] if fib_data else None,
+            "SwingHigh": round(fib_data["swing_high"], 2) if fib_data else None,
+            "SwingLow": round(fib_data["swing_low"], 2) if fib_data else None,
+            # Earnings and sector data
+            "EarningsDate": earnings_date,
+            "DaysToEarnings": days_to_earnings,
+            "EarningsWarning": earnings_warning,
+            "Sector": sector,
+            # Pattern recognition
+            "Pattern": top_pattern,
+            # Structural context
+            "HasBase": has_base,
+            "BaseTightness": base_tightness,
+            "AtMeaningfulLevel": at_meaningful_level,
+            "LevelDescription": level_description,
+        }
+
+        return card
+
+    except Exception as e:
+        logger.warning(f"{ticker} failed with error: {e}")
+        return None
+
+
+# ---------------- Universe ----------------
+def load_universe(token: str | None = None) -> list[str]:
+    """
+    Tickers from the cached quality universe (utils/filtered_universe.json),
+    deduplicated in file order. Falls back to Tiingo's full US list when the
+    file is missing, empty or unreadable.
+    """
+    try:
+        if os.path.exists(CACHE_PATH):
+            with open(CACHE_PATH, "r") as f:
+                data = json.load(f)
+            tickers = [t["ticker"].upper() for t in data.get("tickers", [])]
+            unique = list(dict.fromkeys(tickers))
+            if unique:
+                logger.info(f"Loaded {len(unique)} unique tickers from the universe cache "
+                            f"(deduped from {len(tickers)})")
+                return unique
+        logger.warning("Universe cache missing or empty, falling back to Tiingo API universe "
+                       "(run 'python utils/build_quality_universe.py' to build it)")
+    except Exception as e:
+        logger.error(f"Error loading universe cache: {e}, falling back to Tiingo API universe")
+    return tiingo_all_us_tickers(token) if token else []
+
+
+# ---------------- Incremental Cache ----------------
+_UNSEEN = object()
+
+
+def bar_key(df: pd.DataFrame | None) -> tuple | None:
+    """
+    Identity of a ticker's bars: last bar timestamp, plus the row count
+    (the window start rolls forward) and last close/volume (a bar revised
+    after the close counts as new).
+    """
+    if df is None or df.empty:
+        return None
+    return (pd.Timestamp(df["Date"].iat[-1]).value, len(df),
+            float(df["Close"].iat[-1]), float(df["Volume"].iat[-1]))
+
+
+def _verdict(row: pd.Series) -> tuple:
+    """(Setup, NearType) the screen gave a survivor; build_card reaches the same verdict."""
+    setup, near_type = row["Setup"], row["NearType"]
+    return (setup if isinstance(setup, str) else None,
+            near_type if isinstance(near_type, str) else None)
+
+
+class ScanCache:
+    """
+    Per-ticker scan state reused across scans, keyed by bar_key().
+
+    Holds each ticker's stage 1 snapshot row and the cards built from its
+    bars. A card depends only on the bars, the screen's verdict and the
+    ticker's sector, not on the price/volume gates, mode, sensitivity or
+    market bias that led to the verdict. So a rescan with new filters is a
+    re-screen of the cached snapshot plus card lookups, and only tickers
+    whose bars changed are recomputed. Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._keys: dict = {}              # ticker -> bar_key of the cached state
+        self._snapshot = pd.DataFrame()    # universe_snapshot rows, one per ticker
+        self._cards: dict = {}             # ticker -> {(setup, near_type, sector): card or None}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def snapshot(self, bars: dict, tickers: list[str]) -> pd.DataFrame:
+        """universe_snapshot() for `tickers`, recomputing only those whose bars changed."""
+        keys = {t: bar_key(bars.get(t)) for t in tickers}
+        with self._lock:
+            stale = [t for t, k in keys.items() if self._keys.get(t, _UNSEEN) != k]
+            if stale:
+                fresh = universe_snapshot({t: bars.get(t) for t in stale})
+                kept = self._snapshot.drop(index=stale, errors="ignore")
+                self._snapshot = pd.concat([kept, fresh]) if len(kept) else fresh
+                for t in stale:
+                    self._keys[t] = keys[t]
+                    self._cards.pop(t, None)
+            index = self._snapshot.index
+            return self._snapshot.loc[[t for t in keys if t in index]]   # tickers without bars have no row
+
+    def card(self, ticker: str, df: pd.DataFrame, ctx: ScanContext, row: pd.Series) -> dict | None:
+        """build_card() for a screen survivor, reused while its bars, verdict and sector are unchanged."""
+        variant = (*_verdict(row), ctx.sectors.get(ticker, "Unknown"))
+        with self._lock:
+            cached = self._cards.get(ticker, {}).get(variant, _UNSEEN)
+        if cached is _UNSEEN:
+            cached = build_card(ticker, df, ctx)
+            with self._lock:
+                if self._keys.get(ticker, _UNSEEN) == bar_key(df):
+                    self._cards.setdefault(ticker, {})[variant] = cached
+        return dict(cached) if cached is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self._snapshot = pd.DataFrame()
+            self._cards.clear()
+
+
+# ---------------- Streaming Top-K ----------------
+class TopK:
+    """
+    Bounded min-heap of the best `k` cards by SmartScore.
+
+    Ties rank by scan position (earlier wins), the same order as the final
+    ranking, so the root is always the card the next better one evicts. A
+    symbol already held is ignored on insert, so duplicates never take two
+    slots.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: list = []       # (SmartScore, -scan position, symbol, card)
+        self._symbols: set = set()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    @property
+    def floor(self) -> float:
+        """Lowest SmartScore held (the score a newcomer must reach once full)."""
+        return self._heap[0][0] if self._heap else 0
+
+    def push(self, card: dict, pos: int) -> bool:
+        """Offer a card found at scan position `pos`; True if it was kept."""
+        symbol = card.get("Symbol")
+        if self.k <= 0 or symbol in self._symbols:
+            return False
+        entry = (card.get("SmartScore", 0), -pos, symbol, card)
+        if not self.full:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            evicted = heapq.heapreplace(self._heap, entry)
+            self._symbols.discard(evicted[2])
+        else:
+            return False
+        self._symbols.add(symbol)
+        return True
+
+    def ranked(self) -> list[dict]:
+        """Held cards, best SmartScore first; ties keep scan order."""
+        return [e[3] for e in sorted(self._heap, key=lambda e: (-e[0], -e[1]))]
+
+
+# ---------------- Scan Engine ----------------
+class ScanEngine:
+    """
+    Full-universe scan without a UI: one bulk history load, the stage 1
+    screen over every ticker, then stage 2 cards for the survivors that can
+    still make the top `max_cards`.
+
+    progress_cb(stage, done, total, hits) is called with stage "load"
+    (history fetch), "screen" (once) and "cards" (every BATCH_TICKER_COUNT
+    cards), so the scanner page and the command line can report progress
+    their own way.
+
+    Snapshot rows and cards go through `cache`; keep the engine (or pass a
+    shared ScanCache) across scans to make rescans incremental.
+    """
+
+    def __init__(self, token: str, lookback_days: int = SCAN_LOOKBACK_DAYS,
+                 concurrency: int = SCAN_CONCURRENCY, cache: ScanCache | None = None):
+        self.token = token
+        self.lookback_days = lookback_days
+        self.concurrency = concurrency
+        self.cache = cache if cache is not None else ScanCache()
+
+    @staticmethod
+    def scan_order(tickers: list[str], watchlist: list[str] = (), shuffle: bool = True) -> list[str]:
+        """Watchlist tickers first (in watchlist order), then the rest, shuffled for variety."""
+        listed = set(tickers)
+        watched = set(watchlist)
+        first = [t for t in watchlist if t in listed]
+        rest = [t for t in tickers if t not in watched]
+        if shuffle:
+            random.Random().shuffle(rest)
+        return first + rest
+
+    def load_bars(self, tickers: list[str], progress_cb=None) -> dict:
+        """{ticker: daily bars} for the scan window, fetched concurrently."""
+        return tiingo_history_many(
+            tickers, self.token, self.lookback_days,
+            progress_cb=(lambda done, n: progress_cb("load", done, n, 0)) if progress_cb else None,
+            concurrency=self.concurrency,
+        )
+
+    def run(self, ctx: ScanContext, max_cards: int, tickers: list[str], progress_cb=None,
+            bars: dict | None = None, on_results=None, good_enough: float | None = None) -> dict:
+        """
+        Scan `tickers` (already in scan order). Pass `bars` from load_bars()
+        to rank several contexts over one history load.
+
+        Cards stream into a bounded TopK; `on_results(cards)` receives the
+        current ranking every BATCH_TICKER_COUNT cards while it fills.
+
+        By default candidates go best ScoreCeiling first and the scan stops
+        once none left can beat the max_cards-th card, so the result equals
+        ranking every card. With `good_enough` set, candidates go in scan
+        order (watchlist first) and the scan stops as soon as max_cards
+        cards score at least that much, trading the exact top for speed.
+
+        Returns:
+            cards         top max_cards by SmartScore; ties keep scan order
+            candidates    screen survivors, in the order they were considered
+            scanned       tickers requested
+            built         cards built before stage 2 stopped
+            stopped_early True when good_enough ended the scan
+        """
+        report = progress_cb or (lambda *args: None)
+        if bars is None:
+            bars = self.load_bars(tickers, progress_cb)
+
+        # Stage 1: vectorized screen over last-bar snapshots of the whole universe
+        report("screen", len(tickers), len(tickers), 0)
+        snapshot = self.cache.snapshot(bars, tickers)
+        survivors = screen_snapshot(snapshot, ctx)
+        scan_pos = {t: k for k, t in enumerate(tickers)}
+
+        # Stage 2: full cards into a bounded top-K. A candidate whose ScoreCeiling
+        # can't beat the current floor is never built.
+        if good_enough is None:
+            candidates = survivors.sort_values("ScoreCeiling", ascending=False, kind="stable")
+        else:
+            candidates = survivors   # screen keeps scan order
+        top = TopK(max_cards)
+        built, stopped_early = 0, False
+        for done, (t, row) in enumerate(candidates.iterrows(), start=1):
+            if top.full and row["ScoreCeiling"] < top.floor:
+                if good_enough is None:
+                    break            # ceilings only fall from here
+                continue
+            rec = self.cache.card(t, bars[t], ctx, row)
+            if rec is not None:
+                built += 1
+                top.push(rec, scan_pos[t])
+
+            if done % BATCH_TICKER_COUNT == 0:
+                report("cards", done, len(candidates), built)
+                if on_results:
+                    on_results(top.ranked())
+            if good_enough is not None and top.full and top.floor >= good_enough:
+                stopped_early = True
+                break
+
+        # SmartScore already weighs RSI, BandPos, trend, sector and Fibonacci zone
+        return {
+            "cards": top.ranked(),
+            "candidates": candidates.index.tolist(),
+            "scanned": len(tickers),
+            "built": built,
+            "stopped_early": stopped_early,
+        }
+
+
+# ---------------- Result Files ----------------
+def _json_default(value):
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def results_document(scan: dict, ctx: ScanContext, generated_at: datetime | None = None) -> dict:
+    """JSON-ready record of one ScanEngine.run() and the context it ran with."""
+    context = asdict(ctx)
+    context.pop("sectors")   # lookup cache, not a scan input
+    return {
+        "generated_at": (generated_at or datetime.now()).isoformat(timespec="seconds"),
+        "context": context,
+        **scan,
+    }
+
+
+def save_results(path: str | Path, document: dict) -> Path:
+    """Atomically write a results document as JSON."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(document, default=_json_default), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def load_results(path: str | Path) -> dict | None:
+    """A results document written by save_results(), or None if missing or unreadable."""
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.warning(f"Could not read scan results {path}: {e}")
+        return None
@@ -0,0 +1,143 @@
+"""
+Versioned nightly scan snapshots.
+
+scripts/nightly_scan.py runs the swing scanner (every mode × sensitivity,
+with and without the Smart Mode market bias) and the base formation scanner
+after the close, and publishes one run directory per night:
+
+    .cache/scan_snapshots/2026-10-16_223000/
+        manifest.json          run metadata; its presence marks a complete run
+        scanner_<key>.json     ScanEngine results document for one ScanContext
+        base_<key>.json        base formations for one price/volume filter
+
+A run is written into a hidden staging directory and renamed into place, so
+the pages never see a half-written run. They look up the file for their
+current filters in the newest complete run (one small JSON read) and fall
+back to a live scan when there is none.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from utils.logger import get_logger
+from utils.scan_engine import ScanContext, load_results, save_results
+from utils.storage import CACHE_DIR
+
+logger = get_logger(__name__)
+
+SNAPSHOT_DIR = CACHE_DIR / "scan_snapshots"
+
+# Bump when the card or document layout changes so old runs are ignored
+SNAPSHOT_VERSION = 1
+KEEP_RUNS = 14                # complete runs kept on disk
+MANIFEST = "manifest.json"
+STAGING_PREFIX = ".staging_"
+
+
+def _digest(payload: dict) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def scanner_key(ctx: ScanContext) -> str:
+    """Snapshot key for the ScanContext fields that decide which cards a scan builds."""
+    return _digest({
+        "mode": ctx.mode,
+        "price_min": float(ctx.price_min),
+        "price_max": float(ctx.price_max),
+        "min_volume": float(ctx.min_volume),
+        "thresholds": ctx.thresholds,
+        "market_bias": ctx.market_bias,
+    })
+
+
+def base_key(price_min: float, price_max: float, min_avg_vol: float) -> str:
+    """Snapshot key for the base scanner's price/volume filters."""
+    return _digest({
+        "price_min": float(price_min),
+        "price_max": float(price_max),
+        "min_avg_vol": float(min_avg_vol),
+    })
+
+
+# ---------------- Writing (nightly job) ----------------
+def begin_run(now: datetime | None = None) -> Path:
+    """Create a fresh staging directory for a new run."""
+    run_id = (now or datetime.now()).strftime("%Y-%m-%d_%H%M%S")
+    staging = SNAPSHOT_DIR / f"{STAGING_PREFIX}{run_id}"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    return staging
+
+
+def write_snapshot(staging: Path, name: str, document: dict) -> Path:
+    """Store one results document in a staging run."""
+    return save_results(staging / f"{name}.json", document)
+
+
+def publish_run(staging: Path, manifest: dict, keep: int = KEEP_RUNS) -> Path:
+    """Write the manifest, move the run into place and prune old runs."""
+    run_dir = SNAPSHOT_DIR / staging.name[len(STAGING_PREFIX):]
+    save_results(staging / MANIFEST, {"version": SNAPSHOT_VERSION, "run": run_dir.name, **manifest})
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.replace(staging, run_dir)
+    logger.info(f"Published scan snapshot run {run_dir.name}")
+    prune_runs(keep)
+    return run_dir
+
+
+def prune_runs(keep: int = KEEP_RUNS) -> None:
+    """Delete all but the newest `keep` complete runs, plus stale staging directories.
+
+    At least one run is always kept, so a bad `keep` can't wipe out the
+    snapshot the pages are reading.
+    """
+    keep = max(1, keep)
+    if not SNAPSHOT_DIR.exists():
+        return
+    for stale in SNAPSHOT_DIR.glob(f"{STAGING_PREFIX}*"):
+        if stale.stat().st_mtime < datetime.now().timestamp() - 24 * 3600:
+            shutil.rmtree(stale, ignore_errors=True)
+    for old in list_runs()[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+# ---------------- Reading (pages) ----------------
+def list_runs() -> list[Path]:
+    """Complete runs, oldest first (run ids sort chronologically)."""
+    if not SNAPSHOT_DIR.exists():
+        return []
+    return sorted(p for p in SNAPSHOT_DIR.iterdir()
+                  if p.is_dir() and not p.name.startswith(".") and (p / MANIFEST).exists())
+
+
+def latest_run() -> tuple[Path | None, dict | None]:
+    """(run directory, manifest) of the newest complete run with the current layout."""
+    for run_dir in reversed(list_runs()):
+        manifest = load_results(run_dir / MANIFEST)
+        if manifest and manifest.get("version") == SNAPSHOT_VERSION:
+            return run_dir, manifest
+    return None, None
+
+
+def _load(name: str) -> dict | None:
+    run_dir, manifest = latest_run()
+    if run_dir is None or not (run_dir / f"{name}.json").exists():
+        return None
+    document = load_results(run_dir / f"{name}.json")
+    if document is not None:
+        document["run"] = manifest
+    return document
+
+
+def load_scanner_snapshot(ctx: ScanContext) -> dict | None:
+    """Newest nightly ScanEngine document for `ctx`'s filters, with its run manifest under "run"."""
+    return _load(f"scanner_{scanner_key(ctx)}")
+
+
+def load_base_snapshot(price_min: float, price_max: float, min_avg_vol: float) -> dict | None:
+    """Newest nightly base scan for these filters, with its run manifest under "run"."""
+    return _load(f"base_{base_key(price_min, price_max, min_avg_vol)}")
@@ -2,15 +2,17 @@ import json
 import os
 from pathlib import Path
 from typing import Union, Any
-import streamlit as st
-import requests
 
+from utils import http_client
 from utils.logger import get_logger
 
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Streamlit is only imported inside the secrets/session-state helpers so the
+# bar store and headless scan jobs can use the local paths without it.
+
 # ---------------- Default Local Paths ----------------
 CACHE_DIR = Path(".cache")
 DEFAULT_PATH = CACHE_DIR / "active_trades.json"
@@ -53,6 +55,8 @@ def save_json(data: Union[dict, list, Any], path = DEFAULT_PATH) -> None:
 
 # ---------------- Gist Sync (for Streamlit Cloud) ----------------
 def _gist_headers():
+    import streamlit as st
+
     token = (
         st.secrets.get("GITHUB_TOKEN")
         or st.secrets.get("GITHUB_GIST_TOKEN")  # Use existing token name
@@ -66,7 +70,7 @@ def _gist_headers():
 def load_gist_json(gist_id: str, filename: str) -> dict:
     """Fetch a specific JSON file from a GitHub Gist."""
     try:
-        r = requests.get(f"https://api.github.com/gists/{gist_id}", headers=_gist_headers(), timeout=10)
+        r = http_client.get(f"https://api.github.com/gists/{gist_id}", headers=_gist_headers(), timeout=10)
         if not r.ok:
             logger.warning(f"Gist fetch failed: {r.status_code}")
             return {}
@@ -82,7 +86,7 @@ def save_gist_json(gist_id: str, filename: str, content: dict) -> None:
     """Save JSON data back to a Gist file."""
     try:
         payload = {"files": {filename: {"content": json.dumps(content, indent=2)}}}
-        r = requests.patch(f"https://api.github.com/gists/{gist_id}", headers=_gist_headers(), json=payload, timeout=10)
+        r = http_client.patch(f"https://api.github.com/gists/{gist_id}", headers=_gist_headers(), json=payload, timeout=10)
         if not r.ok:
             logger.warning(f"Gist save failed: {r.status_code}")
     except Exception as e:
@@ -91,6 +95,8 @@ def save_gist_json(gist_id: str, filename: str, content: dict) -> None:
 # ---------------- App-Wide Watchlist Gist Functions ----------------
 def _get_gist_creds():
     """Return (github_token, gist_id) tuple from secrets/env. Both may be None."""
+    import streamlit as st
+
     github_token = (
         st.secrets.get("GITHUB_GIST_TOKEN")
         or st.secrets.get("GITHUB_TOKEN")
@@ -119,7 +125,7 @@ def load_watchlists_from_gist() -> dict:
 
         url = f"https://api.github.com/gists/{gist_id}"
         headers = {"Authorization": f"token {github_token}"}
-        r = requests.get(url, headers=headers, timeout=10)
+        r = http_client.get(url, headers=headers, timeout=10)
         if not r.ok:
             return {"Unnamed": []}
 
@@ -162,7 +168,7 @@ def save_watchlists_to_gist(watchlists_dict: dict) -> None:
                 }
             }
         }
-        r = requests.patch(url, headers=headers, json=payload, timeout=10)
+        r = http_client.patch(url, headers=headers, json=payload, timeout=10)
         if not r.ok:
             logger.warning(f"save_watchlists_to_gist failed: {r.status_code}")
     except Exception as e:
@@ -202,6 +208,8 @@ def load_watchlist() -> list:
     Load watchlist from Scanner's session state or Gist.
     Returns a flat list of tickers, compatible with Scanner's multi-watchlist format.
     """
+    import streamlit as st
+
     # First, check if Scanner has loaded watchlists in session state
     if hasattr(st, 'session_state'):
         # Check for active watchlist
@@ -267,6 +275,8 @@ def load_watchlist() -> list:
 
 def save_watchlist(tickers: list) -> None:
     """Save watchlist both locally and to cloud if configured."""
+    import streamlit as st
+
     # Local save
     save_json({"tickers": tickers}, WATCHLIST_PATH)
 
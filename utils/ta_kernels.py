@@ -0,0 +1,208 @@
+"""
+Array kernels for the recursive indicators (EMA, Wilder RSI, ATR, MACD) and
+Bollinger band position.
+
+One implementation shared by the scanner, backtester, alerts job, Claude
+context builder and intraday coach, instead of each re-deriving RSI with its
+own smoothing. Kernels take contiguous float64 arrays, either 1-D (one
+series) or 2-D (bars × tickers, leading-NaN padded), and return arrays of the
+same shape. The EMA recursion reproduces pandas `ewm(adjust=False).mean()`
+exactly, so results match the previous pandas code bit for bit.
+
+Numba is used when installed; otherwise the same code runs as plain NumPy,
+vectorized across tickers and looping only over bars.
+
+Pure NumPy on purpose: check_alerts.py imports this from GitHub Actions.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover - depends on environment
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+# ---------------- Helpers ----------------
+def _as_2d(x) -> tuple[np.ndarray, bool]:
+    """Contiguous float64 (bars × series) view of x, and whether x was 1-D."""
+    arr = np.ascontiguousarray(x, dtype=np.float64)
+    if arr.ndim == 1:
+        return arr.reshape(-1, 1), True
+    return arr, False
+
+
+def _restore(out: np.ndarray, was_1d: bool) -> np.ndarray:
+    return out[:, 0] if was_1d else out
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    out = np.empty_like(x)
+    out[0] = np.nan
+    out[1:] = x[:-1]
+    return out
+
+
+def _alpha(span: float | None = None, alpha: float | None = None) -> float:
+    """Smoothing factor derived the way pandas does (via center of mass)."""
+    com = (span - 1) / 2.0 if span is not None else 1.0 / alpha - 1
+    return 1.0 / (1.0 + com)
+
+
+# ---------------- Recursive Core ----------------
+@njit(cache=True)
+def _ewm_core(x, alpha):
+    """
+    pandas ewm(adjust=False, ignore_na=False).mean() down axis 0: starts at
+    each column's first observation and carries the value through NaNs.
+    """
+    n, m = x.shape
+    out = np.empty_like(x)
+    old_wt_factor = 1.0 - alpha
+    new_wt = alpha
+
+    weighted = x[0].copy()
+    old_wt = np.ones(m)
+    out[0] = weighted
+    for t in range(1, n):
+        cur = x[t]
+        obs = ~np.isnan(cur)
+        have = ~np.isnan(weighted)
+
+        old_wt = np.where(have, old_wt * old_wt_factor, old_wt)
+        upd = have & obs
+        blended = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+        weighted = np.where(upd & (weighted != cur), blended, weighted)
+        old_wt = np.where(upd, 1.0, old_wt)
+        weighted = np.where(~have & obs, cur, weighted)
+        out[t] = weighted
+    return out
+
+
+# Without numba, stepping NumPy row by row costs more than it saves for a
+# handful of series; walk each column with plain floats instead.
+SCALAR_MAX_COLUMNS = 8
+
+
+def _ewm_column(values: list, alpha: float) -> list:
+    """_ewm_core for one series, on Python floats (same arithmetic)."""
+    old_wt_factor = 1.0 - alpha
+    new_wt = alpha
+    weighted = values[0]
+    old_wt = 1.0
+    out = [weighted]
+    for cur in values[1:]:
+        if weighted == weighted:  # not NaN
+            old_wt *= old_wt_factor
+            if cur == cur:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                old_wt = 1.0
+        elif cur == cur:
+            weighted = cur
+        out.append(weighted)
+    return out
+
+
+def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    if HAVE_NUMBA or x.shape[1] > SCALAR_MAX_COLUMNS or len(x) == 0:
+        return _ewm_core(x, alpha)
+    return np.array([_ewm_column(col, alpha) for col in x.T.tolist()]).T.reshape(x.shape)
+
+
+# ---------------- Indicators ----------------
+def ema(x, span: int) -> np.ndarray:
+    """Exponential moving average (pandas ewm span, adjust=False)."""
+    arr, was_1d = _as_2d(x)
+    return _restore(_ewm(arr, _alpha(span=span)), was_1d)
+
+
+def wilder(x, length: int) -> np.ndarray:
+    """Wilder's smoothing (RMA): EMA with alpha = 1/length."""
+    arr, was_1d = _as_2d(x)
+    return _restore(_ewm(arr, _alpha(alpha=1.0 / length)), was_1d)
+
+
+def rsi(close, length: int = 14) -> np.ndarray:
+    """
+    RSI with Wilder smoothing. Flat stretches (no losses) read 50, matching
+    utils.indicators.rsi.
+    """
+    c, was_1d = _as_2d(close)
+    delta = c - _shift(c)
+
+    # NaN deltas count as 0 once a series has started; leading padding stays
+    # NaN so each column's smoothing starts at its own first bar.
+    started = np.maximum.accumulate(~np.isnan(c), axis=0)
+    gain = np.where(started, np.where(delta > 0, delta, 0.0), np.nan)
+    loss = np.where(started, np.where(delta < 0, -delta, 0.0), np.nan)
+
+    alpha = _alpha(alpha=1.0 / length)
+    avg_gain = _ewm(gain, alpha)
+    avg_loss = _ewm(loss, alpha)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / np.where(avg_loss == 0, np.nan, avg_loss)
+        out = 100 - (100 / (1 + rs))
+    return _restore(np.where(np.isnan(out), 50.0, out), was_1d)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True range; the first bar (no prior close) is High - Low."""
+    h, was_1d = _as_2d(high)
+    lo, _ = _as_2d(low)
+    c, _ = _as_2d(close)
+    prev_close = _shift(c)
+    tr = np.fmax(np.fmax(np.abs(h - lo), np.abs(h - prev_close)), np.abs(lo - prev_close))
+    return _restore(tr, was_1d)
+
+
+def atr(high, low, close, length: int = 14) -> np.ndarray:
+    """Average true range with Wilder smoothing."""
+    return wilder(true_range(high, low, close), length)
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple:
+    """Returns (macd_line, signal_line, histogram)."""
+    line = ema(close, fast) - ema(close, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+
+def bollinger_position(close, length: int = 20, num_std: float = 2.0) -> np.ndarray:
+    """
+    Position of close inside the Bollinger band (0 = lower, 1 = upper), with a
+    sample std over `length` bars. NaN until a full window exists or when the
+    band has zero width.
+    """
+    c, was_1d = _as_2d(close)
+    out = np.full_like(c, np.nan)
+    n = len(c)
+    if n >= length:
+        # Sum window offsets in a fixed order so a column gets the same
+        # result whether it's computed alone or inside a panel.
+        rows = n - length + 1
+        total = np.zeros((rows, c.shape[1]))
+        flat = np.ones(total.shape, dtype=bool)
+        for k in range(length):
+            total += c[k:k + rows]
+            flat &= c[k:k + rows] == c[:rows]
+        mean = total / length
+        sq = np.zeros_like(total)
+        for k in range(length):
+            sq += (c[k:k + rows] - mean) ** 2
+        # Identical closes have exactly zero width (no rounding residue)
+        std = np.where(flat, 0.0, np.sqrt(sq / (length - 1)))
+
+        lower = mean - num_std * std
+        width = 2 * num_std * std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pos = (c[length - 1:] - lower) / width
+        out[length - 1:] = np.where(width > 0, pos, np.nan)
+    return _restore(out, was_1d)
@@ -1,11 +1,12 @@
 import datetime as dt
-import requests
 import pandas as pd
 import streamlit as st
 
 from utils.logger import get_logger
-# DISABLED: Rate limiter was slowing down scanner too much
-# from utils.rate_limiter import tiingo_limiter
+from utils import http_client, tiingo_bars
+from utils.tiingo_bars import (  # re-exported for existing callers
+    tiingo_history, tiingo_history_async, tiingo_history_many, history_panel,
+)
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -14,123 +15,21 @@ TIINGO_BASE = "https://api.tiingo.com"
 
 
 # ---------------- Tiingo API ----------------
-@st.cache_data(show_spinner=False, ttl=60 * 60 * 24)
-def tiingo_all_us_tickers(token: str) -> list[str]:
-    """
-    Build a broad Tiingo ticker universe via utilities/search (A–Z) and allow REITs/Equities.
-    """
-    import string
-    url = "https://api.tiingo.com/tiingo/utilities/search"
-    headers = {"Content-Type": "application/json"}
-    tickers = []
-
-    logger.info("Running Tiingo A–Z fetch (enhanced REIT/Equity version)...")
-
-    try:
-        for ch in string.ascii_uppercase:
-            params = {"token": token, "query": ch, "limit": 1000}
-            r = requests.get(url, headers=headers, params=params, timeout=20)
-
-            if not r.ok:
-                logger.warning(f"Search chunk {ch} failed ({r.status_code})")
-                continue
-
-            data = r.json()
-            for d in data:
-                sym = (d.get("ticker") or "").upper()
-                exch = d.get("exchange", "")
-                asset_type = d.get("assetType", "")
-                if (
-                    sym.isalpha()
-                    and exch not in ("CRYPTO", "FX")
-                    and asset_type in ("Stock", "REIT", "Equity", "ETF", "")
-                ):
-                    tickers.append(sym)
-
-        tickers = sorted(set(tickers))
-        logger.info(f"Tiingo ticker universe fetch complete ({len(tickers)} symbols)")
-
-        if "EFC" in tickers:
-            logger.debug("EFC included successfully.")
-        else:
-            logger.warning("EFC still missing.")
-
-    except Exception as e:
-        logger.error(f"Tiingo tickers fetch error: {e}")
-        return []
-
-    logger.debug("tiingo_all_us_tickers() CALLED from enhanced A–Z fallback")
-    return tickers
-
-
-
-
-
-
-
-
-@st.cache_data(show_spinner=False, ttl=60 * 30)
-def tiingo_history(ticker: str, token: str, days: int) -> pd.DataFrame | None:
-    """Fetch daily historical data for a US stock from Tiingo."""
-    import datetime as dt
-    import pandas as pd
-    import requests
-
-    start = (dt.date.today() - dt.timedelta(days=days)).isoformat()
-    url = f"https://api.tiingo.com/tiingo/daily/{ticker.lower()}/prices"
-
-    params = {
-        "token": token,
-        "startDate": start,
-        "resampleFreq": "daily",
-        "format": "json",
-    }
-
-    try:
-        r = requests.get(url, params=params, timeout=15)
-
-        if r.status_code != 200:
-            logger.warning(f"Tiingo fetch failed for {ticker}: {r.status_code}")
-            return None
-
-        data = r.json()
-        if not data or not isinstance(data, list):
-            logger.warning(f"No data in Tiingo response for {ticker}")
-            return None
+# Bar loading, the ticker list and the market snapshot live in the
+# Streamlit-free utils.tiingo_bars; the pages get cached wrappers.
+tiingo_all_us_tickers = st.cache_data(show_spinner=False, ttl=60 * 60 * 24)(
+    tiingo_bars.tiingo_all_us_tickers
+)
 
-        df = pd.DataFrame(data)
-        if df.empty:
-            return None
-
-        df["date"] = pd.to_datetime(df["date"])
-        df.rename(
-            columns={
-                "date": "Date",
-                "open": "Open",
-                "high": "High",
-                "low": "Low",
-                "close": "Close",
-                "volume": "Volume",
-            },
-            inplace=True,
-        )
-        return df[["Date", "Open", "High", "Low", "Close", "Volume"]].sort_values(
-            "Date"
-        ).reset_index(drop=True)
 
-    except Exception as e:
-        logger.error(f"Error fetching {ticker}: {e}")
-        return None
-    
     # ---------------- Tiingo Sector Metadata ----------------
 @st.cache_data(show_spinner=False, ttl=60 * 60 * 24)
 def get_tiingo_sector(ticker: str, token: str) -> str:
     """Fetch sector classification for a ticker from Tiingo metadata."""
-    import requests
     url = f"https://api.tiingo.com/tiingo/daily/{ticker.lower()}"
     headers = {"Authorization": f"Token {token}"}
     try:
-        r = requests.get(url, headers=headers, timeout=10)
+        r = http_client.get(url, headers=headers, timeout=10)
         if not r.ok:
             logger.warning(f"Sector fetch failed for {ticker}: {r.status_code}")
             return "Unknown"
@@ -148,7 +47,6 @@ def get_tiingo_sector(ticker: str, token: str) -> str:
 def get_sector_snapshot(token: str):
     """Return quick EMA-based trend snapshot for key sector ETFs."""
     import pandas as pd
-    import requests
 
     sectors = {
         "XLK": "Technology",
@@ -171,7 +69,7 @@ def get_sector_snapshot(token: str):
             url = f"https://api.tiingo.com/tiingo/daily/{sym.lower()}/prices"
             headers = {"Authorization": f"Token {token}"}
             params = {"resampleFreq": "daily", "startDate": start}
-            r = requests.get(url, headers=headers, params=params, timeout=10)
+            r = http_client.get(url, headers=headers, params=params, timeout=10)
             if r.status_code != 200:
                 continue
             df = pd.DataFrame(r.json())
@@ -275,41 +173,8 @@ def analyze_sector_rotation(token: str) -> dict:
     }
 
 # ---------------- Market Snapshot (SPY + VIX) ----------------
-import datetime as dt
-import pandas as pd
-import requests
-
-@st.cache_data(ttl=60 * 60 * 6)  # refresh every 6 hours
-def get_market_snapshot(token: str):
-    """Fetch SPY trend and volatility context for Smart Mode."""
-    try:
-        start = (dt.date.today() - dt.timedelta(days=60)).isoformat()
-        url = f"https://api.tiingo.com/tiingo/daily/spy/prices"
-        params = {"token": token, "startDate": start, "resampleFreq": "daily"}
-        r = requests.get(url, params=params, timeout=10)
-        if r.status_code != 200:
-            return None
-        df = pd.DataFrame(r.json())
-        df["date"] = pd.to_datetime(df["date"])
-        df["EMA20"] = df["close"].ewm(span=20).mean()
-        df["EMA50"] = df["close"].ewm(span=50).mean()
-        df["TR"] = df["close"].diff().abs()
-        df["ATR20"] = df["TR"].rolling(20).mean()
-        atrp = (df["ATR20"].iloc[-1] / df["close"].iloc[-1]) * 100
+get_market_snapshot = st.cache_data(ttl=60 * 60 * 6)(tiingo_bars.get_market_snapshot)  # refresh every 6 hours
 
-        bias = "Uptrend" if df["EMA20"].iloc[-1] > df["EMA50"].iloc[-1] else "Downtrend"
-        vol_regime = "High Volatility" if atrp > 2.5 else "Low Volatility"
-
-        return {
-            "bias": bias,
-            "vol_regime": vol_regime,
-            "spy_price": round(df["close"].iloc[-1], 2),
-            "atrp": round(atrp, 2)
-        }
-    except Exception as e:
-        print(f"⚠️ Market snapshot error: {e}")
-        return None
-    
     # ---------------- Intraday (custom timeframe) Data Fetch ----------------
 @st.cache_data(ttl=600, show_spinner=False)
 def fetch_tiingo_intraday(symbol: str, token: str,
@@ -320,7 +185,7 @@ def fetch_tiingo_intraday(symbol: str, token: str,
     timeframe: one of {"5min","15min","30min","1hour","2hour","4hour"}
     lookback_days: how many days of data to pull back.
     """
-    import pandas as pd, requests, datetime as dt
+    import pandas as pd, datetime as dt
 
     start = (dt.datetime.utcnow() - dt.timedelta(days=lookback_days)).isoformat()
     url = f"https://api.tiingo.com/iex/{symbol.lower()}/prices"
@@ -328,7 +193,7 @@ def fetch_tiingo_intraday(symbol: str, token: str,
     headers = {"Authorization": f"Token {token}"}
 
     try:
-        r = requests.get(url, headers=headers, params=params, timeout=10)
+        r = http_client.get(url, headers=headers, params=params, timeout=10)
         if not r.ok:
             return pd.DataFrame()
         df = pd.DataFrame(r.json())
@@ -340,7 +205,6 @@ def fetch_tiingo_intraday(symbol: str, token: str,
     except Exception:
         return pd.DataFrame()
 
-import requests
 import streamlit as st
 
 @st.cache_data(ttl=86400)
@@ -352,7 +216,7 @@ def get_next_earnings_date(symbol: str, token: str) -> str:
     url = f"https://api.tiingo.com/tiingo/daily/{symbol.lower()}"
     headers = {"Authorization": f"Token {token}"}
     try:
-        r = requests.get(url, headers=headers, timeout=5)
+        r = http_client.get(url, headers=headers, timeout=5)
 
         if not r.ok:
             print(f"⚠️ Earnings fetch failed for {symbol}: {r.status_code}")
@@ -369,11 +233,10 @@ def get_next_earnings_date(symbol: str, token: str) -> str:
 @st.cache_data(ttl=60)
 def fetch_tiingo_realtime_quote(symbol: str, token: str) -> dict:
     """Return real-time quote (includes pre- and post-market) from Tiingo IEX."""
-    import requests
     url = f"https://api.tiingo.com/iex/{symbol.lower()}"
     headers = {"Authorization": f"Token {token}"}
     try:
-        r = requests.get(url, headers=headers, timeout=10)
+        r = http_client.get(url, headers=headers, timeout=10)
 
         if not r.ok:
             print(f"⚠️ Tiingo real-time fetch failed {symbol}: {r.status_code}")
@@ -419,7 +282,7 @@ def fetch_institutional_ownership(symbol: str, token: str) -> dict:
     headers = {"Authorization": f"Token {token}"}
 
     try:
-        r = requests.get(url, headers=headers, timeout=10)
+        r = http_client.get(url, headers=headers, timeout=10)
         if r.ok:
             data = r.json()
             if data:
@@ -0,0 +1,318 @@
+"""
+Streamlit-free Tiingo loaders shared by the app and the headless scan jobs.
+
+Daily bars (served from utils.bar_store and topped up incrementally), the
+bulk universe loader on utils.fetch_engine, the A–Z ticker list and the SPY
+market snapshot live here so scripts/scan.py and cron jobs can import them
+without Streamlit. utils.tiingo_api re-exports them, wrapping the ticker
+list and market snapshot in st.cache_data for the pages.
+"""
+
+import asyncio
+import datetime as dt
+
+import pandas as pd
+
+from utils import bar_store, fetch_engine, http_client
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# ---------------- Ticker Universe ----------------
+def tiingo_all_us_tickers(token: str) -> list[str]:
+    """
+    Build a broad Tiingo ticker universe via utilities/search (A–Z) and allow REITs/Equities.
+    """
+    import string
+    url = "https://api.tiingo.com/tiingo/utilities/search"
+    headers = {"Content-Type": "application/json"}
+    tickers = []
+
+    logger.info("Running Tiingo A–Z fetch (enhanced REIT/Equity version)...")
+
+    try:
+        for ch in string.ascii_uppercase:
+            params = {"token": token, "query": ch, "limit": 1000}
+            r = http_client.get(url, headers=headers, params=params, timeout=20)
+
+            if not r.ok:
+                logger.warning(f"Search chunk {ch} failed ({r.status_code})")
+                continue
+
+            data = r.json()
+            for d in data:
+                sym = (d.get("ticker") or "").upper()
+                exch = d.get("exchange", "")
+                asset_type = d.get("assetType", "")
+                if (
+                    sym.isalpha()
+                    and exch not in ("CRYPTO", "FX")
+                    and asset_type in ("Stock", "REIT", "Equity", "ETF", "")
+                ):
+                    tickers.append(sym)
+
+        tickers = sorted(set(tickers))
+        logger.info(f"Tiingo ticker universe fetch complete ({len(tickers)} symbols)")
+
+        if "EFC" in tickers:
+            logger.debug("EFC included successfully.")
+        else:
+            logger.warning("EFC still missing.")
+
+    except Exception as e:
+        logger.error(f"Tiingo tickers fetch error: {e}")
+        return []
+
+    logger.debug("tiingo_all_us_tickers() CALLED from enhanced A–Z fallback")
+    return tickers
+
+
+def _daily_request(ticker: str, token: str, start: dt.date,
+                   end: dt.date | None = None) -> tuple[str, dict]:
+    """URL and query params for a daily-prices request."""
+    url = f"https://api.tiingo.com/tiingo/daily/{ticker.lower()}/prices"
+
+    params = {
+        "token": token,
+        "startDate": start.isoformat(),
+        "resampleFreq": "daily",
+        "format": "json",
+    }
+    if end is not None:
+        params["endDate"] = end.isoformat()
+    return url, params
+
+
+def _bars_from_json(ticker: str, data) -> pd.DataFrame | None:
+    """Normalize a daily-prices payload to OHLCV columns sorted by Date."""
+    if not isinstance(data, list):
+        logger.warning(f"No data in Tiingo response for {ticker}")
+        return None
+
+    df = pd.DataFrame(data)
+    if df.empty:
+        return pd.DataFrame(columns=bar_store.BAR_COLUMNS)
+
+    df["date"] = pd.to_datetime(df["date"])
+    df.rename(
+        columns={
+            "date": "Date",
+            "open": "Open",
+            "high": "High",
+            "low": "Low",
+            "close": "Close",
+            "volume": "Volume",
+        },
+        inplace=True,
+    )
+    return df[["Date", "Open", "High", "Low", "Close", "Volume"]].sort_values(
+        "Date"
+    ).reset_index(drop=True)
+
+
+def _fetch_daily_bars(ticker: str, token: str, start: dt.date,
+                      end: dt.date | None = None) -> pd.DataFrame | None:
+    """
+    Download daily bars between `start` and `end` (inclusive; `end` defaults to
+    today), normalized to OHLCV columns. Returns an empty frame when Tiingo has
+    no bars in the range and None when the request fails.
+    """
+    url, params = _daily_request(ticker, token, start, end)
+
+    try:
+        r = http_client.get(url, params=params, timeout=15)
+
+        if r.status_code != 200:
+            logger.warning(f"Tiingo fetch failed for {ticker}: {r.status_code}")
+            return None
+
+        return _bars_from_json(ticker, r.json())
+
+    except Exception as e:
+        logger.error(f"Error fetching {ticker}: {e}")
+        return None
+
+
+async def _fetch_daily_bars_async(client, ticker: str, token: str, start: dt.date,
+                                  end: dt.date | None = None) -> pd.DataFrame | None:
+    """Async twin of _fetch_daily_bars for the bulk fetch engine."""
+    url, params = _daily_request(ticker, token, start, end)
+
+    try:
+        r = await fetch_engine.get(client, url, params=params, timeout=15)
+
+        if r.status_code != 200:
+            logger.warning(f"Tiingo fetch failed for {ticker}: {r.status_code}")
+            return None
+
+        return _bars_from_json(ticker, r.json())
+
+    except Exception as e:
+        logger.error(f"Error fetching {ticker}: {e}")
+        return None
+
+
+# ---------------- Daily History ----------------
+# History is cached per ticker (in memory and in the on-disk bar store), not
+# per window: the widest history fetched so far is kept and sliced for any
+# narrower `days` request. Only the missing pieces go to the network:
+#   - an older prefix when a wider window than ever before is requested
+#   - bars from the last stored date onward once a new end-of-day bar is due
+# The sync and async loaders share the plan/apply steps and differ only in
+# how they download.
+
+def _plan_history(ticker: str, days: int) -> dict:
+    """Work out which date ranges must be downloaded to serve `days` of history."""
+    start_date = dt.date.today() - dt.timedelta(days=days)
+    stored, meta = bar_store.load_bars(ticker)
+    plan = {"start": start_date, "stored": stored, "meta": meta,
+            "prefix": None, "tail": None}
+
+    if stored is None or stored.empty:
+        plan["tail"] = (start_date, None)  # full window
+        return plan
+
+    # Older prefix: only the range before the stored window start
+    if not bar_store.covers(meta, start_date):
+        plan["prefix"] = (start_date, bar_store.stored_start(meta) - dt.timedelta(days=1))
+
+    # Incremental top-up: re-request the last stored bar (it may have been
+    # revised after the close) plus anything newer.
+    if not bar_store.is_fresh(meta):
+        plan["tail"] = (bar_store.last_bar_date(stored), None)
+    return plan
+
+
+def _apply_history(ticker: str, plan: dict, prefix: pd.DataFrame | None,
+                   tail: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Merge downloaded pieces into the bar store and slice the requested window."""
+    start_date = plan["start"]
+    stored = plan["stored"]
+
+    if stored is None or stored.empty:
+        if tail is None or tail.empty:
+            return None
+        merged = bar_store.save_bars(ticker, tail, start_date)
+        return bar_store.slice_window(merged, start_date)
+
+    fetched = []
+    if plan["prefix"] is not None:
+        if prefix is None:
+            start_date = bar_store.stored_start(plan["meta"])  # serve what we have
+        else:
+            fetched.append(prefix)
+
+    refreshed = plan["tail"] is not None and tail is not None
+    if refreshed:
+        fetched.append(tail)
+
+    if fetched:
+        stored = bar_store.save_bars(
+            ticker, pd.concat(fetched, ignore_index=True), start_date, refreshed=refreshed
+        )
+
+    window = bar_store.slice_window(stored, start_date)
+    return window if not window.empty else None
+
+
+def tiingo_history(ticker: str, token: str, days: int) -> pd.DataFrame | None:
+    """
+    Fetch daily historical data for a US stock from Tiingo, served from the
+    bar store and topped up incrementally.
+    """
+    plan = _plan_history(ticker, days)
+    prefix = _fetch_daily_bars(ticker, token, *plan["prefix"]) if plan["prefix"] else None
+    tail = _fetch_daily_bars(ticker, token, *plan["tail"]) if plan["tail"] else None
+    return _apply_history(ticker, plan, prefix, tail)
+
+
+async def tiingo_history_async(client, ticker: str, token: str, days: int) -> pd.DataFrame | None:
+    """
+    Async tiingo_history for use under fetch_engine. Store reads and writes run
+    in a worker thread so they don't stall the event loop.
+    """
+    plan = await asyncio.to_thread(_plan_history, ticker, days)
+    prefix = tail = None
+    if plan["prefix"]:
+        prefix = await _fetch_daily_bars_async(client, ticker, token, *plan["prefix"])
+    if plan["tail"]:
+        tail = await _fetch_daily_bars_async(client, ticker, token, *plan["tail"])
+    if not plan["prefix"] and not plan["tail"]:
+        return _apply_history(ticker, plan, None, None)  # store hit, nothing to write
+    return await asyncio.to_thread(_apply_history, ticker, plan, prefix, tail)
+
+
+def tiingo_history_many(tickers: list[str], token: str, days: int, progress_cb=None,
+                        concurrency: int = fetch_engine.DEFAULT_CONCURRENCY,
+                        process=None, cpu_executor=None) -> dict:
+    """
+    Bulk-load daily history for a whole universe.
+
+    Tickers are deduped (order preserved) and loaded on the asyncio fetch
+    engine with up to `concurrency` requests in flight; store hits return
+    without a network call. Returns {ticker: DataFrame} for every ticker with
+    data. `progress_cb(done, total)` is called from the calling thread, so it
+    can safely update Streamlit widgets.
+
+    When `process(ticker, df)` is given it runs in `cpu_executor` (see
+    fetch_engine.map_bounded) as each frame lands and its return value
+    replaces the frame in the result; returning None drops the ticker, so
+    `process` can also filter the universe.
+    """
+    unique = [t for t in dict.fromkeys(tickers) if t]
+
+    async def _fetch(client, ticker):
+        return await tiingo_history_async(client, ticker, token, days)
+
+    results = fetch_engine.map_bounded(
+        unique, _fetch, concurrency=concurrency, process=process,
+        cpu_executor=cpu_executor, progress_cb=progress_cb,
+    )
+    return {t: r for t, r in results.items() if r is not None
+            and not (isinstance(r, pd.DataFrame) and r.empty)}
+
+
+def history_panel(frames: dict[str, pd.DataFrame], field: str = "Close") -> pd.DataFrame:
+    """
+    Align one OHLCV field across tickers into a (date × ticker) matrix.
+    Dates missing for a ticker (late listing, halts) are NaN.
+    """
+    if not frames:
+        return pd.DataFrame()
+    panel = pd.concat(
+        {t: df.set_index("Date")[field] for t, df in frames.items()}, axis=1
+    )
+    return panel.sort_index()
+
+
+# ---------------- Market Snapshot (SPY + VIX) ----------------
+def get_market_snapshot(token: str):
+    """Fetch SPY trend and volatility context for Smart Mode."""
+    try:
+        start = (dt.date.today() - dt.timedelta(days=60)).isoformat()
+        url = f"https://api.tiingo.com/tiingo/daily/spy/prices"
+        params = {"token": token, "startDate": start, "resampleFreq": "daily"}
+        r = http_client.get(url, params=params, timeout=10)
+        if r.status_code != 200:
+            return None
+        df = pd.DataFrame(r.json())
+        df["date"] = pd.to_datetime(df["date"])
+        df["EMA20"] = df["close"].ewm(span=20).mean()
+        df["EMA50"] = df["close"].ewm(span=50).mean()
+        df["TR"] = df["close"].diff().abs()
+        df["ATR20"] = df["TR"].rolling(20).mean()
+        atrp = (df["ATR20"].iloc[-1] / df["close"].iloc[-1]) * 100
+
+        bias = "Uptrend" if df["EMA20"].iloc[-1] > df["EMA50"].iloc[-1] else "Downtrend"
+        vol_regime = "High Volatility" if atrp > 2.5 else "Low Volatility"
+
+        return {
+            "bias": bias,
+            "vol_regime": vol_regime,
+            "spy_price": round(df["close"].iloc[-1], 2),
+            "atrp": round(atrp, 2)
+        }
+    except Exception as e:
+        print(f"⚠️ Market snapshot error: {e}")
+        return None
@@ -10,6 +10,8 @@ from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
+from utils import ta_kernels
+
 
 # ---------------------------------------------------------------------------
 # TRADE MANAGEMENT PLAN
@@ -172,19 +174,13 @@ def _compute_intraday_signals_df(df) -> IntradaySignals:
     if df is None or getattr(df, "empty", True) or len(df) < 50:
         return IntradaySignals(None, None, None, None, None, False)
 
-    ema20 = df["close"].ewm(span=20).mean()
-    ema50 = df["close"].ewm(span=50).mean()
-
-    delta = df["close"].diff()
-    gain = delta.clip(lower=0.0).rolling(14).mean()
-    loss = (-delta.clip(upper=0.0)).rolling(14).mean()
-    avg_loss = loss.replace(0, float("nan"))
-    rs_series = gain / avg_loss
-    rsi_series = 100 - (100 / (1 + rs_series))
-    rsi_val = float(rsi_series.iloc[-1]) if rsi_series.iloc[-1] == rsi_series.iloc[-1] else 50.0
+    close = df["close"].to_numpy(dtype=float)
+    ema20 = ta_kernels.ema(close, 20)
+    ema50 = ta_kernels.ema(close, 50)
+    rsi_val = float(ta_kernels.rsi(close, 14)[-1])
 
-    ema_fast_above_slow = bool(ema20.iloc[-1] > ema50.iloc[-1])
-    ema_slope_up = bool(ema20.iloc[-1] > ema20.iloc[-2]) if len(ema20) > 2 else None
+    ema_fast_above_slow = bool(ema20[-1] > ema50[-1])
+    ema_slope_up = bool(ema20[-1] > ema20[-2]) if len(ema20) > 2 else None
 
     vol_ratio = None
     if "volume" in df.columns:
@@ -6,17 +6,9 @@ list for SwingFinder use later.
 
 import os
 import json
-import requests
-import time
 from datetime import datetime
 
-# Import rate limiter if available
-try:
-    from utils.rate_limiter import tiingo_limiter
-    USE_RATE_LIMITER = True
-except ImportError:
-    USE_RATE_LIMITER = False
-    print("⚠️ Rate limiter not available, using manual delays")
+from utils import http_client
 
 TIINGO_TOKEN = os.getenv("TIINGO_TOKEN")  # or set manually for quick tests
 CACHE_PATH = os.path.join(os.path.dirname(__file__), "filtered_universe.json")
@@ -197,17 +189,10 @@ def fetch_tiingo_universe(token: str) -> list[dict]:
 
         for ticker in batch:
             try:
-                # Rate limit if available
-                if USE_RATE_LIMITER:
-                    tiingo_limiter.wait_if_needed()
-
                 # Validate ticker with metadata endpoint
                 url = f"https://api.tiingo.com/tiingo/daily/{ticker.lower()}"
-                resp = requests.get(url, headers=headers, timeout=5)
-
-                # Record request if rate limiter available
-                if USE_RATE_LIMITER:
-                    tiingo_limiter.record_request()
+                # Paced by the Tiingo bucket; 429s are re-sent after it backs off
+                resp = http_client.get(url, headers=headers, timeout=5)
 
                 if resp.ok:
                     data = resp.json()
@@ -220,10 +205,6 @@ def fetch_tiingo_universe(token: str) -> list[dict]:
                 else:
                     print(f"  ⚠️ {ticker} not found ({resp.status_code})")
 
-                # Manual delay if no rate limiter
-                if not USE_RATE_LIMITER:
-                    time.sleep(0.1)
-
             except Exception as e:
                 print(f"  ❌ Error validating {ticker}: {e}")
                 continue
@@ -3,31 +3,22 @@ Yahoo Finance Fundamentals Integration
 Fetch and analyze fundamental data for stocks using yfinance
 
 NOTE: Yahoo Finance throttles aggressive requests (>5-10 per second).
-      Rate limiting is applied to prevent throttling.
+      yfinance does its own HTTP, so calls are paced by the shared "yahoo"
+      token bucket in utils.rate_limiter.
 """
 
 import yfinance as yf
 import streamlit as st
-import time
 from typing import Dict, Any, Optional
 
-# Simple rate limiter for Yahoo Finance (more lenient than Tiingo)
-_last_yahoo_request_time = 0
-_yahoo_min_delay = 0.2  # 200ms between requests (max 5 per second - Yahoo can handle this)
+from utils.rate_limiter import get_bucket
+
+_yahoo_bucket = get_bucket("yahoo")
 
 
 def _yahoo_rate_limit():
     """Apply rate limiting for Yahoo Finance requests."""
-    global _last_yahoo_request_time
-
-    current_time = time.time()
-    time_since_last = current_time - _last_yahoo_request_time
-
-    if time_since_last < _yahoo_min_delay:
-        sleep_time = _yahoo_min_delay - time_since_last
-        time.sleep(sleep_time)
-
-    _last_yahoo_request_time = time.time()
+    _yahoo_bucket.acquire()
 
 
 @st.cache_data(ttl=86400, show_spinner=False)  # Cache for 24 hours
@@ -36,7 +27,7 @@ def get_yahoo_fundamentals(ticker: str) -> Optional[Dict[str, Any]]:
     Fetch fundamental data for a ticker from Yahoo Finance.
     Returns key financial metrics.
 
-    NOTE: Rate limited to prevent Yahoo throttling (max 2 requests/second).
+    NOTE: Rate limited to prevent Yahoo throttling (see PROVIDER_BUDGETS).
     """
     try:
         # Apply rate limiting
@@ -56,6 +47,7 @@ def get_yahoo_fundamentals(ticker: str) -> Optional[Dict[str, Any]]:
             print(f"⚠️ Yahoo Finance may be throttling requests for {ticker}")
             return None
 
+        _yahoo_bucket.recover()
         return {
             "market_cap": info.get('marketCap', 0),
             "revenue": info.get('totalRevenue', 0),
@@ -74,8 +66,8 @@ def get_yahoo_fundamentals(ticker: str) -> Optional[Dict[str, Any]]:
         # Check if it's a throttling error
         error_msg = str(e).lower()
         if '429' in error_msg or 'too many requests' in error_msg or 'rate limit' in error_msg:
-            print(f"⚠️ Yahoo Finance throttled request for {ticker}. Waiting 2 seconds...")
-            time.sleep(2)  # Wait 2 seconds on throttle
+            print(f"⚠️ Yahoo Finance throttled request for {ticker}. Backing off...")
+            _yahoo_bucket.throttle()
         return None
 
 